@@ -4,11 +4,19 @@
 
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
 import plotly.graph_objects as go
+import sys
+import time
 from pathlib import Path
 
+# Módulos do projeto (raiz do repositório, mesma base de ./Modelos)
+sys.path.append('.')
+from feature_store import ANO_REFERENCIA, preparar_classificacao, preparar_regressao
+from registro_modelos import ModeloRegistrado, assinatura
+
+inicio_execucao = time.perf_counter()
+
 st.set_page_config(page_title="Previsões ML", page_icon="🤖", layout="wide")
 
 st.title("🤖 Previsões com Machine Learning")
@@ -16,15 +24,51 @@ st.markdown("### Simulador de Previsões de Vendas")
 
 st.markdown("---")
 
+# Streamlit reexecuta a página a cada interação: os modelos ficam em cache
+# no processo (compartilhados entre sessões) e só são relidos do disco
+# quando a assinatura (versão + mtime dos arquivos do registro) muda
+@st.cache_resource(max_entries=1, show_spinner="Carregando modelos...")
+def carregar_modelos(assinaturas):
+    inicio = time.perf_counter()
+    modelos = {}
+    for caminho, _ in assinaturas:
+        modelo = ModeloRegistrado(caminho)
+        modelo.modelo, modelo.scaler, modelo.encoders  # abre os artefatos agora, não na previsão
+        modelos[modelo.nome] = modelo
+    return modelos, time.perf_counter() - inicio
+
+
+def prever_cenarios(cenarios):
+    """
+    Valor previsto e probabilidade de conversão para cada linha de cenarios
+    (dados brutos do formulário). As features saem das mesmas funções do
+    treino e cada modelo roda uma única vez para todas as linhas.
+    """
+    # Condições assumidas pela página: carro do ano anterior, financiado em 60x com 5% de desconto
+    base = cenarios.assign(ano_fabricacao=ANO_REFERENCIA - 1, forma_pagamento='Financiamento',
+                           numero_parcelas=60, desconto_percentual=5)
+    X_reg, X_clf = base.copy(), base.copy()
+    preparar_regressao(X_reg, encoders_reg)
+    preparar_classificacao(X_clf, encoders_clf)
+    return modelos['regressao'].prever(X_reg), modelos['classificacao'].prever(X_clf)
+
+
 # Tentar carregar modelos
 try:
-    modelo_reg = joblib.load('./Modelos/modelo_regressao.pkl')
-    scaler_reg = joblib.load('./Modelos/scaler_regressao.pkl')
-    modelo_clf = joblib.load('./Modelos/modelo_classificacao.pkl')
-    scaler_clf = joblib.load('./Modelos/scaler_classificacao.pkl')
+    inicio_carga = time.perf_counter()
+    modelos, segundos_disco = carregar_modelos((assinatura('regressao'), assinatura('classificacao')))
+    segundos_carga = time.perf_counter() - inicio_carga
+    
+    # Encoders das categóricas, os mesmos usados no treino (salvos com o modelo)
+    encoders_reg = modelos['regressao'].encoders
+    encoders_clf = modelos['classificacao'].encoders
     
     modelos_carregados = True
     st.success("✅ Modelos de ML carregados com sucesso!")
+    st.caption(f"⏱️ Modelos: regressão v{modelos['regressao'].versao:03d}, "
+               f"classificação v{modelos['classificacao'].versao:03d} | "
+               f"carga nesta interação {segundos_carga*1000:.1f} ms "
+               f"(leitura do disco: {segundos_disco*1000:.0f} ms, só quando os arquivos mudam)")
     
 except Exception as e:
     modelos_carregados = False
@@ -42,7 +86,8 @@ with col1:
     st.subheader("👤 Informações do Cliente")
     
     idade = st.slider("Idade", 18, 80, 45)
-    genero = st.selectbox("Gênero", ["Masculino", "Feminino", "Outro"])
+    genero = st.selectbox("Gênero", list(encoders_reg['genero'].classes_) if modelos_carregados
+                          else ["Masculino", "Feminino", "Outro"])
     renda_anual = st.number_input(
         "Renda Anual (R$)",
         min_value=100000,
@@ -55,7 +100,7 @@ with col1:
 with col2:
     st.subheader("🚗 Informações do Veículo")
     
-    marca = st.selectbox("Marca", [
+    marca = st.selectbox("Marca", list(encoders_reg['marca'].classes_) if modelos_carregados else [
         "Porsche", "Ferrari", "Lamborghini", "McLaren", 
         "Mercedes-AMG", "BMW M", "Audi Sport", "Aston Martin"
     ])
@@ -63,7 +108,7 @@ with col2:
     potencia = st.slider("Potência (CV)", 300, 1000, 600)
     cilindradas = st.slider("Cilindradas (L)", 2.0, 8.0, 4.0, 0.5)
     
-    categoria = st.selectbox("Categoria", [
+    categoria = st.selectbox("Categoria", list(encoders_reg['categoria'].classes_) if modelos_carregados else [
         "Superesportivo", "Esportivo", "Gran Turismo", "Roadster"
     ])
     
@@ -90,7 +135,8 @@ with col2:
     dia_semana = st.selectbox("Dia da Semana", [
         "Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"
     ])
-    dia_semana_num = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"].index(dia_semana)
+    # Mesma numeração do treino: strftime('%w') do SQLite (Domingo = 0)
+    dia_semana_num = ["Domingo", "Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado"].index(dia_semana)
 
 with col3:
     hora = st.slider("Hora do Test Drive", 8, 20, 14)
@@ -103,67 +149,33 @@ if st.button("🔮 Fazer Previsão", type="primary", use_container_width=True):
     if not modelos_carregados:
         st.error("❌ Modelos não carregados. Execute os notebooks de ML primeiro.")
     else:
-        # Preparar dados
-        genero_encoded = 0 if genero == "Masculino" else 1
-        categoria_encoded = ["Superesportivo", "Esportivo", "Gran Turismo", "Roadster"].index(categoria)
-        marca_encoded = ["Porsche", "Ferrari", "Lamborghini", "McLaren", 
-                        "Mercedes-AMG", "BMW M", "Audi Sport", "Aston Martin"].index(marca)
-        
-        idade_veiculo = 2024 - 2023  # Assumir carro novo
         poder_compra = renda_anual / 1_000_000
         ratio_preco_renda = preco_base / renda_anual
         
-        # Features para regressão
-        X_reg = pd.DataFrame({
+        cenario = pd.DataFrame({
             'idade_cliente': [idade],
-            'genero_encoded': [genero_encoded],
+            'genero': [genero],
             'renda_anual': [renda_anual],
             'potencia_cv': [potencia],
             'cilindradas': [cilindradas],
-            'idade_veiculo': [idade_veiculo],
-            'categoria_encoded': [categoria_encoded],
-            'marca_encoded': [marca_encoded],
-            'preco_base': [preco_base],
-            'pagamento_encoded': [0],  # Financiamento
-            'numero_parcelas': [60],
-            'desconto_percentual': [5],
-            'poder_compra': [poder_compra],
-            'ratio_preco_renda': [ratio_preco_renda]
-        })
-        
-        # Features para classificação
-        final_semana = 1 if dia_semana_num >= 5 else 0
-        horario_comercial = 1 if 9 <= hora <= 18 else 0
-        
-        X_clf = pd.DataFrame({
-            'idade_cliente': [idade],
-            'genero_encoded': [genero_encoded],
-            'renda_anual': [renda_anual],
-            'potencia_cv': [potencia],
-            'cilindradas': [cilindradas],
-            'idade_veiculo': [idade_veiculo],
-            'categoria_encoded': [categoria_encoded],
-            'marca_encoded': [marca_encoded],
+            'categoria': [categoria],
+            'marca': [marca],
             'preco_base': [preco_base],
             'avaliacao': [avaliacao],
             'dia_semana': [dia_semana_num],
-            'hora': [hora],
-            'poder_compra': [poder_compra],
-            'ratio_preco_renda': [ratio_preco_renda],
-            'final_semana': [final_semana],
-            'horario_comercial': [horario_comercial]
+            'hora': [hora]
         })
         
         try:
-            # Fazer previsões
-            X_reg_scaled = scaler_reg.transform(X_reg)
-            valor_previsto = modelo_reg.predict(X_reg_scaled)[0]
-            
-            X_clf_scaled = scaler_clf.transform(X_clf)
-            prob_conversao = modelo_clf.predict_proba(X_clf_scaled)[0][1]
+            # Fazer previsões (scaler + modelo de cada versão registrada)
+            inicio_previsao = time.perf_counter()
+            valores, probabilidades = prever_cenarios(cenario)
+            valor_previsto, prob_conversao = valores[0], probabilidades[0]
+            segundos_previsao = time.perf_counter() - inicio_previsao
             
             st.markdown("---")
             st.header("🎯 Resultados da Previsão")
+            st.caption(f"⏱️ Previsão: {segundos_previsao*1000:.1f} ms")
             
             # Métricas
             col1, col2, col3 = st.columns(3)
@@ -286,6 +298,80 @@ if st.button("🔮 Fazer Previsão", type="primary", use_container_width=True):
 else:
     st.info("👆 Preencha os dados acima e clique em 'Fazer Previsão'")
 
+# Simulação what-if: todos os cenários em um único DataFrame, pontuados
+# com uma chamada de cada modelo (centenas de linhas custam quase o mesmo
+# que uma previsão única)
+st.markdown("---")
+st.header("📈 Simulação What-if")
+st.markdown("Sensibilidade ao preço por marca e comparação entre marcas e categorias, "
+            "mantendo os demais dados do formulário.")
+
+N_PRECOS = 40
+faixa_preco = st.slider("Faixa de Preço Base (R$)", 200000, 5000000, (400000, 3000000), step=100000)
+
+if st.button("📈 Simular Cenários", use_container_width=True):
+    
+    if not modelos_carregados:
+        st.error("❌ Modelos não carregados. Execute os notebooks de ML primeiro.")
+    else:
+        # Só categorias conhecidas pelos dois modelos
+        marcas = [m for m in encoders_reg['marca'].classes_ if m in set(encoders_clf['marca'].classes_)]
+        categorias = [c for c in encoders_reg['categoria'].classes_ if c in set(encoders_clf['categoria'].classes_)]
+        precos = np.linspace(faixa_preco[0], faixa_preco[1], N_PRECOS)
+        
+        curvas = pd.MultiIndex.from_product([marcas, precos], names=['marca', 'preco_base']).to_frame(index=False)
+        matriz = pd.MultiIndex.from_product([marcas, categorias], names=['marca', 'categoria']).to_frame(index=False)
+        grade = pd.concat([
+            curvas.assign(categoria=categoria, grupo='curva'),
+            matriz.assign(preco_base=preco_base, grupo='matriz')
+        ], ignore_index=True).assign(
+            idade_cliente=idade, genero=genero, renda_anual=renda_anual, potencia_cv=potencia,
+            cilindradas=cilindradas, avaliacao=avaliacao, dia_semana=dia_semana_num, hora=hora
+        )
+        
+        try:
+            inicio_simulacao = time.perf_counter()
+            grade['valor_previsto'], grade['prob_conversao'] = prever_cenarios(grade)
+            segundos_simulacao = time.perf_counter() - inicio_simulacao
+            st.caption(f"⏱️ {len(grade):,} cenários em {segundos_simulacao*1000:.1f} ms "
+                       f"(uma chamada por modelo)")
+            
+            curvas = grade[grade['grupo'] == 'curva']
+            
+            # Probabilidade de conversão x preço (uma curva por marca)
+            st.subheader(f"💰 Sensibilidade ao Preço — {categoria}")
+            fig = go.Figure()
+            for nome_marca, pontos in curvas.groupby('marca', sort=False):
+                fig.add_trace(go.Scatter(
+                    x=pontos['preco_base'], y=pontos['prob_conversao'] * 100, mode='lines', name=nome_marca,
+                    line={'width': 4 if nome_marca == marca else 1.5}
+                ))
+            fig.update_layout(height=400, xaxis_title="Preço Base (R$)", yaxis_title="Probabilidade de Conversão (%)")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            fig = go.Figure()
+            for nome_marca, pontos in curvas.groupby('marca', sort=False):
+                fig.add_trace(go.Scatter(
+                    x=pontos['preco_base'], y=pontos['valor_previsto'], mode='lines', name=nome_marca,
+                    line={'width': 4 if nome_marca == marca else 1.5}
+                ))
+            fig.update_layout(height=400, xaxis_title="Preço Base (R$)", yaxis_title="Valor Previsto de Venda (R$)")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Marca x categoria no preço do formulário
+            st.subheader(f"🏷️ Marca x Categoria — Preço Base R$ {preco_base:,.0f}")
+            tabela = grade[grade['grupo'] == 'matriz'].pivot(index='marca', columns='categoria', values='prob_conversao')
+            fig = go.Figure(go.Heatmap(
+                z=tabela.values * 100, x=tabela.columns, y=tabela.index,
+                colorscale='RdYlGn', colorbar={'title': '%'},
+                hovertemplate="%{y} / %{x}<br>Conversão: %{z:.1f}%<extra></extra>"
+            ))
+            fig.update_layout(height=450)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        except Exception as e:
+            st.error(f"❌ Erro na simulação: {e}")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -293,3 +379,4 @@ st.markdown("""
     <p>🤖 Previsões baseadas em modelos de Machine Learning treinados com dados históricos</p>
 </div>
 """, unsafe_allow_html=True)
+st.caption(f"⏱️ Execução da página: {(time.perf_counter() - inicio_execucao)*1000:.1f} ms")
@@ -0,0 +1,244 @@
+"""
+Camada de Leitura do Banco
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Ponto único de leitura do SQLite para notebooks, feature store e aplicações
+(Streamlit, extração de features em paralelo). Em vez de cada consumidor
+abrir e fechar a própria conexão:
+
+- um pool por arquivo .db com conexões somente leitura (mode=ro e
+  query_only), reaproveitadas entre chamadas e entre threads
+- o banco é colocado em modo WAL: leitores não bloqueiam o ETL gravando nem
+  são bloqueados por ele
+- as conexões usam mmap_size (páginas lidas direto do arquivo mapeado) e
+  guardam os comandos já compilados (cached_statements do sqlite3), então
+  repetir uma consulta não a prepara de novo
+- iterar_consulta entrega o resultado em blocos de DataFrames, sem montar
+  todas as linhas em memória
+
+Cada conexão é usada por uma thread de cada vez: o pool entrega uma conexão
+livre ou abre outra até TAMANHO_POOL e, acima disso, espera uma ser
+devolvida. Em um processo filho (fork de ProcessPool) o pool abre conexões
+novas; as herdadas do processo pai não são usadas.
+
+Uso:
+    from acesso_dados import consultar, iterar_consulta, contar_linhas
+
+    df = consultar("SELECT * FROM veiculos WHERE preco_base > ?", (500_000,))
+    for bloco in iterar_consulta(QUERY_REGRESSAO, {'ultimo_id': 0, 'ate_id': 10**9}):
+        ...
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from carregar_sqlite import DB_PATH, aplicar_pragmas
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+# Conexões abertas por banco (threads além disso esperam uma ficar livre)
+TAMANHO_POOL = max(4, os.cpu_count() or 1)
+
+# Linhas por DataFrame em iterar_consulta
+TAMANHO_BLOCO = 50_000
+
+# Comandos compilados guardados por conexão
+COMANDOS_PREPARADOS = 256
+
+# Segundos esperando um bloqueio antes de falhar
+ESPERA_BLOQUEIO = 30
+
+PRAGMAS_LEITURA = {
+    'mmap_size': str(256 * 1024 * 1024),  # 256 MB
+    'cache_size': '-65536',  # ~64 MB (valor negativo = KiB)
+    'temp_store': 'MEMORY',
+    'query_only': 'ON'
+}
+
+# Pools já criados neste processo: {caminho absoluto do .db: PoolLeitura}
+_POOLS = {}
+_TRAVA_POOLS = threading.Lock()
+
+# ===============================================
+# POOL DE CONEXÕES
+# ===============================================
+
+def ativar_wal(db_path):
+    """
+    Coloca o banco em modo WAL (a configuração fica gravada no arquivo).
+    Retorna o modo final, ou None se não foi possível trocar.
+    """
+    conn = sqlite3.connect(db_path, timeout=ESPERA_BLOQUEIO)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    except sqlite3.OperationalError as erro:
+        print(f"⚠️ Não foi possível ativar WAL em {db_path}: {erro}")
+        return None
+    finally:
+        conn.close()
+
+
+class PoolLeitura:
+    """
+    Conexões somente leitura de um banco, compartilhadas entre threads
+    """
+
+    def __init__(self, db_path, tamanho=TAMANHO_POOL):
+        self.db_path = os.path.abspath(db_path)
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Banco não encontrado: {self.db_path}")
+        self.tamanho = tamanho
+        self.modo_journal = ativar_wal(self.db_path)
+        self._herdadas = []
+        self._reiniciar()
+
+    def __repr__(self):
+        return f"PoolLeitura({self.db_path!r}, abertas={self._abertas}, tamanho={self.tamanho})"
+
+    def _reiniciar(self):
+        self.pid = os.getpid()
+        self._livres = queue.LifoQueue()
+        self._abertas = 0
+        self._trava = threading.Lock()
+
+    def _abrir(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, timeout=ESPERA_BLOQUEIO,
+            check_same_thread=False,  # passa de uma thread para outra, uma de cada vez
+            cached_statements=COMANDOS_PREPARADOS
+        )
+        aplicar_pragmas(conn, PRAGMAS_LEITURA)
+        return conn
+
+    def _obter(self):
+        if os.getpid() != self.pid:
+            # Processo filho: as conexões do pai ficam referenciadas (fechá-las
+            # aqui mexeria nos arquivos do pai) e não são usadas
+            self._herdadas.append(self._livres)
+            self._reiniciar()
+
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava:
+            abrir = self._abertas < self.tamanho
+            if abrir:
+                self._abertas += 1
+        if not abrir:
+            return self._livres.get()
+        try:
+            return self._abrir()
+        except Exception:
+            with self._trava:
+                self._abertas -= 1
+            raise
+
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma conexão durante o bloco with
+        """
+        conn = self._obter()
+        try:
+            yield conn
+        finally:
+            self._livres.put(conn)
+
+    def fechar(self):
+        """
+        Fecha as conexões livres (as emprestadas voltam ao pool normalmente)
+        """
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._trava:
+                self._abertas -= 1
+
+
+def obter_pool(db_path=DB_PATH):
+    """
+    Pool do banco, criado no primeiro uso e reaproveitado pelo processo
+    """
+    caminho = os.path.abspath(db_path)
+    with _TRAVA_POOLS:
+        if caminho not in _POOLS:
+            _POOLS[caminho] = PoolLeitura(caminho)
+        return _POOLS[caminho]
+
+
+@contextmanager
+def conexao(db_path=DB_PATH):
+    """
+    Conexão somente leitura emprestada do pool do banco:
+
+        with conexao(db_path) as conn:
+            pd.read_sql(query, conn)
+    """
+    with obter_pool(db_path).conexao() as conn:
+        yield conn
+
+
+def fechar_pools():
+    """
+    Fecha as conexões livres de todos os pools do processo
+    """
+    with _TRAVA_POOLS:
+        for pool in _POOLS.values():
+            pool.fechar()
+        _POOLS.clear()
+
+# ===============================================
+# CONSULTAS
+# ===============================================
+
+def consultar(sql, params=None, db_path=DB_PATH):
+    """
+    Resultado completo da consulta em um DataFrame
+    """
+    with conexao(db_path) as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+
+def iterar_consulta(sql, params=None, tamanho_bloco=TAMANHO_BLOCO, db_path=DB_PATH):
+    """
+    Gera o resultado em DataFrames de até tamanho_bloco linhas. A conexão
+    fica emprestada até o gerador terminar (ou ser descartado).
+    """
+    with conexao(db_path) as conn:
+        cursor = conn.execute(sql, params or ())
+        colunas = [descricao[0] for descricao in cursor.description]
+        try:
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    break
+                yield pd.DataFrame.from_records(linhas, columns=colunas)
+        finally:
+            cursor.close()
+
+
+def contar_linhas(tabelas=None, db_path=DB_PATH):
+    """
+    {tabela: nº de linhas} em uma única consulta (todas as tabelas do banco
+    se tabelas=None)
+    """
+    with conexao(db_path) as conn:
+        if tabelas is None:
+            tabelas = [nome for (nome,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+        if not tabelas:
+            return {}
+        sql = '\nUNION ALL\n'.join(f'SELECT ?, COUNT(*) FROM "{tabela}"' for tabela in tabelas)
+        return dict(conn.execute(sql, list(tabelas)).fetchall())
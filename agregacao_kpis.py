@@ -0,0 +1,335 @@
+"""
+Agregação dos KPIs da Análise Exploratória
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Calcula de uma vez os KPIs gerais (total de vendas, faturamento, ticket
+médio, clientes únicos, venda mínima e máxima) e os cubos por dimensão
+(quantidade, faturamento, ticket médio, venda mínima e máxima) que o
+notebook 02_analise_exploratoria montava com um groupby por gráfico sobre
+todo o df_vendas: ano_mes, mes, marca, categoria, genero, profissao,
+estado, forma_pagamento e vendedor.
+
+Dois modos, com o mesmo resultado:
+- 'sql': o agrupamento é feito no SQLite, em dois grãos (mês x veículo x
+  vendedor x forma de pagamento, e gênero x profissão x estado do cliente),
+  cujo tamanho depende do catálogo e não do volume de vendas; só essas
+  linhas chegam ao pandas, que soma cada cubo a partir delas
+- 'blocos': as vendas são lidas uma única vez, em blocos
+  (acesso_dados.iterar_consulta). Cada bloco vira agregados parciais de
+  todos os cubos (contagem, soma, mínimo e máximo), combinados com os dos
+  blocos anteriores. A memória fica no tamanho de um bloco mais os cubos (e
+  o conjunto de cliente_id, para contar clientes únicos).
+
+kpis_em_blocos aceita qualquer sequência de DataFrames (ex.: blocos lidos de
+CSV/Parquet) com valor_venda, cliente_id e as colunas das dimensões.
+
+Uso:
+    from agregacao_kpis import calcular_kpis
+    resultado = calcular_kpis(DB_PATH)
+    resultado['kpis']['faturamento_total'], resultado['cubos']['marca']
+
+    python agregacao_kpis.py --modo blocos
+    python agregacao_kpis.py --comparar
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from acesso_dados import conexao, consultar, iterar_consulta
+from carregar_sqlite import DB_PATH
+from dimensao_datas import garantir_datas, verificar_datas
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+TAMANHO_BLOCO = 100_000
+
+# Dimensões dos cubos, na ordem em que aparecem na base
+DIMENSOES = ['ano_mes', 'mes', 'marca', 'categoria', 'genero', 'profissao', 'estado',
+             'forma_pagamento', 'vendedor']
+
+# Mesmas vendas do query_vendas do notebook (concluídas, com cliente, veículo
+# e vendedor), só com as colunas usadas pelos KPIs (modo 'blocos')
+SQL_BASE = """
+SELECT
+    v.cliente_id,
+    v.valor_venda,
+    v.ano || '-' || printf('%02d', v.mes) as ano_mes,
+    v.mes,
+    ve.marca,
+    ve.categoria,
+    c.genero,
+    c.profissao,
+    c.estado,
+    v.forma_pagamento,
+    vd.nome as vendedor
+FROM vendas v
+JOIN clientes c ON v.cliente_id = c.cliente_id
+JOIN veiculos ve ON v.veiculo_id = ve.veiculo_id
+JOIN vendedores vd ON v.vendedor_id = vd.vendedor_id
+WHERE v.status_venda = 'Concluída'
+"""
+
+# Modo 'sql': as mesmas vendas agregadas no SQLite em dois grãos, cujo nº de
+# linhas depende do catálogo e não do volume de vendas. Os cubos saem da
+# soma das linhas de cada grão no pandas.
+#
+# Grão das vendas: mês x veículo x vendedor x forma de pagamento, agrupado
+# pelos IDs (marca, categoria e nome do vendedor entram depois do GROUP BY)
+SQL_GRAO_VENDAS = """
+WITH grao AS (
+    SELECT
+        v.ano,
+        v.mes,
+        v.veiculo_id,
+        v.vendedor_id,
+        v.forma_pagamento,
+        COUNT(*) as quantidade,
+        SUM(v.valor_venda) as faturamento,
+        MIN(v.valor_venda) as minimo,
+        MAX(v.valor_venda) as maximo
+    FROM vendas v
+    JOIN clientes c ON v.cliente_id = c.cliente_id
+    JOIN veiculos ve ON v.veiculo_id = ve.veiculo_id
+    JOIN vendedores vd ON v.vendedor_id = vd.vendedor_id
+    WHERE v.status_venda = 'Concluída'
+    GROUP BY v.ano, v.mes, v.veiculo_id, v.vendedor_id, v.forma_pagamento
+)
+SELECT
+    g.ano || '-' || printf('%02d', g.mes) as ano_mes,
+    g.mes,
+    ve.marca,
+    ve.categoria,
+    g.forma_pagamento,
+    vd.nome as vendedor,
+    g.quantidade,
+    g.faturamento,
+    g.minimo,
+    g.maximo
+FROM grao g
+JOIN veiculos ve ON g.veiculo_id = ve.veiculo_id
+JOIN vendedores vd ON g.vendedor_id = vd.vendedor_id
+"""
+
+# Grão dos clientes: gênero x profissão x estado. O resumo por cliente segue a
+# ordem do índice idx_vendas_concluidas_cliente (sem ordenação) e dá também
+# o nº de clientes únicos.
+SQL_GRAO_CLIENTES = """
+WITH por_cliente AS (
+    SELECT
+        v.cliente_id,
+        c.genero,
+        c.profissao,
+        c.estado,
+        COUNT(*) as quantidade,
+        SUM(v.valor_venda) as faturamento,
+        MIN(v.valor_venda) as minimo,
+        MAX(v.valor_venda) as maximo
+    FROM vendas v
+    JOIN clientes c ON v.cliente_id = c.cliente_id
+    JOIN veiculos ve ON v.veiculo_id = ve.veiculo_id
+    JOIN vendedores vd ON v.vendedor_id = vd.vendedor_id
+    WHERE v.status_venda = 'Concluída'
+    GROUP BY v.cliente_id
+)
+SELECT
+    genero,
+    profissao,
+    estado,
+    SUM(quantidade) as quantidade,
+    SUM(faturamento) as faturamento,
+    MIN(minimo) as minimo,
+    MAX(maximo) as maximo,
+    COUNT(*) as clientes
+FROM por_cliente
+GROUP BY genero, profissao, estado
+"""
+
+DIMENSOES_CLIENTE = ['genero', 'profissao', 'estado']
+
+# Como cada medida parcial é combinada (entre blocos ou linhas de um grão)
+COMBINACAO = {'quantidade': 'sum', 'faturamento': 'sum', 'minimo': 'min', 'maximo': 'max'}
+
+# ===============================================
+# AGREGADOS PARCIAIS
+# ===============================================
+
+def _somar(grao, dimensao):
+    """
+    Cubo de uma dimensão a partir de linhas já agregadas (ou de vendas com
+    quantidade = 1). Valores nulos da dimensão ficam de fora, como no groupby.
+    """
+    return grao.groupby(dimensao, observed=True, sort=False)[list(COMBINACAO)].agg(COMBINACAO)
+
+
+def _cubos(grao, dimensoes):
+    cubos = {dimensao: _somar(grao, dimensao) for dimensao in dimensoes}
+    cubos['total'] = _somar(grao.assign(total='total'), 'total')
+    return cubos
+
+
+def agregar_bloco(bloco, dimensoes=DIMENSOES):
+    """
+    Agregados parciais de um bloco de vendas:
+        {'cubos': {'total' e cada dimensão: DataFrame}, 'clientes': set de cliente_id}
+    """
+    valores = bloco['valor_venda']
+    grao = bloco.assign(quantidade=1, faturamento=valores, minimo=valores, maximo=valores)
+    return {'cubos': _cubos(grao, dimensoes), 'clientes': set(bloco['cliente_id'].unique().tolist())}
+
+
+def combinar_parciais(parcial, outro):
+    """
+    Soma dois agregados parciais (contagens e somas somadas, mínimo dos
+    mínimos, máximo dos máximos)
+    """
+    cubos = {}
+    for dimensao, cubo in parcial['cubos'].items():
+        cubos[dimensao] = pd.concat([cubo, outro['cubos'][dimensao]]).groupby(
+            level=0, observed=True, sort=False
+        ).agg(COMBINACAO)
+    return {'cubos': cubos, 'clientes': parcial['clientes'] | outro['clientes']}
+
+
+def _montar_resultado(cubos, clientes_unicos):
+    """
+    {'kpis': {...}, 'cubos': {dimensão: DataFrame}} a partir dos cubos
+    combinados (indexados pelo valor da dimensão)
+    """
+    total = cubos.pop('total')
+    quantidade = int(total['quantidade'].sum())
+    faturamento = float(total['faturamento'].sum())
+    kpis = {
+        'total_vendas': quantidade,
+        'faturamento_total': faturamento,
+        'ticket_medio': faturamento / quantidade if quantidade else np.nan,
+        'clientes_unicos': int(clientes_unicos),
+        'venda_minima': float(total['minimo'].min()),
+        'venda_maxima': float(total['maximo'].max())
+    }
+
+    resultado = {}
+    for dimensao, cubo in cubos.items():
+        cubo = cubo.sort_index()
+        resultado[dimensao] = pd.DataFrame({
+            dimensao: cubo.index.to_numpy(),
+            'quantidade': cubo['quantidade'].astype('int64').to_numpy(),
+            'faturamento': cubo['faturamento'].astype('float64').to_numpy(),
+            'ticket_medio': (cubo['faturamento'] / cubo['quantidade']).astype('float64').to_numpy(),
+            'venda_minima': cubo['minimo'].astype('float64').to_numpy(),
+            'venda_maxima': cubo['maximo'].astype('float64').to_numpy()
+        }).infer_objects()
+    return {'kpis': kpis, 'cubos': resultado}
+
+# ===============================================
+# MODOS
+# ===============================================
+
+def kpis_em_blocos(blocos, dimensoes=DIMENSOES):
+    """
+    KPIs e cubos em uma passada por uma sequência de DataFrames de vendas
+    """
+    parcial = None
+    for bloco in blocos:
+        atual = agregar_bloco(bloco, dimensoes)
+        parcial = atual if parcial is None else combinar_parciais(parcial, atual)
+    if parcial is None:
+        parcial = agregar_bloco(pd.DataFrame(columns=['cliente_id', 'valor_venda', *dimensoes]), dimensoes)
+    return _montar_resultado(parcial['cubos'], len(parcial['clientes']))
+
+
+def kpis_sql(db_path=DB_PATH, dimensoes=DIMENSOES):
+    """
+    KPIs e cubos a partir dos grãos agregados pelo SQLite
+    """
+    grao_vendas = consultar(SQL_GRAO_VENDAS, db_path=db_path)
+    grao_clientes = consultar(SQL_GRAO_CLIENTES, db_path=db_path)
+    cubos = _cubos(grao_vendas, [d for d in dimensoes if d not in DIMENSOES_CLIENTE])
+    cubos.update({d: _somar(grao_clientes, d) for d in dimensoes if d in DIMENSOES_CLIENTE})
+    cubos = {dimensao: cubos[dimensao] for dimensao in ['total', *dimensoes]}
+    return _montar_resultado(cubos, grao_clientes['clientes'].sum())
+
+
+def calcular_kpis(db_path=DB_PATH, modo='sql', tamanho_bloco=TAMANHO_BLOCO, dimensoes=DIMENSOES,
+                  preparar_banco=False):
+    """
+    KPIs gerais e cubos das vendas concluídas do banco:
+        {'kpis': {'total_vendas', 'faturamento_total', 'ticket_medio', 'clientes_unicos',
+                  'venda_minima', 'venda_maxima'},
+         'cubos': {dimensão: DataFrame [dimensão, quantidade, faturamento, ticket_medio,
+                                        venda_minima, venda_maxima]}}
+    Só lê o banco; preparar_banco=True migra antes um banco sem as colunas
+    de datas (dimensao_datas.garantir_datas).
+    """
+    inicio = time.perf_counter()
+
+    # ano e mes vêm das colunas derivadas gravadas pelo ETL
+    if preparar_banco:
+        garantir_datas(db_path)
+    with conexao(db_path) as conn:
+        verificar_datas(conn)
+
+    if modo == 'sql':
+        resultado = kpis_sql(db_path, dimensoes)
+    elif modo == 'blocos':
+        resultado = kpis_em_blocos(iterar_consulta(SQL_BASE, tamanho_bloco=tamanho_bloco, db_path=db_path),
+                                   dimensoes)
+    else:
+        raise ValueError(f"Modo desconhecido: {modo} (use 'sql' ou 'blocos')")
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ KPIs e {len(resultado['cubos'])} cubos ({modo}): "
+          f"{resultado['kpis']['total_vendas']:,} vendas em {segundos*1000:.0f} ms")
+    return resultado
+
+
+def comparar_modos(db_path=DB_PATH, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Calcula nos dois modos e confere se os resultados são iguais
+    """
+    sql = calcular_kpis(db_path, 'sql')
+    blocos = calcular_kpis(db_path, 'blocos', tamanho_bloco)
+    for nome, valor in sql['kpis'].items():
+        if not np.isclose(valor, blocos['kpis'][nome], equal_nan=True):
+            print(f"⚠️ KPI {nome} diferente: sql={valor} blocos={blocos['kpis'][nome]}")
+            return False
+    for dimensao, cubo in sql['cubos'].items():
+        try:
+            pd.testing.assert_frame_equal(cubo, blocos['cubos'][dimensao], check_dtype=False)
+        except AssertionError as erro:
+            print(f"⚠️ Cubo {dimensao} diferente entre os modos: {erro}")
+            return False
+    print("✓ Modos sql e blocos com o mesmo resultado")
+    return True
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="KPIs e cubos da análise exploratória em uma passada")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db")
+    parser.add_argument("--modo", choices=['sql', 'blocos'], default='sql', help="onde agrupar")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO, help="linhas por bloco (modo blocos)")
+    parser.add_argument("--comparar", action="store_true", help="calcula nos dois modos e compara")
+    parser.add_argument("--preparar-banco", action="store_true",
+                        help="migra antes um banco sem as colunas de datas")
+    args = parser.parse_args()
+
+    if args.preparar_banco:
+        garantir_datas(args.banco)
+    if args.comparar:
+        comparar_modos(args.banco, args.tamanho_bloco)
+    else:
+        resultado = calcular_kpis(args.banco, args.modo, args.tamanho_bloco)
+        print("\n📊 KPIs:")
+        for nome, valor in resultado['kpis'].items():
+            print(f"   • {nome}: {valor:,.2f}")
+        for dimensao, cubo in resultado['cubos'].items():
+            print(f"\n🎯 {dimensao}:")
+            print(cubo.to_string(index=False))
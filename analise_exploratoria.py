@@ -1,15 +1,18 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from agregacao_kpis import kpis_em_blocos
+from armazenamento_colunar import ler_tabela
+
 # Configura o estilo dos gráficos
 sns.set(style="whitegrid", palette="muted")
 
-# Carrega os dados
-clientes = pd.read_csv("dados/clientes.csv")
-vendas = pd.read_csv("dados/vendas.csv")
-veiculos = pd.read_csv("dados/veiculos.csv")
-vendedores = pd.read_csv("dados/vendedores.csv")
+# Carrega os dados (Parquet quando disponível, senão CSV)
+DIRETORIO_DADOS = "dados"
+clientes = ler_tabela(DIRETORIO_DADOS, "clientes")
+vendas = ler_tabela(DIRETORIO_DADOS, "vendas")
+veiculos = ler_tabela(DIRETORIO_DADOS, "veiculos")
+vendedores = ler_tabela(DIRETORIO_DADOS, "vendedores", colunas=["vendedor_id", "nome"])
 
 # Exibe informações iniciais
 print("=== Clientes ===")
@@ -20,9 +23,18 @@ print("=== Vendas ===")
 print(vendas.info(), "\n")
 print(vendas.describe(), "\n")
 
+# Vendas por estado e por vendedor em uma única passada (agregacao_kpis.py);
+# estado e vendedor entram por mapeamento do ID, sem merge das tabelas
+estado_cliente = clientes.set_index("cliente_id")["estado"]
+nome_vendedor = vendedores.set_index("vendedor_id")["nome"]
+cubos = kpis_em_blocos(
+    [vendas.assign(estado=vendas["cliente_id"].map(estado_cliente),
+                   vendedor=vendas["vendedor_id"].map(nome_vendedor))],
+    dimensoes=["estado", "vendedor"]
+)["cubos"]
+
 # Exemplo 1: quantidade de vendas por estado
-vendas_clientes = vendas.merge(clientes, on="cliente_id", how="left")
-estado_vendas = vendas_clientes["estado"].value_counts().head(10)
+estado_vendas = cubos["estado"].set_index("estado")["quantidade"].sort_values(ascending=False).head(10)
 
 plt.figure(figsize=(10,5))
 sns.barplot(x=estado_vendas.index, y=estado_vendas.values)
@@ -32,8 +44,7 @@ plt.ylabel("Quantidade de Vendas")
 plt.show()
 
 # Exemplo 2: ticket médio por vendedor
-vendas_vendedores = vendas.merge(vendedores, on="vendedor_id", how="left")
-ticket_medio = vendas_vendedores.groupby("nome")["valor_venda"].mean().sort_values(ascending=False)
+ticket_medio = cubos["vendedor"].set_index("vendedor")["ticket_medio"].sort_values(ascending=False)
 
 plt.figure(figsize=(10,5))
 ticket_medio.head(10).plot(kind="bar")
@@ -0,0 +1,166 @@
+"""
+Armazenamento Colunar (Parquet)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Formato colunar gravado ao lado dos CSVs da pasta Dados/:
+- colunas tipadas (inteiros, decimais e booleanos não viram texto)
+- categóricas (marca, categoria, estado, forma_pagamento...) com dictionary encoding
+- datas como tipo date/timestamp de verdade
+- leitura com projeção de colunas e filtros aplicados pelo leitor (pushdown),
+  sem carregar o arquivo inteiro em memória
+
+Depende do pyarrow (pip install pyarrow).
+"""
+
+import operator
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from esquema_dados import ESQUEMA, aplicar_esquema, ler_csv
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+# Colunas de baixa cardinalidade gravadas com dictionary encoding
+COLUNAS_DICIONARIO = [
+    'marca', 'categoria', 'estado', 'cidade', 'forma_pagamento', 'status_venda',
+    'genero', 'profissao', 'cor', 'tipo_servico', 'cluster_nome'
+]
+
+COMPRESSAO = 'zstd'
+
+# Tamanho dos row groups: é a unidade que os filtros conseguem pular
+LINHAS_POR_GRUPO = 250_000
+
+# Operadores de filtro aceitos no fallback para CSV (mesma sintaxe do pyarrow)
+OPERADORES_FILTRO = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    'in': lambda serie, valor: serie.isin(valor),
+    'not in': lambda serie, valor: ~serie.isin(valor)
+}
+
+# ===============================================
+# ESCRITA
+# ===============================================
+
+def caminho_parquet(caminho):
+    """
+    'Dados/vendas.csv' -> 'Dados/vendas.parquet'
+    """
+    return os.path.splitext(caminho)[0] + '.parquet'
+
+
+def _tipar_colunas(df):
+    """
+    Converte datas (colunas data_*) para datetime e categóricas para category
+    """
+    df = df.copy()
+    for coluna in df.columns:
+        if coluna.startswith('data_') and not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+        elif coluna in COLUNAS_DICIONARIO and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+def _para_tabela_arrow(df):
+    """
+    Monta a tabela Arrow: datas sem horário viram date32, com horário viram timestamp
+    """
+    tabela = pa.Table.from_pandas(_tipar_colunas(df), preserve_index=False)
+    campos = []
+    for campo, coluna in zip(tabela.schema, tabela.columns):
+        if pa.types.is_timestamp(campo.type):
+            datas = df[campo.name] if pd.api.types.is_datetime64_any_dtype(df[campo.name]) \
+                else pd.to_datetime(df[campo.name], errors='coerce')
+            if (datas.dropna() == datas.dropna().dt.normalize()).all():
+                campo = campo.with_type(pa.date32())
+            else:
+                campo = campo.with_type(pa.timestamp('s'))
+        campos.append(campo)
+    # safe=False: descarta frações de segundo e ajusta a unidade sem erro
+    return tabela.cast(pa.schema(campos, metadata=tabela.schema.metadata), safe=False)
+
+
+def salvar_parquet(df, caminho, linhas_por_grupo=LINHAS_POR_GRUPO):
+    """
+    Grava o DataFrame em Parquet (se caminho terminar em .csv, troca a extensão)
+    """
+    destino = caminho_parquet(caminho)
+    tabela = _para_tabela_arrow(df)
+    dicionario = [coluna for coluna in tabela.column_names if coluna in COLUNAS_DICIONARIO]
+    pq.write_table(tabela, destino, compression=COMPRESSAO,
+                   use_dictionary=dicionario or False, row_group_size=linhas_por_grupo)
+    return destino
+
+
+class EscritorParquet:
+    """
+    Grava um Parquet em blocos (um row group por bloco), para a geração em
+    streaming. O esquema é definido pelo primeiro bloco.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho_parquet(caminho)
+        self._escritor = None
+        self._esquema = None
+
+    def escrever(self, df):
+        tabela = _para_tabela_arrow(df)
+        if self._escritor is None:
+            dicionario = [coluna for coluna in tabela.column_names if coluna in COLUNAS_DICIONARIO]
+            self._esquema = tabela.schema
+            self._escritor = pq.ParquetWriter(self.caminho, self._esquema, compression=COMPRESSAO,
+                                              use_dictionary=dicionario or False)
+        self._escritor.write_table(tabela.cast(self._esquema))
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+# ===============================================
+# LEITURA
+# ===============================================
+
+def ler_parquet(caminho, colunas=None, filtros=None):
+    """
+    Lê um Parquet lendo só as colunas pedidas e aplicando os filtros no
+    leitor (row groups fora do filtro nem são descomprimidos).
+
+    filtros segue o formato do pyarrow, ex.:
+        [('status_venda', '==', 'Concluída'), ('valor_venda', '>', 500000)]
+    Datas voltam como datetime64 e as categóricas como category.
+    """
+    tabela = pq.read_table(caminho_parquet(caminho), columns=colunas, filters=filtros)
+    return tabela.to_pandas(date_as_object=False)
+
+
+def ler_tabela(diretorio, nome, colunas=None, filtros=None):
+    """
+    Lê Dados/<nome>.parquet quando existir; senão cai no CSV (aplicando a
+    projeção na leitura e os filtros depois de carregar). Em ambos os casos
+    as colunas saem com os tipos de esquema_dados.
+    """
+    base = os.path.join(diretorio, nome)
+    tabela = nome if nome in ESQUEMA else None
+    if os.path.exists(base + '.parquet'):
+        return aplicar_esquema(ler_parquet(base + '.parquet', colunas=colunas, filtros=filtros), tabela)
+
+    if tabela:
+        df = ler_csv(base + '.csv', tabela, usecols=colunas)
+    else:
+        df = aplicar_esquema(pd.read_csv(base + '.csv', usecols=colunas))
+    for coluna, operador, valor in filtros or []:
+        df = df[OPERADORES_FILTRO[operador](df[coluna], valor)]
+    return df.reset_index(drop=True)
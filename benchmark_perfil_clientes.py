@@ -0,0 +1,161 @@
+"""
+Benchmark da Consulta de Perfil de Clientes
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Compara, em bancos sintéticos de tamanho crescente, a consulta de perfil do
+clustering com JOIN direto das tabelas filhas (versão antiga, com produto
+cartesiano por cliente) e a versão pré-agregada de feature_store.py.
+
+Para cada escala mostra o tempo total, o tempo por cliente (deve ficar
+estável conforme a base cresce) e quantas linhas o JOIN direto produz antes
+do GROUP BY. O parâmetro --historico multiplica vendas e test drives por
+cliente, que é onde o JOIN direto degrada.
+
+Uso:
+    python benchmark_perfil_clientes.py --clientes 10000 100000 1000000
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from carregar_sqlite import carregar_csvs
+from feature_store import QUERY_PERFIL_CLIENTES
+from generate_data import gerar_dados_streaming
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+ESCALAS = [10_000, 100_000, 1_000_000]
+
+# Proporções da base padrão do generate_data (por cliente)
+VENDAS_POR_CLIENTE = 0.75
+TEST_DRIVES_POR_CLIENTE = 1.5
+SERVICOS_POR_CLIENTE = 0.4
+
+# Versão anterior da consulta (ml_clustering.ipynb), mantida só para comparação
+QUERY_PERFIL_JOIN_DIRETO = """
+SELECT
+    c.cliente_id,
+    c.nome,
+    c.genero,
+    CAST((julianday('now') - julianday(c.data_nascimento)) / 365.25 AS INTEGER) as idade,
+    c.renda_anual,
+    c.profissao,
+    c.estado,
+    COUNT(DISTINCT v.venda_id) as total_compras,
+    COALESCE(SUM(v.valor_venda), 0) as valor_total_gasto,
+    COALESCE(AVG(v.valor_venda), 0) as ticket_medio,
+    COALESCE(MAX(v.data_venda), c.data_cadastro) as ultima_compra,
+    COUNT(DISTINCT td.test_drive_id) as total_test_drives,
+    COALESCE(AVG(td.avaliacao), 0) as avaliacao_media_test_drive,
+    COUNT(DISTINCT s.servico_id) as total_servicos
+FROM clientes c
+LEFT JOIN vendas v ON c.cliente_id = v.cliente_id AND v.status_venda = 'Concluída'
+LEFT JOIN test_drives td ON c.cliente_id = td.cliente_id
+LEFT JOIN servicos_pos_venda s ON v.venda_id = s.venda_id
+GROUP BY c.cliente_id
+"""
+
+# Linhas que o JOIN direto gera antes do GROUP BY
+QUERY_LINHAS_JOIN_DIRETO = """
+SELECT COUNT(*)
+FROM clientes c
+LEFT JOIN vendas v ON c.cliente_id = v.cliente_id AND v.status_venda = 'Concluída'
+LEFT JOIN test_drives td ON c.cliente_id = td.cliente_id
+LEFT JOIN servicos_pos_venda s ON v.venda_id = s.venda_id
+"""
+
+# ===============================================
+# BASE SINTÉTICA
+# ===============================================
+
+def criar_banco(n_clientes, diretorio, historico=1.0):
+    """
+    Gera os CSVs em streaming e carrega em um banco novo dentro de diretorio
+    """
+    dados = os.path.join(diretorio, 'dados')
+    db_path = os.path.join(diretorio, 'perfil.db')
+    gerar_dados_streaming(
+        diretorio_saida=dados,
+        n_clientes=n_clientes,
+        n_vendas=int(n_clientes * VENDAS_POR_CLIENTE * historico),
+        n_test_drives=int(n_clientes * TEST_DRIVES_POR_CLIENTE * historico),
+        n_servicos=int(n_clientes * SERVICOS_POR_CLIENTE * historico)
+    )
+    carregar_csvs(diretorio_dados=dados, db_path=db_path, recriar=True, ignorar_duplicados=True)
+    shutil.rmtree(dados)
+    return db_path
+
+# ===============================================
+# MEDIÇÃO
+# ===============================================
+
+def medir(conn, query):
+    """
+    Executa a consulta lendo todas as linhas; retorna (linhas, segundos)
+    """
+    inicio = time.perf_counter()
+    linhas = 0
+    cursor = conn.execute(query)
+    while True:
+        bloco = cursor.fetchmany(50_000)
+        if not bloco:
+            break
+        linhas += len(bloco)
+    return linhas, time.perf_counter() - inicio
+
+
+def executar_benchmark(escalas=ESCALAS, historico=1.0, join_direto=True):
+    """
+    Mede as duas consultas em cada escala e imprime a tabela de resultados
+    """
+    resultados = []
+    for n_clientes in escalas:
+        diretorio = tempfile.mkdtemp(prefix='benchmark_perfil_')
+        try:
+            print(f"\n📊 Preparando base com {n_clientes:,} clientes (histórico x{historico:g})...")
+            db_path = criar_banco(n_clientes, diretorio, historico)
+            conn = sqlite3.connect(db_path)
+
+            resultado = {'clientes': n_clientes}
+            resultado['linhas'], resultado['pre_agregada'] = medir(conn, QUERY_PERFIL_CLIENTES)
+            if join_direto:
+                resultado['linhas_join'] = conn.execute(QUERY_LINHAS_JOIN_DIRETO).fetchone()[0]
+                _, resultado['join_direto'] = medir(conn, QUERY_PERFIL_JOIN_DIRETO)
+            conn.close()
+            resultados.append(resultado)
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    print("\n" + "="*78)
+    print("PERFIL DE CLIENTES: PRÉ-AGREGADA x JOIN DIRETO")
+    print("="*78)
+    print(f"{'clientes':>12} {'pré-agregada':>14} {'µs/cliente':>11} {'join direto':>13} "
+          f"{'µs/cliente':>11} {'linhas join':>12}")
+    for r in resultados:
+        linha = f"{r['clientes']:>12,} {r['pre_agregada']:>13.2f}s {r['pre_agregada']/r['clientes']*1e6:>11.2f}"
+        if join_direto:
+            linha += (f" {r['join_direto']:>12.2f}s {r['join_direto']/r['clientes']*1e6:>11.2f}"
+                      f" {r['linhas_join']:>12,}")
+        print(linha)
+    return resultados
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark da consulta de perfil de clientes")
+    parser.add_argument("--clientes", type=int, nargs="+", default=ESCALAS, help="escalas (nº de clientes)")
+    parser.add_argument("--historico", type=float, default=1.0,
+                        help="multiplica vendas, test drives e serviços por cliente")
+    parser.add_argument("--sem-join-direto", action="store_true", help="mede só a consulta pré-agregada")
+    args = parser.parse_args()
+
+    executar_benchmark(args.clientes, historico=args.historico, join_direto=not args.sem_join_direto)
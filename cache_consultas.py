@@ -0,0 +1,208 @@
+"""
+Cache de Resultados de Consultas
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Guarda em disco o resultado das consultas SQL caras (ex.: query_vendas da
+análise exploratória) para que reexecutar o notebook ou recarregar uma
+página não repita a consulta enquanto o banco não mudar.
+
+Chave de cada resultado: SQL normalizado (sem comentários e com os espaços
+reduzidos, fora das strings) + parâmetros + caminho do banco + versão do
+banco. A versão é o tamanho e o mtime do .db e do -wal: todo COMMIT grava
+em um dos dois (no modo WAL, no -wal). PRAGMA data_version não serve de
+chave porque só é comparável dentro da mesma conexão, e o cache precisa
+valer entre processos e reinícios do kernel.
+
+Os resultados ficam em Parquet (colunar, zstd) em Dados/cache/consultas/.
+Cada leitura renova o mtime do arquivo e, quando a pasta passa de
+TAMANHO_MAXIMO_CACHE, os menos usados recentemente são apagados (LRU). O
+resultado de uma versão anterior do banco é apagado quando a mesma consulta
+é gravada de novo.
+
+Uso:
+    from cache_consultas import consultar_com_cache
+    df = consultar_com_cache(query_vendas, db_path=DB_PATH)
+
+    python cache_consultas.py            # lista o cache
+    python cache_consultas.py --limpar   # apaga o cache
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acesso_dados import consultar, obter_pool
+from carregar_sqlite import DB_PATH
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_CACHE = os.path.join(DIRETORIO_BASE, 'Dados', 'cache', 'consultas')
+
+# Tamanho máximo da pasta do cache (bytes)
+TAMANHO_MAXIMO_CACHE = 512 * 1024 * 1024
+
+COMPRESSAO = 'zstd'
+
+# Strings entre aspas simples (mantidas) ou espaços/comentários (viram um espaço)
+_PADRAO_SQL = re.compile(r"('(?:[^']|'')*')|(?:\s|--[^\n]*|/\*.*?\*/)+", re.DOTALL)
+
+# ===============================================
+# CHAVE
+# ===============================================
+
+def normalizar_sql(sql):
+    """
+    Remove comentários e reduz espaços (fora das strings), para que a mesma
+    consulta formatada de outro jeito use a mesma entrada
+    """
+    return _PADRAO_SQL.sub(lambda m: m.group(1) or ' ', sql).strip()
+
+
+def versao_banco(db_path):
+    """
+    Tamanho e mtime do .db e do -wal (um -wal vazio conta como ausente:
+    os leitores o criam ao abrir o banco sem mudar os dados)
+    """
+    versao = []
+    for caminho in (db_path, f"{db_path}-wal"):
+        try:
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            versao += [0, 0]
+            continue
+        versao += [estado.st_size, estado.st_mtime_ns] if estado.st_size else [0, 0]
+    return versao
+
+
+def _hash(conteudo):
+    return hashlib.sha1(json.dumps(conteudo, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def chave_consulta(sql, params, db_path):
+    """
+    Hash da consulta (SQL normalizado, parâmetros e banco), sem a versão
+    """
+    return _hash({'sql': normalizar_sql(sql), 'params': params, 'banco': os.path.abspath(db_path)})
+
+# ===============================================
+# ARMAZENAMENTO
+# ===============================================
+
+def _entradas(diretorio_cache):
+    return glob.glob(os.path.join(diretorio_cache, '*.parquet'))
+
+
+def _aplicar_limite(diretorio_cache, tamanho_maximo):
+    """
+    Apaga os resultados usados há mais tempo até a pasta caber no limite
+    """
+    entradas = []
+    for arquivo in _entradas(diretorio_cache):
+        try:
+            estado = os.stat(arquivo)
+        except FileNotFoundError:
+            continue  # apagado por outro processo
+        entradas.append((estado.st_mtime_ns, estado.st_size, arquivo))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, arquivo in sorted(entradas):
+        if total <= tamanho_maximo:
+            break
+        try:
+            os.remove(arquivo)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+
+def _gravar(df, destino, consulta, diretorio_cache):
+    os.makedirs(diretorio_cache, exist_ok=True)
+    # Grava em arquivo temporário e renomeia, para não deixar cache corrompido
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), temporario, compression=COMPRESSAO)
+    os.replace(temporario, destino)
+
+    # Resultados da mesma consulta em versões anteriores do banco
+    for arquivo in glob.glob(os.path.join(diretorio_cache, f"{consulta}_*.parquet")):
+        if arquivo != destino:
+            try:
+                os.remove(arquivo)
+            except FileNotFoundError:
+                pass
+
+# ===============================================
+# CONSULTA
+# ===============================================
+
+def consultar_com_cache(sql, params=None, db_path=DB_PATH, diretorio_cache=DIRETORIO_CACHE,
+                        tamanho_maximo=TAMANHO_MAXIMO_CACHE):
+    """
+    Mesmo resultado de acesso_dados.consultar, lido do cache quando a
+    consulta já foi feita nesta versão do banco
+    """
+    inicio = time.perf_counter()
+    db_path = os.path.abspath(db_path)
+    obter_pool(db_path)  # ativa o WAL antes de ler a versão (a troca de modo muda o arquivo)
+
+    consulta = chave_consulta(sql, params, db_path)
+    versao = versao_banco(db_path)
+    destino = os.path.join(diretorio_cache, f"{consulta}_{_hash(versao)}.parquet")
+
+    try:
+        df = pq.read_table(destino).to_pandas()
+        os.utime(destino)  # uso recente (LRU)
+        origem = 'cache'
+    except FileNotFoundError:
+        df = consultar(sql, params, db_path)
+        origem = 'banco'
+        # Só grava se nenhum COMMIT aconteceu durante a consulta
+        if versao_banco(db_path) == versao:
+            _gravar(df, destino, consulta, diretorio_cache)
+            _aplicar_limite(diretorio_cache, tamanho_maximo)
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ Consulta ({origem}): {len(df):,} linhas em {segundos*1000:.0f} ms")
+    return df
+
+
+def resumo_cache(diretorio_cache=DIRETORIO_CACHE):
+    """
+    Imprime e retorna (nº de resultados, bytes) do cache
+    """
+    tamanhos = [os.path.getsize(arquivo) for arquivo in _entradas(diretorio_cache)]
+    print(f"📊 Cache de consultas ({diretorio_cache}): {len(tamanhos)} resultados, "
+          f"{sum(tamanhos) / 1024**2:.1f} MB de {TAMANHO_MAXIMO_CACHE / 1024**2:.0f} MB")
+    return len(tamanhos), sum(tamanhos)
+
+
+def limpar_cache(diretorio_cache=DIRETORIO_CACHE):
+    """
+    Apaga todos os resultados guardados
+    """
+    for arquivo in _entradas(diretorio_cache):
+        os.remove(arquivo)
+    print(f"✓ Cache de consultas limpo ({diretorio_cache})")
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache de resultados das consultas SQL")
+    parser.add_argument("--diretorio", default=DIRETORIO_CACHE, help="pasta do cache")
+    parser.add_argument("--limpar", action="store_true", help="apaga todos os resultados")
+    args = parser.parse_args()
+
+    if args.limpar:
+        limpar_cache(args.diretorio)
+    resumo_cache(args.diretorio)
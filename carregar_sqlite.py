@@ -0,0 +1,319 @@
+"""
+Carga em Massa no SQLite
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Aplica create_tables_sqlite.sql e insere os dados gerados (CSVs da pasta Dados/
+ou os DataFrames devolvidos por generate_data.gerar_todos_dados) no banco
+vendas_carros_esportivos.db.
+
+Para carregar grandes volumes rapidamente:
+- PRAGMAs de carga (journal em memória, synchronous OFF, cache grande)
+- executemany em blocos, com uma transação por tabela
+- índices idx_* criados somente depois que todos os dados foram inseridos
+  (e das colunas derivadas das datas, dimensao_datas.py, serem preenchidas)
+- gatilhos trg_* (colunas de datas das gravações da API) também criados só
+  ao final: durante a carga as colunas são calculadas em lote
+
+Bancos já existentes recebem os índices novos do script (e perdem o
+substituído) com aplicar_indices; ver plano_consultas.py.
+"""
+
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(DIRETORIO_BASE, 'vendas_carros_esportivos.db')
+SQL_PATH = os.path.join(DIRETORIO_BASE, 'create_tables_sqlite.sql')
+DIRETORIO_DADOS = os.path.join(DIRETORIO_BASE, 'Dados')
+
+# Linhas lidas/inseridas por bloco
+TAMANHO_CHUNK = 200_000
+
+# Ordem de carga (respeita as chaves estrangeiras): chave, tabela, arquivo CSV
+TABELAS_CARGA = [
+    ('clientes', 'clientes', 'clientes.csv'),
+    ('vendedores', 'vendedores', 'vendedores.csv'),
+    ('veiculos', 'veiculos', 'veiculos.csv'),
+    ('vendas', 'vendas', 'vendas.csv'),
+    ('test_drives', 'test_drives', 'test_drives.csv'),
+    ('servicos', 'servicos_pos_venda', 'servicos_pos_venda.csv')
+]
+
+# PRAGMAs usados apenas durante a carga (e os valores restaurados ao final)
+PRAGMAS_CARGA = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': '-262144',  # ~256 MB (valor negativo = KiB)
+    'temp_store': 'MEMORY'
+}
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',  # leitores concorrentes com o ETL (acesso_dados.py)
+    'synchronous': 'FULL'
+}
+
+# ===============================================
+# SCRIPT DE CRIAÇÃO
+# ===============================================
+
+def ler_comandos_sql(caminho=SQL_PATH):
+    """
+    Divide o script SQL em comandos completos (ignorando comentários)
+    """
+    comandos = []
+    atual = []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            if not atual and (not linha.strip() or linha.lstrip().startswith('--')):
+                continue
+            atual.append(linha)
+            texto = ''.join(atual)
+            if sqlite3.complete_statement(texto):
+                comandos.append(texto.strip())
+                atual = []
+    return comandos
+
+
+def separar_indices(comandos):
+    """
+    Separa os CREATE INDEX (adiados para depois da carga) dos demais comandos
+    """
+    indices = [c for c in comandos if c.upper().startswith('CREATE INDEX')]
+    demais = [c for c in comandos if not c.upper().startswith('CREATE INDEX')]
+    return demais, indices
+
+
+def separar_gatilhos(comandos):
+    """
+    Separa os CREATE TRIGGER (adiados para depois da carga) dos demais comandos
+    """
+    gatilhos = [c for c in comandos if c.upper().startswith('CREATE TRIGGER')]
+    demais = [c for c in comandos if not c.upper().startswith('CREATE TRIGGER')]
+    return demais, gatilhos
+
+# ===============================================
+# CONEXÃO E PRAGMAS
+# ===============================================
+
+def aplicar_pragmas(conn, pragmas):
+    for nome, valor in pragmas.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+
+
+def conectar_para_carga(db_path=DB_PATH, recriar=False):
+    """
+    Abre o banco com os PRAGMAs de carga (opcionalmente apagando o arquivo antes)
+    """
+    if recriar and os.path.exists(db_path):
+        os.remove(db_path)
+    # isolation_level=None: as transações são controladas explicitamente
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    aplicar_pragmas(conn, PRAGMAS_CARGA)
+    return conn
+
+# ===============================================
+# INSERÇÃO EM MASSA
+# ===============================================
+
+def _formatar_datas(df):
+    """
+    Converte colunas datetime64 para texto, no mesmo formato dos CSVs:
+    'AAAA-MM-DD' para datas e 'AAAA-MM-DD HH:MM:SS' quando há horário
+    """
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            serie = df[coluna]
+            tem_horario = (serie.dropna() != serie.dropna().dt.normalize()).any()
+            df[coluna] = serie.dt.strftime('%Y-%m-%d %H:%M:%S' if tem_horario else '%Y-%m-%d')
+    return df
+
+
+def _linhas(df):
+    """
+    Converte um bloco em tuplas de tipos nativos do Python (NaN -> NULL)
+    """
+    df = _formatar_datas(df.copy())
+    df = df.astype(object).where(df.notna(), None)
+    return df.itertuples(index=False, name=None)
+
+
+def inserir_tabela(conn, tabela, blocos, ignorar_duplicados=False, substituir=False, limpar=False):
+    """
+    Insere todos os blocos (DataFrames) de uma tabela em uma única transação.
+    Com substituir=True, linhas com a mesma chave são sobrescritas; com
+    limpar=True, a tabela é esvaziada na mesma transação antes de inserir.
+    Retorna (linhas inseridas, segundos).
+    """
+    inicio = time.perf_counter()
+    total = 0
+    comando = None
+    conn.execute("BEGIN")
+    try:
+        if limpar:
+            conn.execute(f"DELETE FROM {tabela}")
+        for bloco in blocos:
+            if comando is None:
+                colunas = ', '.join(bloco.columns)
+                marcadores = ', '.join(['?'] * len(bloco.columns))
+                verbo = 'INSERT OR REPLACE' if substituir else 'INSERT OR IGNORE' if ignorar_duplicados else 'INSERT'
+                comando = f"{verbo} INTO {tabela} ({colunas}) VALUES ({marcadores})"
+            cursor = conn.executemany(comando, _linhas(bloco))
+            total += cursor.rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return total, time.perf_counter() - inicio
+
+
+def _imprimir_vazao(nome, linhas, segundos):
+    vazao = linhas / segundos if segundos > 0 else float('inf')
+    print(f"✓ {nome}: {linhas:,} linhas em {segundos:.2f}s ({vazao:,.0f} linhas/s)")
+
+
+def criar_indices(conn, indices):
+    """
+    Cria os índices adiados e retorna o tempo gasto
+    """
+    inicio = time.perf_counter()
+    for comando in indices:
+        conn.execute(comando)
+    return time.perf_counter() - inicio
+
+
+def aplicar_indices(conn, sql_path=SQL_PATH):
+    """
+    Deixa um banco já existente com os índices do script: remove o
+    substituído (DROP INDEX), cria os que faltam nas tabelas existentes e
+    atualiza as estatísticas do otimizador. Retorna o tempo gasto.
+    """
+    inicio = time.perf_counter()
+    tabelas = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for comando in ler_comandos_sql(sql_path):
+        if comando.upper().startswith('DROP INDEX'):
+            conn.execute(comando)
+        elif comando.upper().startswith('CREATE INDEX') and comando.split('(')[0].split()[-1] in tabelas:
+            conn.execute(comando)
+    conn.execute("ANALYZE")
+    return time.perf_counter() - inicio
+
+# ===============================================
+# CARGA COMPLETA
+# ===============================================
+
+def carregar_blocos(blocos_por_tabela, db_path=DB_PATH, sql_path=SQL_PATH,
+                    recriar=False, ignorar_duplicados=False):
+    """
+    Carrega no banco os blocos de cada tabela: {chave: iterável de DataFrames}
+
+    Aplica o script de criação, insere as tabelas na ordem das chaves
+    estrangeiras, cria os índices ao final e restaura os PRAGMAs padrão.
+    Retorna as estatísticas de carga por tabela.
+    """
+    print("\n" + "="*60)
+    print(f"CARGA EM MASSA NO SQLITE: {db_path}")
+    print("="*60 + "\n")
+
+    comandos, indices = separar_indices(ler_comandos_sql(sql_path))
+    comandos, gatilhos = separar_gatilhos(comandos)
+    estatisticas = {}
+
+    conn = conectar_para_carga(db_path, recriar=recriar)
+    try:
+        for comando in comandos:
+            conn.execute(comando)
+
+        for chave, tabela, _ in TABELAS_CARGA:
+            if chave not in blocos_por_tabela:
+                continue
+            linhas, segundos = inserir_tabela(conn, tabela, blocos_por_tabela[chave],
+                                              ignorar_duplicados=ignorar_duplicados)
+            estatisticas[tabela] = {'linhas': linhas, 'segundos': segundos}
+            _imprimir_vazao(tabela, linhas, segundos)
+
+        # Colunas derivadas das datas e dim_datas (antes dos índices sobre elas)
+        from dimensao_datas import preencher_datas
+        inicio_datas = time.perf_counter()
+        preencher_datas(conn, completo=True)
+        print(f"✓ Colunas de datas e dim_datas preenchidas em {time.perf_counter() - inicio_datas:.2f}s")
+        for comando in gatilhos:
+            conn.execute(comando)
+
+        segundos_indices = criar_indices(conn, indices)
+        estatisticas['indices'] = {'linhas': len(indices), 'segundos': segundos_indices}
+        print(f"✓ {len(indices)} índices criados em {segundos_indices:.2f}s")
+
+        # Estatísticas antes dos resumos: sem elas o otimizador pode escolher
+        # um índice ruim para os JOINs da atualização completa
+        conn.execute("ANALYZE")
+
+        # Resumos materializados (mv_*) recalculados a partir da carga
+        from materializacao import atualizar_materializadas
+        atualizar_materializadas(conn, completo=True)
+
+        aplicar_pragmas(conn, PRAGMAS_PADRAO)
+    finally:
+        conn.close()
+
+    total_linhas = sum(e['linhas'] for t, e in estatisticas.items() if t != 'indices')
+    total_segundos = sum(e['segundos'] for e in estatisticas.values())
+    print(f"\n📊 Total: {total_linhas:,} linhas em {total_segundos:.2f}s")
+    return estatisticas
+
+
+def carregar_csvs(diretorio_dados=DIRETORIO_DADOS, db_path=DB_PATH, tamanho_chunk=TAMANHO_CHUNK, **kwargs):
+    """
+    Carrega os CSVs gerados (Dados/*.csv) lendo cada arquivo em blocos
+    """
+    blocos = {}
+    for chave, _, arquivo in TABELAS_CARGA:
+        caminho = os.path.join(diretorio_dados, arquivo)
+        if os.path.exists(caminho):
+            # Mantém os textos (datas, nomes) exatamente como estão no CSV
+            blocos[chave] = pd.read_csv(caminho, chunksize=tamanho_chunk, keep_default_na=False,
+                                        na_values=[''], encoding='utf-8')
+    return carregar_blocos(blocos, db_path=db_path, **kwargs)
+
+
+def _fatiar(df, tamanho_chunk):
+    for inicio in range(0, len(df), tamanho_chunk):
+        yield df.iloc[inicio:inicio + tamanho_chunk]
+
+
+def carregar_dataframes(dados, db_path=DB_PATH, tamanho_chunk=TAMANHO_CHUNK, **kwargs):
+    """
+    Carrega direto os DataFrames devolvidos por generate_data.gerar_todos_dados
+    (sem passar por CSV)
+    """
+    blocos = {chave: _fatiar(df, tamanho_chunk) for chave, df in dados.items()}
+    return carregar_blocos(blocos, db_path=db_path, **kwargs)
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Carrega os CSVs gerados no banco SQLite")
+    parser.add_argument("--diretorio-dados", default=DIRETORIO_DADOS, help="pasta com os CSVs")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db de destino")
+    parser.add_argument("--tamanho-chunk", type=int, default=TAMANHO_CHUNK, help="linhas por bloco")
+    parser.add_argument("--recriar", action="store_true", help="apaga o banco antes de carregar")
+    parser.add_argument("--ignorar-duplicados", action="store_true",
+                        help="usa INSERT OR IGNORE (ex.: e-mails repetidos em CSVs antigos)")
+    args = parser.parse_args()
+
+    carregar_csvs(
+        diretorio_dados=args.diretorio_dados,
+        db_path=args.banco,
+        tamanho_chunk=args.tamanho_chunk,
+        recriar=args.recriar,
+        ignorar_duplicados=args.ignorar_duplicados
+    )
@@ -0,0 +1,357 @@
+"""
+Comparação de Modelos em Paralelo
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Treina e avalia os modelos candidatos do notebook ml_supervisionado:
+- validação cruzada k-fold e busca de hiperparâmetros (grade) distribuídas
+  em um pool de processos com número limitado de workers; cada tarefa é
+  uma combinação (modelo, parâmetros), então a grade de um modelo lento não
+  segura as dos outros
+- retreino de cada modelo com os melhores parâmetros no conjunto de treino
+  inteiro usando todos os núcleos (n_jobs=-1 nos modelos que aceitam)
+- métricas no conjunto de teste e tempo de cada etapa por modelo
+- modo de busca com orçamento: successive halving, parada antecipada no
+  Gradient Boosting e limite de tempo de CPU (ver BUSCA DE HIPERPARÂMETROS)
+
+Dentro do pool os modelos rodam com n_jobs=1, para não disputar núcleos
+com os outros workers.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import (accuracy_score, f1_score, mean_absolute_error, mean_squared_error,
+                             precision_score, r2_score, recall_score, roc_auc_score)
+from sklearn.model_selection import KFold, ParameterGrid, StratifiedKFold, cross_val_score
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+N_FOLDS = 5
+SEED = 42
+
+# Métrica usada na validação cruzada (e na escolha dos hiperparâmetros)
+SCORING = {
+    'regressao': 'r2',
+    'classificacao': 'roc_auc'
+}
+
+# ===============================================
+# MÉTRICAS NO CONJUNTO DE TESTE
+# ===============================================
+
+def metricas_regressao(modelo, X_train, y_train, X_test, y_test):
+    y_pred_train = modelo.predict(X_train)
+    y_pred_test = modelo.predict(X_test)
+    return {
+        'MAE': mean_absolute_error(y_test, y_pred_test),
+        'RMSE': np.sqrt(mean_squared_error(y_test, y_pred_test)),
+        'R² Train': r2_score(y_train, y_pred_train),
+        'R² Test': r2_score(y_test, y_pred_test)
+    }
+
+
+def metricas_classificacao(modelo, X_train, y_train, X_test, y_test):
+    y_pred = modelo.predict(X_test)
+    y_pred_proba = modelo.predict_proba(X_test)[:, 1]
+    return {
+        'Accuracy': accuracy_score(y_test, y_pred),
+        'Precision': precision_score(y_test, y_pred),
+        'Recall': recall_score(y_test, y_pred),
+        'F1-Score': f1_score(y_test, y_pred),
+        'ROC-AUC': roc_auc_score(y_test, y_pred_proba)
+    }
+
+
+METRICAS = {
+    'regressao': metricas_regressao,
+    'classificacao': metricas_classificacao
+}
+
+# ===============================================
+# TAREFAS DO POOL
+# ===============================================
+
+# Dados de treino compartilhados com os workers (preenchido pelo initializer do pool)
+_ESTADO_WORKER = {}
+
+
+def _inicializar_worker(estado):
+    _ESTADO_WORKER.clear()
+    _ESTADO_WORKER.update(estado)
+
+
+def _com_n_jobs(modelo, n_jobs):
+    if 'n_jobs' in modelo.get_params():
+        modelo.set_params(n_jobs=n_jobs)
+    return modelo
+
+
+def _selecionar(dados, indices):
+    return dados.iloc[indices] if hasattr(dados, 'iloc') else dados[indices]
+
+
+def _validar(nome, modelo, parametros, rodada=0, n_amostras=None):
+    """
+    Validação cruzada de um modelo com um conjunto de hiperparâmetros, nas
+    primeiras n_amostras linhas de uma permutação fixa do treino (todas se None).
+    Retorna também o tempo de CPU gasto pelo worker.
+    """
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    X, y = _ESTADO_WORKER['X'], _ESTADO_WORKER['y']
+    if n_amostras is not None and n_amostras < len(y):
+        indices = _ESTADO_WORKER['ordem'][:n_amostras]
+        X, y = _selecionar(X, indices), _selecionar(y, indices)
+
+    estimador = _com_n_jobs(clone(modelo).set_params(**parametros), 1)
+    scores = cross_val_score(estimador, X, y, cv=_ESTADO_WORKER['cv'],
+                             scoring=_ESTADO_WORKER['scoring'], n_jobs=1)
+    return nome, parametros, rodada, scores, time.perf_counter() - inicio, time.process_time() - inicio_cpu
+
+
+def _executar(pool, tarefas, orcamento):
+    """
+    Executa as tarefas no pool e devolve as concluídas. Quando o tempo de CPU
+    somado dos workers passa do orçamento, cancela as que ainda não começaram
+    (as que já estão rodando terminam e entram no resultado).
+    """
+    futuros = [pool.submit(_validar, *tarefa) for tarefa in tarefas]
+    concluidas = []
+    for futuro in as_completed(futuros):
+        if futuro.cancelled():
+            continue
+        resultado = futuro.result()
+        concluidas.append(resultado)
+        orcamento['usado'] += resultado[-1]
+        if orcamento['limite'] is not None and orcamento['usado'] >= orcamento['limite'] \
+                and not orcamento['esgotado']:
+            orcamento['esgotado'] = True
+            for pendente in futuros:
+                pendente.cancel()
+    return concluidas
+
+# ===============================================
+# BUSCA DE HIPERPARÂMETROS
+# ===============================================
+#
+# 'grade': todas as combinações são validadas no treino inteiro.
+# 'halving' (successive halving): todas as combinações começam em uma
+# amostra pequena do treino; a cada rodada só a fração 1/FATOR_HALVING
+# melhor de cada modelo continua, com FATOR_HALVING vezes mais linhas, até
+# sobrar uma combinação ou chegar ao treino inteiro. Nesse modo o Gradient
+# Boosting usa parada antecipada (n_estimators vira um teto e o treino para
+# quando o score de validação interna não melhora).
+
+FATOR_HALVING = 3
+AMOSTRAS_MINIMAS = 200
+
+PARADA_ANTECIPADA = {
+    'n_estimators': 1000,
+    'n_iter_no_change': 10,
+    'validation_fraction': 0.1
+}
+
+
+def _com_parada_antecipada(modelo):
+    """
+    Ativa a parada antecipada nos modelos que aceitam (GradientBoosting*)
+    """
+    if 'n_iter_no_change' in modelo.get_params():
+        return clone(modelo).set_params(**PARADA_ANTECIPADA)
+    return modelo
+
+
+def _rodadas_halving(candidatos, n_linhas):
+    """
+    Número de linhas de cada rodada: a última usa o treino inteiro
+    """
+    n_rodadas = 1 + int(np.ceil(np.log(max(candidatos, 1)) / np.log(FATOR_HALVING)))
+    minimo = max(AMOSTRAS_MINIMAS, n_linhas // FATOR_HALVING ** (n_rodadas - 1))
+    return [min(n_linhas, minimo * FATOR_HALVING ** rodada) for rodada in range(n_rodadas)]
+
+
+def _intercalar(listas):
+    """
+    Alterna as tarefas entre os modelos (1ª de cada, 2ª de cada...), para que
+    um orçamento curto não fique todo com o primeiro modelo
+    """
+    tarefas = []
+    for posicao in range(max((len(lista) for lista in listas), default=0)):
+        tarefas.extend(lista[posicao] for lista in listas if posicao < len(lista))
+    return tarefas
+
+
+def _buscar_grade(pool, modelos, grades, orcamento):
+    tarefas = _intercalar([
+        [(nome, modelo, parametros) for parametros in ParameterGrid(grades.get(nome, {}))]
+        for nome, modelo in modelos.items()
+    ])
+    return _executar(pool, tarefas, orcamento)
+
+
+def _buscar_halving(pool, modelos, grades, n_linhas, orcamento):
+    candidatos = {nome: list(ParameterGrid(grades.get(nome, {}))) for nome in modelos}
+    rodadas = {nome: _rodadas_halving(len(lista), n_linhas) for nome, lista in candidatos.items()}
+    validacoes = []
+
+    rodada = 0
+    while any(candidatos.values()) and not orcamento['esgotado']:
+        tarefas = _intercalar([
+            [(nome, modelos[nome], parametros, rodada, rodadas[nome][rodada]) for parametros in lista]
+            for nome, lista in candidatos.items()
+        ])
+        concluidas = _executar(pool, tarefas, orcamento)
+        validacoes.extend(concluidas)
+
+        # Sobreviventes: o terço melhor de cada modelo, enquanto houver rodadas
+        for nome in candidatos:
+            if rodada + 1 >= len(rodadas[nome]) or len(candidatos[nome]) <= 1:
+                candidatos[nome] = []
+                continue
+            pontuados = sorted(
+                ((scores.mean(), i) for i, (nome_, _, _, scores, _, _) in enumerate(concluidas) if nome_ == nome),
+                reverse=True
+            )
+            manter = int(np.ceil(len(candidatos[nome]) / FATOR_HALVING))
+            candidatos[nome] = [concluidas[i][1] for _, i in pontuados[:manter]]
+        rodada += 1
+    return validacoes
+
+# ===============================================
+# COMPARAÇÃO
+# ===============================================
+
+def _divisao(tarefa, n_folds):
+    if tarefa == 'classificacao':
+        return StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=SEED)
+    return KFold(n_splits=n_folds, shuffle=True, random_state=SEED)
+
+
+def comparar_modelos(modelos, X_train, y_train, X_test, y_test, tarefa='regressao',
+                     grades=None, n_folds=N_FOLDS, n_workers=None, busca='grade', orcamento_cpu=None):
+    """
+    Compara os modelos candidatos ({nome: estimador}).
+
+    grades: {nome: {parametro: [valores]}} para a busca de hiperparâmetros;
+    modelos sem grade são só validados com os parâmetros atuais.
+    busca: 'grade' (todas as combinações no treino inteiro) ou 'halving'
+    (successive halving + parada antecipada no Gradient Boosting).
+    orcamento_cpu: segundos de CPU (somados entre os workers) para a busca;
+    ao estourar, cada modelo fica com a melhor combinação já avaliada.
+    n_workers: processos do pool (padrão: número de núcleos, limitado ao
+    número de combinações).
+
+    Retorna {nome: {'modelo': estimador treinado, <métricas de teste>,
+    'CV média', 'CV desvio', 'Melhores parâmetros', 'Tempo CV (s)',
+    'Tempo treino (s)'}}, no formato usado pelo notebook.
+    """
+    grades = grades or {}
+    if busca == 'halving':
+        modelos = {nome: _com_parada_antecipada(modelo) for nome, modelo in modelos.items()}
+    scoring = SCORING[tarefa]
+    n_combinacoes = sum(len(ParameterGrid(grades.get(nome, {}))) for nome in modelos)
+    n_workers = max(1, min(n_workers or os.cpu_count(), n_combinacoes))
+    estado = {
+        'X': X_train,
+        'y': y_train,
+        'ordem': np.random.default_rng(SEED).permutation(len(y_train)),
+        'cv': _divisao(tarefa, n_folds),
+        'scoring': scoring
+    }
+    orcamento = {'limite': orcamento_cpu, 'usado': 0.0, 'esgotado': False}
+
+    print(f"🤖 {len(modelos)} modelos, {n_combinacoes} combinações de hiperparâmetros, "
+          f"{n_folds} folds, {n_workers} workers, busca '{busca}'"
+          + (f", orçamento {orcamento_cpu:.0f}s de CPU" if orcamento_cpu else "") + "\n")
+
+    # Validação cruzada / busca em paralelo
+    inicio_total = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                             initargs=(estado,)) as pool:
+        if busca == 'halving':
+            concluidas = _buscar_halving(pool, modelos, grades, len(y_train), orcamento)
+        else:
+            concluidas = _buscar_grade(pool, modelos, grades, orcamento)
+
+    validacoes = {nome: [] for nome in modelos}
+    tempo_cv = dict.fromkeys(modelos, 0.0)
+    for nome, parametros, rodada, scores, segundos, _ in concluidas:
+        validacoes[nome].append((rodada, scores.mean(), scores.std(), parametros))
+        tempo_cv[nome] += segundos
+    print(f"✓ Busca concluída em {time.perf_counter() - inicio_total:.2f}s "
+          f"({orcamento['usado']:.1f}s de CPU)"
+          + (" - orçamento esgotado" if orcamento['esgotado'] else "") + "\n")
+
+    # Retreino com os melhores parâmetros usando todos os núcleos. Vale a
+    # combinação avaliada na rodada mais avançada (com mais linhas) e, nela,
+    # a de maior score; sem nenhuma avaliação, ficam os parâmetros atuais.
+    resultados = {}
+    for nome, modelo in modelos.items():
+        if validacoes[nome]:
+            rodada, cv_media, cv_desvio, parametros = max(validacoes[nome], key=lambda v: (v[0], v[1]))
+        else:
+            rodada, cv_media, cv_desvio, parametros = None, np.nan, np.nan, {}
+        final = _com_n_jobs(clone(modelo).set_params(**parametros), -1)
+
+        inicio = time.perf_counter()
+        final.fit(X_train, y_train)
+        tempo_treino = time.perf_counter() - inicio
+
+        resultados[nome] = {
+            'modelo': final,
+            **METRICAS[tarefa](final, X_train, y_train, X_test, y_test),
+            'CV média': cv_media,
+            'CV desvio': cv_desvio,
+            'Melhores parâmetros': parametros,
+            'Tempo CV (s)': tempo_cv[nome],
+            'Tempo treino (s)': tempo_treino
+        }
+        print(f"{nome}:")
+        print(f"   CV {scoring}: {cv_media:.4f} ± {cv_desvio:.4f}"
+              + (f" | parâmetros: {parametros}" if parametros else ""))
+        if getattr(final, 'n_iter_no_change', None):
+            print(f"   Parada antecipada: {final.n_estimators_} de {final.n_estimators} árvores")
+        print(f"   Tempo: CV {tempo_cv[nome]:.2f}s | treino final {tempo_treino:.2f}s\n")
+
+    return resultados
+
+# ===============================================
+# CONFIGURAÇÃO ESCOLHIDA
+# ===============================================
+
+def salvar_configuracao(resultados, melhor, caminho, busca='grade', orcamento_cpu=None):
+    """
+    Grava em JSON (ao lado dos .pkl em Modelos/) o modelo escolhido, seus
+    hiperparâmetros e os melhores parâmetros encontrados para cada candidato
+    """
+    def _parametros(modelo, escolhidos):
+        # Parâmetros efetivos do modelo treinado (inclui os da parada antecipada)
+        todos = modelo.get_params()
+        chaves = set(escolhidos) | (set(PARADA_ANTECIPADA) if todos.get('n_iter_no_change') else set())
+        return {chave: todos[chave] for chave in sorted(chaves)}
+
+    configuracao = {
+        'modelo': melhor,
+        'classe': type(resultados[melhor]['modelo']).__name__,
+        'parametros': _parametros(resultados[melhor]['modelo'], resultados[melhor]['Melhores parâmetros']),
+        'busca': busca,
+        'orcamento_cpu': orcamento_cpu,
+        'gerado_em': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'candidatos': {
+            nome: {
+                'parametros': _parametros(resultado['modelo'], resultado['Melhores parâmetros']),
+                'cv_media': None if np.isnan(resultado['CV média']) else float(resultado['CV média']),
+                'arvores': int(getattr(resultado['modelo'], 'n_estimators_', 0)) or None
+            }
+            for nome, resultado in resultados.items()
+        }
+    }
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(configuracao, arquivo, indent=2, ensure_ascii=False)
+    return configuracao
@@ -20,7 +20,9 @@ CREATE TABLE IF NOT EXISTS clientes (
     estado TEXT,
     renda_anual REAL,
     profissao TEXT,
-    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Coluna derivada (preenchida pelo ETL, dimensao_datas.py, e pelos gatilhos trg_*_datas_*)
+    dia_nascimento INTEGER  -- dias desde 1970-01-01
 );
 
 -- ===============================================
@@ -70,6 +72,13 @@ CREATE TABLE IF NOT EXISTS vendas (
     numero_parcelas INTEGER DEFAULT 1,
     valor_entrada REAL DEFAULT 0,
     status_venda TEXT DEFAULT 'Concluída' CHECK (status_venda IN ('Concluída', 'Cancelada', 'Em Processamento')),
+    -- Colunas derivadas de data_venda (preenchidas pelo ETL, dimensao_datas.py, e pelos gatilhos trg_*_datas_*)
+    dia_epoch INTEGER,  -- dias desde 1970-01-01 (chave de dim_datas)
+    ano INTEGER,
+    trimestre INTEGER,
+    mes INTEGER,
+    dia_semana INTEGER,  -- 0 = domingo (strftime('%w'))
+    idade_cliente INTEGER,  -- idade do cliente na data da venda
     FOREIGN KEY (cliente_id) REFERENCES clientes(cliente_id),
     FOREIGN KEY (veiculo_id) REFERENCES veiculos(veiculo_id),
     FOREIGN KEY (vendedor_id) REFERENCES vendedores(vendedor_id)
@@ -87,6 +96,14 @@ CREATE TABLE IF NOT EXISTS test_drives (
     comentario TEXT,
     resultou_venda INTEGER DEFAULT 0,  -- BOOLEAN: 0=false, 1=true
     vendedor_responsavel_id INTEGER,
+    -- Colunas derivadas de data_test_drive (preenchidas pelo ETL, dimensao_datas.py, e pelos gatilhos trg_*_datas_*)
+    dia_epoch INTEGER,
+    ano INTEGER,
+    trimestre INTEGER,
+    mes INTEGER,
+    dia_semana INTEGER,
+    hora INTEGER,
+    idade_cliente INTEGER,  -- idade do cliente na data do test drive
     FOREIGN KEY (cliente_id) REFERENCES clientes(cliente_id),
     FOREIGN KEY (veiculo_id) REFERENCES veiculos(veiculo_id),
     FOREIGN KEY (vendedor_responsavel_id) REFERENCES vendedores(vendedor_id)
@@ -103,9 +120,171 @@ CREATE TABLE IF NOT EXISTS servicos_pos_venda (
     valor_servico REAL,
     satisfacao_cliente INTEGER CHECK (satisfacao_cliente >= 1 AND satisfacao_cliente <= 5),
     observacoes TEXT,
+    -- Colunas derivadas de data_servico (preenchidas pelo ETL, dimensao_datas.py, e pelos gatilhos trg_*_datas_*)
+    dia_epoch INTEGER,
+    ano INTEGER,
+    trimestre INTEGER,
+    mes INTEGER,
+    dia_semana INTEGER,
     FOREIGN KEY (venda_id) REFERENCES vendas(venda_id)
 );
 
+-- ===============================================
+-- TABELA: dim_datas (dimensão de datas)
+-- ===============================================
+-- Um registro por dia do período coberto por vendas, test drives e
+-- serviços; as tabelas de fatos ligam pela coluna dia_epoch. Preenchida
+-- pelo ETL (dimensao_datas.py) e pelos gatilhos trg_*_datas_*.
+CREATE TABLE IF NOT EXISTS dim_datas (
+    dia_epoch INTEGER PRIMARY KEY,  -- dias desde 1970-01-01
+    data DATE NOT NULL UNIQUE,
+    ano INTEGER NOT NULL,
+    trimestre INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    dia INTEGER NOT NULL,
+    dia_semana INTEGER NOT NULL,  -- 0 = domingo (strftime('%w'))
+    ano_mes TEXT NOT NULL  -- 'AAAA-MM'
+);
+
+-- ===============================================
+-- GATILHOS: COLUNAS DERIVADAS DAS DATAS
+-- ===============================================
+-- Preenchem as colunas derivadas (e o dia em dim_datas) de cada linha
+-- gravada fora do ETL, como os POST do server.js. Mesmas contas de
+-- dimensao_datas.py, que recalcula em lote as linhas carregadas pelo ETL
+-- (a carga em massa cria os gatilhos só depois de inserir os dados).
+
+CREATE TRIGGER IF NOT EXISTS trg_clientes_datas_insercao AFTER INSERT ON clientes
+BEGIN
+    UPDATE clientes SET dia_nascimento = CAST(julianday(date(data_nascimento)) - 2440587.5 AS INTEGER)
+    WHERE cliente_id = NEW.cliente_id;
+END;
+
+-- Nova data de nascimento: também recalcula a idade nas vendas e test drives do cliente
+CREATE TRIGGER IF NOT EXISTS trg_clientes_datas_atualizacao AFTER UPDATE OF data_nascimento ON clientes
+BEGIN
+    UPDATE clientes SET dia_nascimento = CAST(julianday(date(data_nascimento)) - 2440587.5 AS INTEGER)
+    WHERE cliente_id = NEW.cliente_id;
+    UPDATE vendas SET idade_cliente = CAST((julianday(data_venda) - julianday(NEW.data_nascimento)) / 365.25 AS INTEGER)
+    WHERE cliente_id = NEW.cliente_id;
+    UPDATE test_drives SET idade_cliente = CAST((julianday(data_test_drive) - julianday(NEW.data_nascimento)) / 365.25 AS INTEGER)
+    WHERE cliente_id = NEW.cliente_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_vendas_datas_insercao AFTER INSERT ON vendas
+BEGIN
+    UPDATE vendas SET
+        dia_epoch = CAST(julianday(date(data_venda)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_venda) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_venda) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_venda) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_venda) AS INTEGER),
+        idade_cliente = (
+            SELECT CAST((julianday(vendas.data_venda) - julianday(c.data_nascimento)) / 365.25 AS INTEGER)
+            FROM clientes c WHERE c.cliente_id = vendas.cliente_id
+        )
+    WHERE venda_id = NEW.venda_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_venda) as data) WHERE data IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_vendas_datas_atualizacao AFTER UPDATE OF data_venda, cliente_id ON vendas
+BEGIN
+    UPDATE vendas SET
+        dia_epoch = CAST(julianday(date(data_venda)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_venda) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_venda) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_venda) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_venda) AS INTEGER),
+        idade_cliente = (
+            SELECT CAST((julianday(vendas.data_venda) - julianday(c.data_nascimento)) / 365.25 AS INTEGER)
+            FROM clientes c WHERE c.cliente_id = vendas.cliente_id
+        )
+    WHERE venda_id = NEW.venda_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_venda) as data) WHERE data IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_test_drives_datas_insercao AFTER INSERT ON test_drives
+BEGIN
+    UPDATE test_drives SET
+        dia_epoch = CAST(julianday(date(data_test_drive)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_test_drive) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_test_drive) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_test_drive) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_test_drive) AS INTEGER),
+        hora = CAST(strftime('%H', data_test_drive) AS INTEGER),
+        idade_cliente = (
+            SELECT CAST((julianday(test_drives.data_test_drive) - julianday(c.data_nascimento)) / 365.25 AS INTEGER)
+            FROM clientes c WHERE c.cliente_id = test_drives.cliente_id
+        )
+    WHERE test_drive_id = NEW.test_drive_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_test_drive) as data) WHERE data IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_test_drives_datas_atualizacao AFTER UPDATE OF data_test_drive, cliente_id ON test_drives
+BEGIN
+    UPDATE test_drives SET
+        dia_epoch = CAST(julianday(date(data_test_drive)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_test_drive) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_test_drive) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_test_drive) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_test_drive) AS INTEGER),
+        hora = CAST(strftime('%H', data_test_drive) AS INTEGER),
+        idade_cliente = (
+            SELECT CAST((julianday(test_drives.data_test_drive) - julianday(c.data_nascimento)) / 365.25 AS INTEGER)
+            FROM clientes c WHERE c.cliente_id = test_drives.cliente_id
+        )
+    WHERE test_drive_id = NEW.test_drive_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_test_drive) as data) WHERE data IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_servicos_pos_venda_datas_insercao AFTER INSERT ON servicos_pos_venda
+BEGIN
+    UPDATE servicos_pos_venda SET
+        dia_epoch = CAST(julianday(date(data_servico)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_servico) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_servico) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_servico) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_servico) AS INTEGER)
+    WHERE servico_id = NEW.servico_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_servico) as data) WHERE data IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_servicos_pos_venda_datas_atualizacao AFTER UPDATE OF data_servico ON servicos_pos_venda
+BEGIN
+    UPDATE servicos_pos_venda SET
+        dia_epoch = CAST(julianday(date(data_servico)) - 2440587.5 AS INTEGER),
+        ano = CAST(strftime('%Y', data_servico) AS INTEGER),
+        trimestre = (CAST(strftime('%m', data_servico) AS INTEGER) + 2) / 3,
+        mes = CAST(strftime('%m', data_servico) AS INTEGER),
+        dia_semana = CAST(strftime('%w', data_servico) AS INTEGER)
+    WHERE servico_id = NEW.servico_id;
+    INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+    SELECT CAST(julianday(data) - 2440587.5 AS INTEGER), data, CAST(strftime('%Y', data) AS INTEGER),
+           (CAST(strftime('%m', data) AS INTEGER) + 2) / 3, CAST(strftime('%m', data) AS INTEGER),
+           CAST(strftime('%d', data) AS INTEGER), CAST(strftime('%w', data) AS INTEGER), strftime('%Y-%m', data)
+    FROM (SELECT date(NEW.data_servico) as data) WHERE data IS NOT NULL;
+END;
+
 -- ===============================================
 -- ÍNDICES PARA OTIMIZAÇÃO DE CONSULTAS
 -- ===============================================
@@ -120,7 +299,8 @@ CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas(data_venda);
 CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas(cliente_id);
 CREATE INDEX IF NOT EXISTS idx_vendas_veiculo ON vendas(veiculo_id);
 CREATE INDEX IF NOT EXISTS idx_vendas_vendedor ON vendas(vendedor_id);
-CREATE INDEX IF NOT EXISTS idx_vendas_status ON vendas(status_venda);
+CREATE INDEX IF NOT EXISTS idx_vendas_dia ON vendas(dia_epoch);
+CREATE INDEX IF NOT EXISTS idx_vendas_ano_mes ON vendas(ano, mes);
 
 -- Índices na tabela veiculos
 CREATE INDEX IF NOT EXISTS idx_veiculos_marca_modelo ON veiculos(marca, modelo);
@@ -131,14 +311,115 @@ CREATE INDEX IF NOT EXISTS idx_veiculos_categoria ON veiculos(categoria);
 CREATE INDEX IF NOT EXISTS idx_test_drives_data ON test_drives(data_test_drive);
 CREATE INDEX IF NOT EXISTS idx_test_drives_cliente ON test_drives(cliente_id);
 CREATE INDEX IF NOT EXISTS idx_test_drives_resultou_venda ON test_drives(resultou_venda);
+CREATE INDEX IF NOT EXISTS idx_test_drives_dia ON test_drives(dia_epoch);
+CREATE INDEX IF NOT EXISTS idx_test_drives_ano_mes ON test_drives(ano, mes);
 
 -- Índices na tabela servicos_pos_venda
 CREATE INDEX IF NOT EXISTS idx_servicos_data ON servicos_pos_venda(data_servico);
 CREATE INDEX IF NOT EXISTS idx_servicos_venda ON servicos_pos_venda(venda_id);
+CREATE INDEX IF NOT EXISTS idx_servicos_ano_mes ON servicos_pos_venda(ano, mes);
+
+-- Índice na dimensão de datas
+CREATE INDEX IF NOT EXISTS idx_dim_datas_ano_mes ON dim_datas(ano, mes);
+
+-- ===============================================
+-- ÍNDICES DA CARGA ANALÍTICA
+-- ===============================================
+-- Montados a partir das consultas do projeto (materializacao.py,
+-- feature_store.py, segmentacao.py); medição antes/depois com
+-- python plano_consultas.py.
+--
+-- Todas as consultas que buscam vendas por cliente, vendedor ou veículo
+-- filtram status_venda = 'Concluída': os índices de vendas são parciais
+-- (só as concluídas) e cobrem as colunas agregadas, então o GROUP BY não
+-- acessa a tabela. status_venda vai no fim da chave só para cobrir o
+-- próprio filtro (o SQLite não deduz o valor a partir do WHERE do índice).
+-- A consulta precisa repetir o filtro de status para usá-los; as demais
+-- buscas por chave estrangeira (e a checagem das FKs ao apagar clientes,
+-- veículos e vendedores) seguem com os índices de uma coluna acima.
+
+-- Resumo por cliente e perfil de clientes (COUNT/SUM/AVG/MAX por cliente)
+CREATE INDEX IF NOT EXISTS idx_vendas_concluidas_cliente
+    ON vendas(cliente_id, valor_venda, data_venda, status_venda) WHERE status_venda = 'Concluída';
+-- Performance de vendedores
+CREATE INDEX IF NOT EXISTS idx_vendas_concluidas_vendedor
+    ON vendas(vendedor_id, valor_venda, status_venda) WHERE status_venda = 'Concluída';
+-- Modelos mais vendidos
+CREATE INDEX IF NOT EXISTS idx_vendas_concluidas_veiculo
+    ON vendas(veiculo_id, valor_venda, status_venda) WHERE status_venda = 'Concluída';
+
+-- Test drives por veículo (chave estrangeira sem índice até aqui) com o resultado
+CREATE INDEX IF NOT EXISTS idx_test_drives_veiculo_resultado ON test_drives(veiculo_id, resultou_venda);
+-- Test drives e avaliação média por cliente (perfil de clientes)
+CREATE INDEX IF NOT EXISTS idx_test_drives_cliente_avaliacao ON test_drives(cliente_id, avaliacao);
+
+-- Substituído pelos parciais acima. Sem estatísticas (ANALYZE), o
+-- otimizador usava o índice de status no resumo por cliente e percorria
+-- todas as vendas concluídas para cada cliente (consultas de
+-- plano_consultas.py com 20 mil clientes: 58 s com ele x 0,13 s sem).
+DROP INDEX IF EXISTS idx_vendas_status;
+
+-- ===============================================
+-- TABELAS MATERIALIZADAS (RESUMOS)
+-- ===============================================
+-- Resultados pré-calculados das views de análise (vw_*, abaixo). São
+-- preenchidas e atualizadas de forma incremental pelo ETL em Python
+-- (materializacao.py), somando apenas as vendas/test drives novos;
+-- atualizado_em registra a última atualização de cada linha. Gravações
+-- feitas fora do ETL só aparecem aqui na próxima atualização.
+
+CREATE TABLE IF NOT EXISTS mv_resumo_vendas_cliente (
+    cliente_id INTEGER PRIMARY KEY,
+    nome TEXT,
+    email TEXT,
+    total_compras INTEGER NOT NULL DEFAULT 0,
+    valor_total_gasto REAL,
+    ticket_medio REAL,
+    ultima_compra DATE,
+    atualizado_em TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS mv_performance_vendedores (
+    vendedor_id INTEGER PRIMARY KEY,
+    nome TEXT,
+    total_vendas INTEGER NOT NULL DEFAULT 0,
+    valor_total_vendido REAL,
+    ticket_medio REAL,
+    comissao_total REAL,
+    atualizado_em TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS mv_modelos_mais_vendidos (
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    quantidade_vendida INTEGER NOT NULL DEFAULT 0,
+    receita_total REAL,
+    preco_medio_venda REAL,
+    atualizado_em TIMESTAMP,
+    PRIMARY KEY (marca, modelo)
+);
+
+CREATE TABLE IF NOT EXISTS mv_conversao_test_drives (
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    total_test_drives INTEGER NOT NULL DEFAULT 0,
+    total_vendas INTEGER NOT NULL DEFAULT 0,
+    taxa_conversao REAL,
+    atualizado_em TIMESTAMP,
+    PRIMARY KEY (marca, modelo)
+);
+
+-- Índices para as ordenações dos resumos (leitura ordenada sem ordenar a tabela)
+CREATE INDEX IF NOT EXISTS idx_mv_modelos_quantidade ON mv_modelos_mais_vendidos(quantidade_vendida DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_conversao_taxa ON mv_conversao_test_drives(taxa_conversao DESC);
 
 -- ===============================================
 -- VIEWS ÚTEIS PARA ANÁLISE
 -- ===============================================
+-- Agregações sobre os dados atuais (inclui as gravações da API). O mesmo
+-- resultado pré-calculado fica nas tabelas mv_* acima, com leitura
+-- proporcional às linhas retornadas, mas só tão atual quanto a última
+-- execução do ETL (ver atualizado_em); GET /views/mv_* no server.js as lê.
 
 -- View: Resumo de vendas por cliente
 CREATE VIEW IF NOT EXISTS vw_resumo_vendas_cliente AS
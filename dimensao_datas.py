@@ -0,0 +1,361 @@
+"""
+Dimensão de Datas e Colunas Derivadas
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+As consultas analíticas calculavam idade, dia da semana e hora linha a linha
+com julianday()/strftime() sobre as datas em TEXT, o que obriga a reparsear
+todas as datas e impede o uso de índices. Este módulo grava esses valores uma
+vez, na carga:
+
+- vendas, test_drives, servicos_pos_venda: dia_epoch (dias desde
+  1970-01-01), ano, trimestre, mes, dia_semana (0 = domingo, como
+  strftime('%w')), hora (test drives) e idade_cliente (idade na data do
+  evento, mesma conta de antes: (julianday(evento) - julianday(nascimento)) / 365.25)
+- clientes: dia_nascimento, para idades relativas a hoje sem julianday()
+  por linha: (julianday('now') - 2440587.5 - dia_nascimento) / 365.25
+- dim_datas: um registro por dia do período das tabelas de fatos
+
+O preenchimento é incremental (marcas d'água do processo 'dimensao_datas' em
+etl_marcas): só as linhas com ID acima da marca são calculadas. Bancos
+criados antes ganham as colunas, a tabela, os índices e os gatilhos novos
+em instalar_datas (ALTER TABLE ADD COLUMN).
+
+Linhas gravadas fora do ETL (POST do server.js) são preenchidas na hora
+pelos gatilhos trg_*_datas_* de create_tables_sqlite.sql, com as mesmas
+contas; os leitores só conferem o esquema (verificar_datas).
+
+Uso:
+    python dimensao_datas.py --banco vendas_carros_esportivos.db
+    python dimensao_datas.py --conferir   # gatilhos x cálculo em lote
+"""
+
+import sqlite3
+import time
+
+from carregar_sqlite import DB_PATH, SQL_PATH, ler_comandos_sql
+from etl_incremental import gravar_marca, ler_marca
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+PROCESSO_DATAS = 'dimensao_datas'
+
+# Dia juliano de 1970-01-01 00:00 (julianday() - EPOCH_JULIANO = dias desde 1970-01-01)
+EPOCH_JULIANO = 2440587.5
+
+# Tabelas de fatos: coluna de ID, coluna de data e se a data tem horário
+TABELAS_DATAS = {
+    'vendas': ('venda_id', 'data_venda', False),
+    'test_drives': ('test_drive_id', 'data_test_drive', True),
+    'servicos_pos_venda': ('servico_id', 'data_servico', False)
+}
+
+# Fatos com cliente_id (recebem idade_cliente)
+TABELAS_COM_CLIENTE = ['vendas', 'test_drives']
+
+# Colunas gravadas por este módulo
+COLUNAS_DERIVADAS = {'dia_epoch', 'ano', 'trimestre', 'mes', 'dia_semana', 'hora', 'idade_cliente', 'dia_nascimento'}
+
+# Colunas derivadas de cada tabela (conferidas pelos leitores em verificar_datas)
+COLUNAS_POR_TABELA = {
+    'clientes': ['dia_nascimento'],
+    **{tabela: ['dia_epoch', 'ano', 'trimestre', 'mes', 'dia_semana']
+               + (['hora'] if com_hora else [])
+               + (['idade_cliente'] if tabela in TABELAS_COM_CLIENTE else [])
+       for tabela, (_, _, com_hora) in TABELAS_DATAS.items()}
+}
+
+# Gatilhos de create_tables_sqlite.sql que preenchem as colunas nas
+# gravações fora do ETL (também conferidos em verificar_datas)
+GATILHOS_DATAS = [f"trg_{tabela}_datas_{evento}"
+                  for tabela in COLUNAS_POR_TABELA for evento in ('insercao', 'atualizacao')]
+
+
+def _sql_fatos(tabela):
+    coluna_id, coluna_data, com_hora = TABELAS_DATAS[tabela]
+    colunas = {
+        'dia_epoch': f"CAST(julianday(date({coluna_data})) - {EPOCH_JULIANO} AS INTEGER)",
+        'ano': f"CAST(strftime('%Y', {coluna_data}) AS INTEGER)",
+        'trimestre': f"(CAST(strftime('%m', {coluna_data}) AS INTEGER) + 2) / 3",
+        'mes': f"CAST(strftime('%m', {coluna_data}) AS INTEGER)",
+        'dia_semana': f"CAST(strftime('%w', {coluna_data}) AS INTEGER)"
+    }
+    if com_hora:
+        colunas['hora'] = f"CAST(strftime('%H', {coluna_data}) AS INTEGER)"
+    if tabela in TABELAS_COM_CLIENTE:
+        colunas['idade_cliente'] = f"""(
+            SELECT CAST((julianday({tabela}.{coluna_data}) - julianday(c.data_nascimento)) / 365.25 AS INTEGER)
+            FROM clientes c WHERE c.cliente_id = {tabela}.cliente_id
+        )"""
+    atribuicoes = ',\n    '.join(f"{coluna} = {expressao}" for coluna, expressao in colunas.items())
+    return f"""
+UPDATE {tabela} SET
+    {atribuicoes}
+WHERE {coluna_id} > :ultimo_id AND {coluna_id} <= :ate_id
+"""
+
+
+SQL_ATUALIZAR = {tabela: _sql_fatos(tabela) for tabela in TABELAS_DATAS}
+SQL_ATUALIZAR['clientes'] = f"""
+UPDATE clientes SET
+    dia_nascimento = CAST(julianday(date(data_nascimento)) - {EPOCH_JULIANO} AS INTEGER)
+WHERE cliente_id > :ultimo_id AND cliente_id <= :ate_id
+"""
+
+# Clientes primeiro: a idade nas tabelas de fatos é calculada a partir deles
+COLUNAS_ID = {'clientes': 'cliente_id', **{tabela: coluna for tabela, (coluna, _, _) in TABELAS_DATAS.items()}}
+
+# Dias que faltam na dimensão entre :inicio e :fim (dia_epoch)
+SQL_DIM_DATAS = """
+WITH RECURSIVE dias(dia_epoch) AS (
+    SELECT :inicio
+    UNION ALL
+    SELECT dia_epoch + 1 FROM dias WHERE dia_epoch < :fim
+)
+INSERT OR IGNORE INTO dim_datas (dia_epoch, data, ano, trimestre, mes, dia, dia_semana, ano_mes)
+SELECT
+    dia_epoch,
+    data,
+    CAST(strftime('%Y', data) AS INTEGER),
+    (CAST(strftime('%m', data) AS INTEGER) + 2) / 3,
+    CAST(strftime('%m', data) AS INTEGER),
+    CAST(strftime('%d', data) AS INTEGER),
+    CAST(strftime('%w', data) AS INTEGER),
+    strftime('%Y-%m', data)
+FROM (SELECT dia_epoch, date(dia_epoch * 86400, 'unixepoch') as data FROM dias)
+"""
+
+# ===============================================
+# INSTALAÇÃO
+# ===============================================
+
+def instalar_datas(conn, sql_path=SQL_PATH):
+    """
+    Garante dim_datas, as colunas derivadas, os índices sobre elas e os
+    gatilhos que as preenchem em bancos criados antes (ALTER TABLE só para
+    as colunas que faltam)
+    """
+    referencia = sqlite3.connect(':memory:')
+    comandos = ler_comandos_sql(sql_path)
+    for comando in comandos:
+        if comando.upper().startswith('CREATE TABLE'):
+            referencia.execute(comando)
+
+    adicionadas = 0
+    for tabela in COLUNAS_ID:
+        existentes = {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+        for _, coluna, tipo, *_ in referencia.execute(f"PRAGMA table_info({tabela})"):
+            if coluna not in existentes:
+                conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+                adicionadas += 1
+    referencia.close()
+
+    # dim_datas, os índices sobre as colunas derivadas e os gatilhos (os
+    # demais índices do script ficam com carregar_sqlite.aplicar_indices)
+    for comando in comandos:
+        if comando.upper().startswith('CREATE TRIGGER'):
+            if comando.split()[5] in GATILHOS_DATAS:
+                conn.execute(comando)
+            continue
+        cabecalho, _, resto = comando.partition('(')
+        colunas = {coluna.strip() for coluna in resto.split(')')[0].split(',')}
+        if cabecalho.split()[-1] == 'dim_datas' or (
+                cabecalho.upper().startswith('CREATE INDEX') and colunas <= COLUNAS_DERIVADAS):
+            conn.execute(comando)
+    return adicionadas
+
+# ===============================================
+# PREENCHIMENTO
+# ===============================================
+
+def preencher_datas(conn, completo=False):
+    """
+    Calcula as colunas derivadas das linhas acima da marca d'água de cada
+    tabela e completa dim_datas, em uma única transação.
+    Retorna {tabela: linhas de origem processadas}.
+    """
+    faixas = {}
+    for tabela, coluna_id in COLUNAS_ID.items():
+        ultimo_id, _ = ler_marca(conn, tabela, processo=PROCESSO_DATAS)
+        ate_id = conn.execute(f"SELECT COALESCE(MAX({coluna_id}), 0) FROM {tabela}").fetchone()[0]
+        faixas[tabela] = (0 if completo or ultimo_id > ate_id else ultimo_id, ate_id)
+    processadas = {tabela: ate_id - ultimo_id for tabela, (ultimo_id, ate_id) in faixas.items()}
+    # Nada novo: não abre transação (o ETL incremental chama isto a cada execução)
+    if not completo and not any(processadas.values()):
+        return processadas
+
+    conn.execute("BEGIN")
+    try:
+        inicio_dim, fim_dim = None, None
+        for tabela, (ultimo_id, ate_id) in faixas.items():
+            coluna_id = COLUNAS_ID[tabela]
+            parametros = {'ultimo_id': ultimo_id, 'ate_id': ate_id}
+            conn.execute(SQL_ATUALIZAR[tabela], parametros)
+
+            if tabela in TABELAS_DATAS:
+                menor, maior = conn.execute(
+                    f"SELECT MIN(dia_epoch), MAX(dia_epoch) FROM {tabela} "
+                    f"WHERE {coluna_id} > :ultimo_id AND {coluna_id} <= :ate_id", parametros
+                ).fetchone()
+                if menor is not None:
+                    inicio_dim = menor if inicio_dim is None else min(inicio_dim, menor)
+                    fim_dim = maior if fim_dim is None else max(fim_dim, maior)
+
+            gravar_marca(conn, tabela, ate_id, None, processo=PROCESSO_DATAS)
+
+        if inicio_dim is not None:
+            conn.execute(SQL_DIM_DATAS, {'inicio': inicio_dim, 'fim': fim_dim})
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return processadas
+
+
+def atualizar_datas(conn, completo=False):
+    """
+    Instala o que faltar e preenche as linhas novas (chamado pelo ETL
+    incremental, pelos processos que gravam no banco e, com
+    preparar_banco=True, pelos leitores)
+    """
+    inicio = time.perf_counter()
+    adicionadas = instalar_datas(conn)
+    processadas = preencher_datas(conn, completo=completo or adicionadas > 0)
+    if sum(processadas.values()):
+        resumo = ', '.join(f"{tabela} {linhas:,}" for tabela, linhas in processadas.items() if linhas)
+        print(f"✓ Colunas de datas atualizadas ({resumo}) em {time.perf_counter() - inicio:.2f}s")
+    return processadas
+
+
+def garantir_datas(db_path=DB_PATH):
+    """
+    atualizar_datas em uma conexão própria, para preparar um banco antigo
+    antes de lê-lo (os leitores só fazem isso com preparar_banco=True)
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        return atualizar_datas(conn)
+    finally:
+        conn.close()
+
+
+def verificar_datas(conn):
+    """
+    Confere, só lendo, se o banco já tem as colunas derivadas e os gatilhos
+    que as preenchem. Os leitores chamam isto em vez de atualizar_datas:
+    migrar e preencher é papel de quem grava (carga, ETL incremental,
+    gatilhos e este módulo pela linha de comando).
+    """
+    faltando = []
+    for tabela, colunas in COLUNAS_POR_TABELA.items():
+        existentes = {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+        faltando += [f"{tabela}.{coluna}" for coluna in colunas if coluna not in existentes]
+    gatilhos = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    faltando += [gatilho for gatilho in GATILHOS_DATAS if gatilho not in gatilhos]
+    if faltando:
+        raise RuntimeError(
+            f"Banco sem as colunas/gatilhos de datas ({', '.join(faltando)}). "
+            f"Atualize com: python dimensao_datas.py --banco <arquivo .db>"
+        )
+
+# ===============================================
+# CONFERÊNCIA DOS GATILHOS
+# ===============================================
+
+# Gravações no formato dos POST do server.js (só as colunas da API)
+INSERCOES_API = [
+    ("INSERT INTO clientes (nome, email, telefone, data_nascimento, genero, cidade, estado, renda_anual, profissao) "
+     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+     ('Cliente API', 'cliente.api@exemplo.com', None, '1990-07-15', 'Outro', 'Recife', 'PE', 250000.0, 'Médico')),
+    ("INSERT INTO vendedores (nome, email, data_contratacao, comissao_percentual, regiao_atuacao, ativo) "
+     "VALUES (?, ?, ?, ?, ?, ?)",
+     ('Vendedor API', 'vendedor.api@exemplo.com', '2020-01-10', 3.0, 'Nordeste', 1)),
+    ("INSERT INTO veiculos (marca, modelo, ano_fabricacao, cor, tipo_motor, potencia_cv, cilindradas, transmissao, "
+     "tracao, preco_base, estoque, categoria) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+     ('Porsche', '911 Carrera', 2024, 'Preto', 'Boxer 6', 385, 3.0, 'Automatizada', 'Traseira', 900000.0, 2, 'Esportivo')),
+    ("INSERT INTO vendas (cliente_id, veiculo_id, vendedor_id, data_venda, valor_venda, desconto_percentual, "
+     "forma_pagamento, numero_parcelas, valor_entrada, status_venda) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+     (1, 1, 1, '2024-03-09', 880000.0, 2.0, 'À vista', 1, 880000.0, 'Concluída')),
+    ("INSERT INTO test_drives (cliente_id, veiculo_id, data_test_drive, avaliacao, comentario, resultou_venda, "
+     "vendedor_responsavel_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+     (1, 1, '2024-02-28 17:45:00', 5, None, 0, 1)),
+    ("INSERT INTO servicos_pos_venda (venda_id, tipo_servico, data_servico, valor_servico, satisfacao_cliente, "
+     "observacoes) VALUES (?, ?, ?, ?, ?, ?)",
+     (1, 'Revisão', '2025-01-02', 3500.0, 4, None))
+]
+
+# Atualizações que os gatilhos de atualização precisam refletir
+ATUALIZACOES_API = [
+    "UPDATE clientes SET data_nascimento = '1985-12-31' WHERE cliente_id = 1",
+    "UPDATE test_drives SET data_test_drive = '2024-03-02 09:10:00' WHERE test_drive_id = 1"
+]
+
+
+def _colunas_derivadas(conn):
+    valores = {}
+    for tabela, colunas in COLUNAS_POR_TABELA.items():
+        valores[tabela] = conn.execute(
+            f"SELECT {', '.join(colunas)} FROM {tabela} ORDER BY {COLUNAS_ID[tabela]}").fetchall()
+    valores['dim_datas'] = conn.execute("SELECT * FROM dim_datas ORDER BY dia_epoch").fetchall()
+    return valores
+
+
+def conferir_gatilhos(sql_path=SQL_PATH):
+    """
+    Cria um banco em memória pelo script, grava linhas como o server.js e
+    confere se os gatilhos preencheram as colunas derivadas com os mesmos
+    valores do cálculo em lote (preencher_datas). Retorna as divergências.
+    """
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    try:
+        for comando in ler_comandos_sql(sql_path):
+            conn.execute(comando)
+
+        divergencias = []
+        for etapa, comandos in (('inserção', INSERCOES_API), ('atualização', [(c, ()) for c in ATUALIZACOES_API])):
+            for comando, parametros in comandos:
+                conn.execute(comando, parametros)
+            gatilhos = _colunas_derivadas(conn)
+            preencher_datas(conn, completo=True)
+            lote = _colunas_derivadas(conn)
+            # dim_datas: o gatilho grava só o dia do evento; o lote completa o período
+            if not set(gatilhos.pop('dim_datas')) <= set(lote['dim_datas']):
+                divergencias.append(f"{etapa} em dim_datas: dias diferentes do cálculo em lote")
+            for tabela in gatilhos:
+                if gatilhos[tabela] != lote[tabela]:
+                    divergencias.append(f"{etapa} em {tabela}: gatilho {gatilhos[tabela]} x lote {lote[tabela]}")
+                elif any(valor is None for linha in gatilhos[tabela] for valor in linha):
+                    divergencias.append(f"{etapa} em {tabela}: colunas derivadas NULL {gatilhos[tabela]}")
+    finally:
+        conn.close()
+
+    if divergencias:
+        for divergencia in divergencias:
+            print(f"⚠️ {divergencia}")
+    else:
+        print("✓ Gatilhos de datas conferidos (mesmos valores do cálculo em lote)")
+    return divergencias
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Preenche dim_datas e as colunas derivadas das datas")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db")
+    parser.add_argument("--completo", action="store_true", help="recalcula todas as linhas")
+    parser.add_argument("--conferir", action="store_true",
+                        help="confere os gatilhos em um banco em memória (não abre --banco)")
+    args = parser.parse_args()
+
+    if args.conferir:
+        raise SystemExit(1 if conferir_gatilhos() else 0)
+
+    conn = sqlite3.connect(args.banco, isolation_level=None)
+    try:
+        atualizar_datas(conn, completo=args.completo)
+    finally:
+        conn.close()
@@ -0,0 +1,236 @@
+"""
+Esquema de Tipos das Tabelas
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Tipos pandas de cada coluna das tabelas de create_tables_sqlite.sql, pensados
+para reduzir a memória dos DataFrames carregados:
+- IDs e contagens em inteiros reduzidos (int32/int16/int8)
+- textos de baixa cardinalidade como category (domínios fixos vêm dos CHECKs do SQL)
+- datas como datetime64
+- float32 para percentuais e cilindradas; valores em R$ continuam float64
+  (float32 não representa centavos acima de ~R$ 100 mil)
+
+Todos os carregadores (CSV, Parquet e consultas SQL) passam por aplicar_esquema.
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+# ===============================================
+# DOMÍNIOS (CHECK CONSTRAINTS DO SQL)
+# ===============================================
+
+GENEROS = ['Masculino', 'Feminino', 'Outro', 'Prefiro não informar']
+TRANSMISSOES = ['Manual', 'Automática', 'Automatizada', 'CVT']
+TRACOES = ['Dianteira', 'Traseira', 'Integral', 'AWD']
+FORMAS_PAGAMENTO = ['À vista', 'Financiamento', 'Consórcio', 'Leasing']
+STATUS_VENDA = ['Concluída', 'Cancelada', 'Em Processamento']
+TIPOS_SERVICO = ['Revisão', 'Manutenção', 'Reparo', 'Personalização', 'Garantia', 'Detalhamento']
+
+# ===============================================
+# ESQUEMA POR TABELA
+# ===============================================
+
+DATA = 'datetime64[ns]'
+CATEGORIA = 'category'
+TEXTO = None  # texto livre: mantém o tipo lido
+
+# Colunas derivadas das datas nas tabelas de fatos (preenchidas pelo ETL,
+# dimensao_datas.py)
+COLUNAS_DATA = {
+    'dia_epoch': 'int32',
+    'ano': 'int16',
+    'trimestre': 'int8',
+    'mes': 'int8',
+    'dia_semana': 'int8'
+}
+
+ESQUEMA = {
+    'clientes': {
+        'cliente_id': 'int32',
+        'nome': TEXTO,
+        'email': TEXTO,
+        'telefone': TEXTO,
+        'data_nascimento': DATA,
+        'genero': pd.CategoricalDtype(GENEROS),
+        'cidade': CATEGORIA,
+        'estado': CATEGORIA,
+        'renda_anual': 'float64',
+        'profissao': CATEGORIA,
+        'data_cadastro': DATA,
+        'dia_nascimento': 'int32'
+    },
+    'vendedores': {
+        'vendedor_id': 'int32',
+        'nome': TEXTO,
+        'email': TEXTO,
+        'data_contratacao': DATA,
+        'comissao_percentual': 'float32',
+        'regiao_atuacao': CATEGORIA,
+        'ativo': 'bool'
+    },
+    'veiculos': {
+        'veiculo_id': 'int32',
+        'marca': CATEGORIA,
+        'modelo': CATEGORIA,
+        'ano_fabricacao': 'int16',
+        'cor': CATEGORIA,
+        'tipo_motor': CATEGORIA,
+        'potencia_cv': 'int16',
+        'cilindradas': 'float32',
+        'transmissao': pd.CategoricalDtype(TRANSMISSOES),
+        'tracao': pd.CategoricalDtype(TRACOES),
+        'preco_base': 'float64',
+        'estoque': 'int16',
+        'categoria': CATEGORIA
+    },
+    'vendas': {
+        'venda_id': 'int32',
+        'cliente_id': 'int32',
+        'veiculo_id': 'int32',
+        'vendedor_id': 'int32',
+        'data_venda': DATA,
+        'valor_venda': 'float64',
+        'desconto_percentual': 'float32',
+        'forma_pagamento': pd.CategoricalDtype(FORMAS_PAGAMENTO),
+        'numero_parcelas': 'int8',
+        'valor_entrada': 'float64',
+        'status_venda': pd.CategoricalDtype(STATUS_VENDA),
+        **COLUNAS_DATA,
+        'idade_cliente': 'int16'
+    },
+    'test_drives': {
+        'test_drive_id': 'int32',
+        'cliente_id': 'int32',
+        'veiculo_id': 'int32',
+        'data_test_drive': DATA,
+        'avaliacao': 'int8',
+        'comentario': CATEGORIA,
+        'resultou_venda': 'bool',
+        'vendedor_responsavel_id': 'int32',
+        **COLUNAS_DATA,
+        'hora': 'int8',
+        'idade_cliente': 'int16'
+    },
+    'servicos_pos_venda': {
+        'servico_id': 'int32',
+        'venda_id': 'int32',
+        'tipo_servico': pd.CategoricalDtype(TIPOS_SERVICO),
+        'data_servico': DATA,
+        'valor_servico': 'float64',
+        'satisfacao_cliente': 'int8',
+        'observacoes': CATEGORIA,
+        **COLUNAS_DATA
+    }
+}
+
+# Tipos por nome de coluna, para resultados de consultas com JOIN (as colunas
+# repetidas entre tabelas, como cliente_id ou nome, têm o mesmo tipo em todas)
+TIPOS_COLUNAS = {}
+for _colunas in ESQUEMA.values():
+    TIPOS_COLUNAS.update(_colunas)
+
+# ===============================================
+# CONVERSÃO
+# ===============================================
+
+def _nulavel(tipo):
+    """
+    Inteiros/booleanos com valores nulos usam os tipos anuláveis do pandas
+    """
+    if isinstance(tipo, str) and (tipo.startswith('int') or tipo == 'bool'):
+        return tipo.capitalize() if tipo.startswith('int') else 'boolean'
+    return tipo
+
+
+def _converter(serie, tipo):
+    if tipo == DATA:
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            return serie
+        return pd.to_datetime(serie, errors='coerce')
+    if serie.isna().any():
+        tipo = _nulavel(tipo)
+    return serie.astype(tipo)
+
+
+def aplicar_esquema(df, tabela=None):
+    """
+    Converte as colunas conhecidas do DataFrame para os tipos do esquema.
+
+    Com tabela=None usa os tipos por nome de coluna (útil para consultas com
+    JOIN). Colunas fora do esquema (ex.: idade_cliente calculada no SQL) não
+    são alteradas.
+    """
+    tipos = ESQUEMA[tabela] if tabela else TIPOS_COLUNAS
+    convertidas = {
+        coluna: _converter(df[coluna], tipos[coluna])
+        for coluna in df.columns
+        if tipos.get(coluna) is not None
+    }
+    return df.assign(**convertidas) if convertidas else df
+
+
+def opcoes_read_csv(tabela, colunas=None):
+    """
+    Argumentos de pd.read_csv (dtype e parse_dates) para ler uma tabela já
+    com categorias e floats reduzidos, sem passar por strings object.
+    Os inteiros são reduzidos depois, em aplicar_esquema (aceitam nulos).
+    """
+    tipos = {
+        coluna: tipo for coluna, tipo in ESQUEMA[tabela].items()
+        if colunas is None or coluna in colunas
+    }
+    return {
+        'dtype': {
+            coluna: tipo for coluna, tipo in tipos.items()
+            if tipo not in (TEXTO, DATA) and not (isinstance(tipo, str) and tipo.startswith(('int', 'bool')))
+        },
+        'parse_dates': [coluna for coluna, tipo in tipos.items() if tipo == DATA]
+    }
+
+
+def ler_csv(caminho, tabela, **kwargs):
+    """
+    pd.read_csv com os tipos do esquema da tabela
+    """
+    opcoes = opcoes_read_csv(tabela, kwargs.get('usecols'))
+    return aplicar_esquema(pd.read_csv(caminho, **opcoes, **kwargs), tabela)
+
+
+def memoria_mb(df):
+    """
+    Memória ocupada pelo DataFrame (incluindo strings), em MB
+    """
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+# ===============================================
+# CONFERÊNCIA COM O SQL
+# ===============================================
+
+def verificar_esquema(sql_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create_tables_sqlite.sql')):
+    """
+    Cria as tabelas do script em um banco em memória e confere se o esquema
+    tem exatamente as mesmas colunas. Retorna a lista de divergências.
+    """
+    conn = sqlite3.connect(':memory:')
+    with open(sql_path, encoding='utf-8') as arquivo:
+        conn.executescript(arquivo.read())
+
+    divergencias = []
+    for tabela, tipos in ESQUEMA.items():
+        colunas_sql = [linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")]
+        if colunas_sql != list(tipos):
+            divergencias.append(f"{tabela}: SQL={colunas_sql} esquema={list(tipos)}")
+    conn.close()
+    return divergencias
+
+
+if __name__ == "__main__":
+    divergencias = verificar_esquema()
+    if divergencias:
+        for divergencia in divergencias:
+            print(f"❌ {divergencia}")
+    else:
+        print(f"✓ Esquema confere com create_tables_sqlite.sql ({len(ESQUEMA)} tabelas)")
@@ -0,0 +1,308 @@
+"""
+ETL Incremental (Marcas d'Água)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Em vez de regenerar e recarregar todo o histórico a cada execução, grava no
+banco apenas as linhas novas de vendas, test_drives e servicos_pos_venda,
+além da marca d'água (maior ID e maior data) de cada tabela.
+
+As marcas ficam na tabela de controle etl_marcas, uma linha por
+(processo, tabela):
+- processo 'carga': até onde os dados já foram gravados no banco
+- demais processos (ex.: 'ml_regressao'): até onde cada consumidor já leu,
+  para que a extração de features processe somente o delta
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import generate_data as gd
+from carregar_sqlite import DB_PATH, DIRETORIO_DADOS, TAMANHO_CHUNK, TABELAS_CARGA, inserir_tabela
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+# Tabelas de fatos incrementais: coluna de ID e coluna de data
+TABELAS_INCREMENTAIS = {
+    'vendas': ('venda_id', 'data_venda'),
+    'test_drives': ('test_drive_id', 'data_test_drive'),
+    'servicos_pos_venda': ('servico_id', 'data_servico')
+}
+
+PROCESSO_CARGA = 'carga'
+
+# Serviços acontecem de 30 a 700 dias após a venda (mesma regra de generate_data)
+DIAS_ATE_SERVICO = (30, 700)
+
+SQL_TABELA_MARCAS = """
+CREATE TABLE IF NOT EXISTS etl_marcas (
+    processo TEXT NOT NULL,
+    tabela TEXT NOT NULL,
+    ultimo_id INTEGER NOT NULL DEFAULT 0,
+    ultima_data TEXT,
+    atualizado_em TEXT NOT NULL,
+    PRIMARY KEY (processo, tabela)
+)
+"""
+
+# ===============================================
+# MARCAS D'ÁGUA
+# ===============================================
+
+def criar_tabela_marcas(conn):
+    conn.execute(SQL_TABELA_MARCAS)
+
+
+def ler_marca(conn, tabela, processo=PROCESSO_CARGA):
+    """
+    Retorna (ultimo_id, ultima_data) gravados para o processo/tabela.
+    Sem marca gravada, retorna (0, None).
+    """
+    criar_tabela_marcas(conn)
+    linha = conn.execute(
+        "SELECT ultimo_id, ultima_data FROM etl_marcas WHERE processo = ? AND tabela = ?",
+        (processo, tabela)
+    ).fetchone()
+    return linha if linha else (0, None)
+
+
+def gravar_marca(conn, tabela, ultimo_id, ultima_data, processo=PROCESSO_CARGA):
+    criar_tabela_marcas(conn)
+    conn.execute(
+        """
+        INSERT INTO etl_marcas (processo, tabela, ultimo_id, ultima_data, atualizado_em)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (processo, tabela) DO UPDATE SET
+            ultimo_id = excluded.ultimo_id,
+            ultima_data = excluded.ultima_data,
+            atualizado_em = excluded.atualizado_em
+        """,
+        (processo, tabela, int(ultimo_id), ultima_data, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    )
+
+
+def marca_atual(conn, tabela):
+    """
+    Maior ID e maior data presentes na tabela (consulta pela chave primária,
+    sem varrer o histórico)
+    """
+    coluna_id, coluna_data = TABELAS_INCREMENTAIS[tabela]
+    ultimo_id = conn.execute(f"SELECT COALESCE(MAX({coluna_id}), 0) FROM {tabela}").fetchone()[0]
+    ultima_data = conn.execute(f"SELECT MAX({coluna_data}) FROM {tabela}").fetchone()[0]
+    return ultimo_id, ultima_data
+
+
+def atualizar_marcas_carga(conn):
+    """
+    Grava a marca do processo 'carga' de cada tabela incremental
+    """
+    for tabela in TABELAS_INCREMENTAIS:
+        ultimo_id, ultima_data = marca_atual(conn, tabela)
+        gravar_marca(conn, tabela, ultimo_id, ultima_data)
+
+# ===============================================
+# ANEXAR LINHAS NOVAS
+# ===============================================
+
+def _somente_novas(blocos, coluna_id, ultimo_id):
+    """
+    Filtra de cada bloco apenas as linhas com ID acima da marca d'água
+    """
+    for bloco in blocos:
+        novas = bloco[bloco[coluna_id] > ultimo_id]
+        if len(novas):
+            yield novas
+
+
+def anexar_blocos(conn, blocos_por_tabela):
+    """
+    Insere somente as linhas além da marca d'água de cada tabela incremental
+    e atualiza as marcas. Retorna {tabela: linhas inseridas}.
+    """
+    criar_tabela_marcas(conn)
+    inseridas = {}
+    for tabela, (coluna_id, _) in TABELAS_INCREMENTAIS.items():
+        if tabela not in blocos_por_tabela:
+            continue
+        ultimo_id, _ = marca_atual(conn, tabela)
+        linhas, segundos = inserir_tabela(conn, tabela,
+                                          _somente_novas(blocos_por_tabela[tabela], coluna_id, ultimo_id))
+        inseridas[tabela] = linhas
+        print(f"✓ {tabela}: {linhas:,} linhas novas (marca anterior: ID {ultimo_id:,}) em {segundos:.2f}s")
+    atualizar_marcas_carga(conn)
+
+    # Colunas derivadas das datas das linhas novas
+    from dimensao_datas import atualizar_datas
+    atualizar_datas(conn)
+
+    # Resumos materializados: soma apenas o delta
+    from materializacao import atualizar_materializadas
+    atualizar_materializadas(conn)
+    return inseridas
+
+
+def anexar_csvs(diretorio_dados=DIRETORIO_DADOS, db_path=DB_PATH, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Lê os CSVs das tabelas de fatos em blocos e grava apenas as linhas novas
+    """
+    arquivos = {tabela: arquivo for _, tabela, arquivo in TABELAS_CARGA}
+    blocos = {}
+    for tabela in TABELAS_INCREMENTAIS:
+        caminho = os.path.join(diretorio_dados, arquivos[tabela])
+        if os.path.exists(caminho):
+            blocos[tabela] = pd.read_csv(caminho, chunksize=tamanho_chunk, keep_default_na=False,
+                                         na_values=[''], encoding='utf-8')
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        return anexar_blocos(conn, blocos)
+    finally:
+        conn.close()
+
+# ===============================================
+# GERAÇÃO DO INCREMENTO
+# ===============================================
+
+def _datas_na_janela(rng, n, inicio, dias):
+    """
+    Datas uniformes entre inicio e inicio + dias - 1
+    """
+    return inicio + rng.integers(0, dias, size=n).astype('timedelta64[D]')
+
+
+def gerar_incremento(conn, n_vendas, n_test_drives, n_servicos, dias=1, seed=None):
+    """
+    Gera apenas os dados novos do período seguinte à marca d'água: vendas,
+    test drives e serviços com IDs após o último gravado e datas nos `dias`
+    seguintes à última data (em um banco ainda sem fatos, a partir de
+    generate_data.DATA_INICIO). Clientes, veículos e vendedores são lidos do banco.
+    """
+    rng = np.random.default_rng(seed)
+
+    df_clientes = pd.read_sql("SELECT cliente_id, renda_anual FROM clientes", conn)
+    df_veiculos = pd.read_sql("SELECT veiculo_id, preco_base FROM veiculos", conn)
+    df_vendedores = pd.read_sql("SELECT vendedor_id FROM vendedores", conn)
+    if df_clientes.empty or df_veiculos.empty or df_vendedores.empty:
+        raise RuntimeError("Banco sem clientes, veículos ou vendedores: faça antes a carga completa "
+                           "(python carregar_sqlite.py)")
+
+    marcas = {tabela: marca_atual(conn, tabela) for tabela in TABELAS_INCREMENTAIS}
+    datas = [np.datetime64(data[:10], 'D') for _, data in marcas.values() if data]
+    ultima_data = max(datas) if datas else np.datetime64(gd.DATA_INICIO.date(), 'D') - 1
+    inicio = ultima_data + 1
+    print(f"Gerando incremento de {dias} dia(s) a partir de {inicio}...")
+
+    # Vendas: mesma lógica da geração completa, com datas na nova janela
+    df_vendas = gd.gerar_vendas_vetorizado(df_clientes, df_veiculos, df_vendedores, n_vendas,
+                                           rng=rng, id_inicial=marcas['vendas'][0] + 1)
+    df_vendas['data_venda'] = _datas_na_janela(rng, n_vendas, inicio, dias)
+
+    # Test drives: os das vendas novas (até 30 dias antes) e os sem conversão na janela
+    com_venda = gd._test_drives_com_venda(df_vendas, rng)
+    sem_venda = gd._test_drives_sem_venda(df_clientes, df_veiculos, df_vendedores,
+                                          max(0, n_test_drives - len(com_venda)), rng)
+    sem_venda['data_test_drive'] = gd._com_horario(_datas_na_janela(rng, len(sem_venda), inicio, dias), rng)
+    df_test_drives = pd.concat([com_venda, sem_venda], ignore_index=True)
+    primeiro_td = marcas['test_drives'][0] + 1
+    df_test_drives.insert(0, 'test_drive_id', np.arange(primeiro_td, primeiro_td + len(df_test_drives)))
+
+    # Serviços: vendas concluídas de 30 a 700 dias antes da janela (só esse
+    # intervalo de datas é lido, pelo índice de data_venda, não o histórico todo)
+    minimo, maximo = DIAS_ATE_SERVICO
+    df_concluidas = pd.read_sql(
+        "SELECT venda_id, data_venda FROM vendas "
+        "WHERE data_venda BETWEEN ? AND ? AND status_venda = 'Concluída'",
+        conn, params=(str(inicio - maximo), str(inicio + dias - 1 - minimo))
+    )
+    n_servicos = n_servicos if len(df_concluidas) else 0
+    df_servicos = gd.gerar_servicos_pos_venda_vetorizado(
+        df_concluidas.assign(status_venda='Concluída'), n_servicos,
+        rng=rng, id_inicial=marcas['servicos_pos_venda'][0] + 1
+    )
+    df_servicos['data_servico'] = _datas_na_janela(rng, n_servicos, inicio, dias)
+
+    return {'vendas': df_vendas, 'test_drives': df_test_drives, 'servicos_pos_venda': df_servicos}
+
+
+def executar_incremento(db_path=DB_PATH, n_vendas=50, n_test_drives=100, n_servicos=30, dias=1, seed=None):
+    """
+    Execução noturna: gera o incremento e grava somente o delta no banco
+    """
+    print("\n" + "="*60)
+    print(f"ETL INCREMENTAL: {db_path}")
+    print("="*60 + "\n")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        dados = gerar_incremento(conn, n_vendas, n_test_drives, n_servicos, dias=dias, seed=seed)
+        inseridas = anexar_blocos(conn, {tabela: [df] for tabela, df in dados.items()})
+    finally:
+        conn.close()
+    print(f"\n📊 Total: {sum(inseridas.values()):,} linhas novas")
+    return inseridas
+
+# ===============================================
+# LEITURA DO DELTA (CONSUMIDORES)
+# ===============================================
+
+def ler_delta(conn, tabela, processo, query=None):
+    """
+    Lê as linhas da tabela que o processo ainda não consumiu.
+
+    query é opcional e permite aplicar o mesmo filtro a uma consulta com
+    JOINs (ex.: a de features de regressão); ela deve usar os parâmetros
+    :ultimo_id e :ate_id sobre a coluna de ID da tabela. Retorna
+    (DataFrame, nova_marca); depois de processar o delta, chame
+    confirmar_delta para avançar a marca do processo.
+    """
+    coluna_id, _ = TABELAS_INCREMENTAIS[tabela]
+    ultimo_id, _ = ler_marca(conn, tabela, processo)
+    ate_id, ate_data = marca_atual(conn, tabela)
+
+    if query is None:
+        query = f"SELECT * FROM {tabela} WHERE {coluna_id} > :ultimo_id AND {coluna_id} <= :ate_id"
+    df = pd.read_sql(query, conn, params={'ultimo_id': ultimo_id, 'ate_id': ate_id})
+    return df, (ate_id, ate_data)
+
+
+def confirmar_delta(conn, tabela, processo, nova_marca):
+    """
+    Avança a marca do processo após o delta ter sido processado
+    """
+    ultimo_id, ultima_data = nova_marca
+    gravar_marca(conn, tabela, ultimo_id, ultima_data, processo=processo)
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Grava no banco apenas os dados novos (após a marca d'água)")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db de destino")
+    parser.add_argument("--csv", metavar="DIRETORIO",
+                        help="anexa as linhas novas dos CSVs deste diretório em vez de gerar o incremento")
+    parser.add_argument("--vendas", type=int, default=50, help="vendas novas por execução")
+    parser.add_argument("--test-drives", type=int, default=100, help="test drives novos por execução")
+    parser.add_argument("--servicos", type=int, default=30, help="serviços novos por execução")
+    parser.add_argument("--dias", type=int, default=1, help="dias cobertos pelo incremento")
+    parser.add_argument("--seed", type=int, default=None, help="semente do incremento")
+    args = parser.parse_args()
+
+    if args.csv:
+        anexar_csvs(diretorio_dados=args.csv, db_path=args.banco)
+    else:
+        executar_incremento(
+            db_path=args.banco,
+            n_vendas=args.vendas,
+            n_test_drives=args.test_drives,
+            n_servicos=args.servicos,
+            dias=args.dias,
+            seed=args.seed
+        )
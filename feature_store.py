@@ -0,0 +1,494 @@
+"""
+Feature Store (Cache de Features para ML)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Calcula uma única vez os conjuntos de features usados pelos notebooks de ML
+e pela página de previsões do Streamlit, e guarda o resultado em disco:
+- 'regressao': vendas concluídas (alvo valor_venda)
+- 'classificacao': test drives (alvo resultou_venda)
+- 'perfil_clientes': perfil agregado por cliente (clustering)
+
+O cache é versionado (VERSAO_FEATURES) e indexado pela impressão digital dos
+dados: versão do banco (cache_consultas.versao_banco, muda a cada COMMIT) e
+nº de linhas e maior ID de cada tabela usada. Quando o banco mudou e a
+tabela de origem (vendas/test_drives) só ganhou linhas novas, os conjuntos
+por linha são atualizados de forma incremental: apenas o delta após a marca
+d'água passa pelas consultas e pela engenharia de features (mesma ideia de
+etl_incremental.py). Qualquer outra mudança recalcula o conjunto inteiro.
+
+Observação: uma alteração em linhas antigas feita junto com a chegada de
+linhas novas não é distinguida de um delta puro (como em materializacao.py);
+nesse caso use carregar_features(..., forcar=True).
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from datetime import date
+
+import joblib
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from acesso_dados import conexao
+from cache_consultas import versao_banco
+from dimensao_datas import garantir_datas, verificar_datas
+from esquema_dados import aplicar_esquema
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(DIRETORIO_BASE, 'vendas_carros_esportivos.db')
+DIRETORIO_CACHE = os.path.join(DIRETORIO_BASE, 'Dados', 'cache', 'features')
+
+# Mudanças nas consultas ou na engenharia de features devem incrementar a versão
+VERSAO_FEATURES = 3
+
+# Ano de referência para a idade do veículo (o mesmo usado no treino dos modelos)
+ANO_REFERENCIA = 2024
+
+COLUNAS_ID = {
+    'clientes': 'cliente_id',
+    'vendedores': 'vendedor_id',
+    'veiculos': 'veiculo_id',
+    'vendas': 'venda_id',
+    'test_drives': 'test_drive_id',
+    'servicos_pos_venda': 'servico_id'
+}
+
+# ===============================================
+# CONSULTAS
+# ===============================================
+#
+# Idade, dia da semana e hora são colunas gravadas na carga (dimensao_datas.py),
+# sem julianday()/strftime() por linha.
+# As consultas por linha recebem o intervalo de IDs (:ultimo_id, :ate_id] da
+# tabela de origem; a carga completa usa ultimo_id = 0.
+
+QUERY_REGRESSAO = """
+SELECT
+    v.venda_id,
+    v.valor_venda,
+    v.idade_cliente,
+    c.genero,
+    c.renda_anual,
+    ve.potencia_cv,
+    ve.cilindradas,
+    ve.ano_fabricacao,
+    ve.categoria,
+    ve.marca,
+    ve.preco_base,
+    v.forma_pagamento,
+    v.numero_parcelas,
+    v.desconto_percentual,
+    vd.comissao_percentual
+FROM vendas v
+JOIN clientes c ON v.cliente_id = c.cliente_id
+JOIN veiculos ve ON v.veiculo_id = ve.veiculo_id
+JOIN vendedores vd ON v.vendedor_id = vd.vendedor_id
+WHERE v.status_venda = 'Concluída'
+  AND v.venda_id > :ultimo_id AND v.venda_id <= :ate_id
+ORDER BY v.venda_id
+"""
+
+def consulta_classificacao(somente_abertos=False):
+    """
+    SQL das features de classificação. Com somente_abertos, traz apenas os
+    test drives que ainda não viraram venda (resultou_venda = 0), filtrados
+    no próprio SQLite (pontuação em lote).
+    """
+    filtro = "\n  AND td.resultou_venda = 0" if somente_abertos else ""
+    return f"""
+SELECT
+    td.test_drive_id,
+    td.resultou_venda,
+    td.idade_cliente,
+    c.genero,
+    c.renda_anual,
+    ve.potencia_cv,
+    ve.cilindradas,
+    ve.ano_fabricacao,
+    ve.categoria,
+    ve.marca,
+    ve.preco_base,
+    td.avaliacao,
+    td.dia_semana,
+    td.hora
+FROM test_drives td
+JOIN clientes c ON td.cliente_id = c.cliente_id
+JOIN veiculos ve ON td.veiculo_id = ve.veiculo_id
+WHERE td.test_drive_id > :ultimo_id AND td.test_drive_id <= :ate_id{filtro}
+ORDER BY td.test_drive_id
+"""
+
+
+QUERY_CLASSIFICACAO = consulta_classificacao()
+
+# Perfil por cliente: cada tabela filha é agregada por cliente_id antes do
+# JOIN. Juntar vendas, test drives e serviços direto em clientes gera o
+# produto cartesiano por cliente (vendas x test drives x serviços), que
+# infla SUM/AVG e cresce com o histórico.
+def consulta_perfil_clientes(tabela_clientes=None):
+    """
+    SQL do perfil de clientes. Com tabela_clientes (tabela com a coluna
+    cliente_id), calcula só esses clientes: cada tabela é lida a partir
+    dela pelos índices por cliente (atualização incremental da segmentação).
+    """
+    def origem(tabela, coluna):
+        if tabela_clientes is None:
+            return tabela
+        # CROSS JOIN fixa a ordem: percorre os clientes pedidos e busca pelo índice
+        return f"{tabela_clientes} f CROSS JOIN {tabela} ON {coluna} = f.cliente_id"
+
+    return f"""
+WITH compras AS (
+    SELECT
+        v.cliente_id,
+        COUNT(*) as total_compras,
+        SUM(v.valor_venda) as valor_total_gasto,
+        AVG(v.valor_venda) as ticket_medio,
+        MAX(v.data_venda) as ultima_compra
+    FROM {origem('vendas v', 'v.cliente_id')}
+    WHERE v.status_venda = 'Concluída'
+    GROUP BY v.cliente_id
+),
+test_drives_cliente AS (
+    SELECT
+        td.cliente_id,
+        COUNT(*) as total_test_drives,
+        AVG(td.avaliacao) as avaliacao_media
+    FROM {origem('test_drives td', 'td.cliente_id')}
+    GROUP BY td.cliente_id
+),
+servicos_cliente AS (
+    SELECT
+        v.cliente_id,
+        COUNT(*) as total_servicos
+    FROM {origem('vendas v', 'v.cliente_id')}
+    JOIN servicos_pos_venda s ON s.venda_id = v.venda_id
+    WHERE v.status_venda = 'Concluída'
+    GROUP BY v.cliente_id
+)
+SELECT
+    c.cliente_id,
+    c.nome,
+    c.genero,
+    CAST((julianday('now') - 2440587.5 - c.dia_nascimento) / 365.25 AS INTEGER) as idade,
+    c.renda_anual,
+    c.profissao,
+    c.estado,
+    COALESCE(cp.total_compras, 0) as total_compras,
+    COALESCE(cp.valor_total_gasto, 0) as valor_total_gasto,
+    COALESCE(cp.ticket_medio, 0) as ticket_medio,
+    COALESCE(cp.ultima_compra, c.data_cadastro) as ultima_compra,
+    COALESCE(td.total_test_drives, 0) as total_test_drives,
+    COALESCE(td.avaliacao_media, 0) as avaliacao_media_test_drive,
+    COALESCE(sc.total_servicos, 0) as total_servicos
+FROM {origem('clientes c', 'c.cliente_id')}
+LEFT JOIN compras cp ON cp.cliente_id = c.cliente_id
+LEFT JOIN test_drives_cliente td ON td.cliente_id = c.cliente_id
+LEFT JOIN servicos_cliente sc ON sc.cliente_id = c.cliente_id
+ORDER BY c.cliente_id
+"""
+
+
+QUERY_PERFIL_CLIENTES = consulta_perfil_clientes()
+
+# ===============================================
+# ENGENHARIA DE FEATURES
+# ===============================================
+
+FEATURES_REGRESSAO = ['idade_cliente', 'genero_encoded', 'renda_anual', 'potencia_cv',
+                      'cilindradas', 'idade_veiculo', 'categoria_encoded', 'marca_encoded',
+                      'preco_base', 'pagamento_encoded', 'numero_parcelas',
+                      'desconto_percentual', 'poder_compra', 'ratio_preco_renda']
+
+FEATURES_CLASSIFICACAO = ['idade_cliente', 'genero_encoded', 'renda_anual', 'potencia_cv',
+                          'cilindradas', 'idade_veiculo', 'categoria_encoded', 'marca_encoded',
+                          'preco_base', 'avaliacao', 'dia_semana', 'hora', 'poder_compra',
+                          'ratio_preco_renda', 'final_semana', 'horario_comercial']
+
+FEATURES_PERFIL_CLIENTES = ['idade', 'renda_anual', 'total_compras', 'valor_total_gasto',
+                            'ticket_medio', 'total_test_drives', 'avaliacao_media_test_drive']
+
+
+def _codificar(df, colunas, encoders=None):
+    """
+    LabelEncoder por coluna categórica: {coluna: (nome da coluna codificada)}.
+    Sem encoders, ajusta novos; com encoders, só transforma (valores nunca
+    vistos geram ValueError, o que força a reconstrução completa).
+    """
+    novos = {}
+    for coluna, destino in colunas.items():
+        encoder = encoders[coluna] if encoders else LabelEncoder()
+        valores = df[coluna].astype(str)
+        df[destino] = encoder.transform(valores) if encoders else encoder.fit_transform(valores)
+        novos[coluna] = encoder
+    return novos
+
+
+def _features_comuns(df):
+    df['idade_veiculo'] = ANO_REFERENCIA - df['ano_fabricacao']
+    df['poder_compra'] = df['renda_anual'] / 1000000  # Milhões
+    df['ratio_preco_renda'] = df['preco_base'] / df['renda_anual']
+
+
+def preparar_regressao(df, encoders=None):
+    _features_comuns(df)
+    return _codificar(df, {
+        'genero': 'genero_encoded',
+        'categoria': 'categoria_encoded',
+        'marca': 'marca_encoded',
+        'forma_pagamento': 'pagamento_encoded'
+    }, encoders)
+
+
+def preparar_classificacao(df, encoders=None):
+    _features_comuns(df)
+    df['final_semana'] = (df['dia_semana'] >= 5).astype(int)
+    df['horario_comercial'] = ((df['hora'] >= 9) & (df['hora'] <= 18)).astype(int)
+    return _codificar(df, {
+        'genero': 'genero_encoded',
+        'categoria': 'categoria_encoded',
+        'marca': 'marca_encoded'
+    }, encoders)
+
+
+def preparar_perfil_clientes(df, encoders=None):
+    # Só agregações numéricas: o notebook de clustering escala as features
+    return {}
+
+
+# Definição de cada conjunto: consulta, tabela de origem (delta por ID),
+# tabelas que entram na impressão digital e a função de preparação
+CONJUNTOS = {
+    'regressao': {
+        'query': QUERY_REGRESSAO,
+        'tabela_origem': 'vendas',
+        'tabelas': ['vendas', 'clientes', 'veiculos', 'vendedores'],
+        'preparar': preparar_regressao,
+        'features': FEATURES_REGRESSAO,
+        'alvo': 'valor_venda'
+    },
+    'classificacao': {
+        'query': QUERY_CLASSIFICACAO,
+        'tabela_origem': 'test_drives',
+        'tabelas': ['test_drives', 'clientes', 'veiculos'],
+        'preparar': preparar_classificacao,
+        'features': FEATURES_CLASSIFICACAO,
+        'alvo': 'resultou_venda'
+    },
+    'perfil_clientes': {
+        'query': QUERY_PERFIL_CLIENTES,
+        'tabela_origem': None,  # agregado: sempre recalculado por completo
+        'tabelas': ['clientes', 'vendas', 'test_drives', 'servicos_pos_venda'],
+        'preparar': preparar_perfil_clientes,
+        'features': FEATURES_PERFIL_CLIENTES,
+        'alvo': None
+    }
+}
+
+# ===============================================
+# IMPRESSÃO DIGITAL DOS DADOS
+# ===============================================
+
+def estatisticas_tabelas(conn, tabelas):
+    """
+    (nº de linhas, maior ID) de cada tabela
+    """
+    return {
+        tabela: list(conn.execute(
+            f"SELECT COUNT(*), COALESCE(MAX({COLUNAS_ID[tabela]}), 0) FROM {tabela}"
+        ).fetchone())
+        for tabela in tabelas
+    }
+
+
+def impressao_digital(conjunto, estatisticas, versao_dados):
+    """
+    Hash da versão, da consulta, da versão do banco e das estatísticas das
+    tabelas. O perfil de clientes usa a data de hoje (idade relativa a
+    julianday('now')).
+    """
+    definicao = CONJUNTOS[conjunto]
+    conteudo = {
+        'versao': VERSAO_FEATURES,
+        'conjunto': conjunto,
+        'query': definicao['query'],
+        'versao_dados': versao_dados,
+        'estatisticas': estatisticas,
+        'data': str(date.today()) if definicao['tabela_origem'] is None else None
+    }
+    return hashlib.sha1(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+# ===============================================
+# CACHE EM DISCO
+# ===============================================
+
+def _hash_banco(db_path):
+    """
+    Identifica o banco no nome dos arquivos de cache (sem abrir os arquivos)
+    """
+    return hashlib.sha1(db_path.encode('utf-8')).hexdigest()[:8]
+
+
+def _caminho_cache(conjunto, db_path, impressao, diretorio_cache):
+    return os.path.join(diretorio_cache,
+                        f"{conjunto}_v{VERSAO_FEATURES}_{_hash_banco(db_path)}_{impressao}.joblib")
+
+
+def _cache_anterior(conjunto, db_path, diretorio_cache):
+    """
+    Cache mais recente do mesmo conjunto/versão/banco (base para o delta)
+    """
+    padrao = f"{conjunto}_v{VERSAO_FEATURES}_{_hash_banco(db_path)}_*.joblib"
+    arquivos = glob.glob(os.path.join(diretorio_cache, padrao))
+    if not arquivos:
+        return None
+    return joblib.load(max(arquivos, key=os.path.getmtime))
+
+
+def _gravar_cache(conteudo, diretorio_cache):
+    os.makedirs(diretorio_cache, exist_ok=True)
+    destino = _caminho_cache(conteudo['conjunto'], conteudo['db_path'], conteudo['impressao'], diretorio_cache)
+    # Grava em arquivo temporário e renomeia, para não deixar cache corrompido
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    joblib.dump(conteudo, temporario)
+    os.replace(temporario, destino)
+
+    # Remove versões anteriores do mesmo conjunto para o mesmo banco
+    padrao = f"{conteudo['conjunto']}_v*_{_hash_banco(conteudo['db_path'])}_*.joblib"
+    for arquivo in glob.glob(os.path.join(diretorio_cache, padrao)):
+        if arquivo != destino:
+            os.remove(arquivo)
+
+# ===============================================
+# CÁLCULO DAS FEATURES
+# ===============================================
+
+def _consultar(conn, conjunto, ultimo_id, ate_id):
+    query = CONJUNTOS[conjunto]['query']
+    return aplicar_esquema(pd.read_sql(query, conn, params={'ultimo_id': ultimo_id, 'ate_id': ate_id}))
+
+
+def _calcular_completo(conn, conjunto, ate_id):
+    df = _consultar(conn, conjunto, 0, ate_id)
+    encoders = CONJUNTOS[conjunto]['preparar'](df)
+    return df, encoders
+
+
+def _calcular_delta(conn, conjunto, anterior, ate_id):
+    """
+    Calcula só as linhas novas com os encoders já ajustados e anexa ao cache
+    anterior. Retorna None se o delta não puder ser aplicado.
+    """
+    if anterior is None or anterior['ate_id'] > ate_id:
+        return None
+    origem = CONJUNTOS[conjunto]['tabela_origem']
+    tabelas_dimensao = [t for t in CONJUNTOS[conjunto]['tabelas'] if t != origem]
+    # Dimensões alteradas mudam linhas antigas: recalcula tudo
+    if any(anterior['estatisticas'].get(t) != anterior['estatisticas_atuais'].get(t) for t in tabelas_dimensao):
+        return None
+    # A origem tem que ter só ganhado linhas, todas acima da marca d'água
+    # (mesmo nº de linhas = UPDATE/DELETE em linhas antigas: recalcula tudo)
+    linhas_antes, linhas_agora = anterior['estatisticas'][origem][0], anterior['estatisticas_atuais'][origem][0]
+    novas = conn.execute(
+        f"SELECT COUNT(*) FROM {origem} WHERE {COLUNAS_ID[origem]} > ? AND {COLUNAS_ID[origem]} <= ?",
+        (anterior['ate_id'], ate_id)
+    ).fetchone()[0]
+    if novas == 0 or linhas_agora - linhas_antes != novas:
+        return None
+
+    delta = _consultar(conn, conjunto, anterior['ate_id'], ate_id)
+    try:
+        CONJUNTOS[conjunto]['preparar'](delta, anterior['encoders'])
+    except ValueError:
+        return None  # categoria nova: os encoders precisam ser reajustados
+    df = pd.concat([anterior['dados'], delta], ignore_index=True)
+    return aplicar_esquema(df), anterior['encoders']
+
+
+def carregar_features(conjunto, db_path=DB_PATH, forcar=False, diretorio_cache=DIRETORIO_CACHE,
+                      preparar_banco=False):
+    """
+    Retorna o conjunto de features pedido, do cache sempre que possível:
+        {'dados': DataFrame, 'features': [...], 'alvo': str, 'encoders': {...},
+         'impressao': str, 'origem': 'cache' | 'incremental' | 'completo'}
+    Só lê o banco; preparar_banco=True migra antes um banco sem as colunas
+    de datas (dimensao_datas.garantir_datas).
+    """
+    inicio = time.perf_counter()
+    definicao = CONJUNTOS[conjunto]
+    db_path = os.path.abspath(db_path)
+
+    # Idade, dia da semana e hora vêm das colunas derivadas gravadas pelo ETL.
+    # Com preparar_banco=True, um banco antigo é migrado antes (exige gravar)
+    if preparar_banco:
+        garantir_datas(db_path)
+
+    # Leitura por uma conexão do pool somente leitura (acesso_dados.py)
+    with conexao(db_path) as conn:
+        verificar_datas(conn)
+        estatisticas = estatisticas_tabelas(conn, definicao['tabelas'])
+        impressao = impressao_digital(conjunto, estatisticas, versao_banco(db_path))
+        caminho = _caminho_cache(conjunto, db_path, impressao, diretorio_cache)
+
+        if not forcar and os.path.exists(caminho):
+            conteudo = joblib.load(caminho)
+            origem = 'cache'
+        else:
+            tabela_origem = definicao['tabela_origem']
+            ate_id = estatisticas[tabela_origem][1] if tabela_origem else 0
+            resultado = None
+            origem = 'completo'
+            if not forcar and tabela_origem:
+                anterior = _cache_anterior(conjunto, db_path, diretorio_cache)
+                if anterior is not None:
+                    anterior['estatisticas_atuais'] = estatisticas
+                    resultado = _calcular_delta(conn, conjunto, anterior, ate_id)
+                    origem = 'incremental'
+            if resultado is None:
+                resultado = _calcular_completo(conn, conjunto, ate_id)
+                origem = 'completo'
+
+            df, encoders = resultado
+            conteudo = {
+                'conjunto': conjunto,
+                'versao': VERSAO_FEATURES,
+                'impressao': impressao,
+                'estatisticas': estatisticas,
+                'db_path': db_path,
+                'ate_id': ate_id,
+                'dados': df,
+                'encoders': encoders,
+                'features': definicao['features'],
+                'alvo': definicao['alvo']
+            }
+            _gravar_cache(conteudo, diretorio_cache)
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ Features '{conjunto}' ({origem}): {len(conteudo['dados']):,} linhas em {segundos*1000:.0f} ms")
+    return {**conteudo, 'origem': origem}
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calcula (ou atualiza) o cache de features de ML")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db")
+    parser.add_argument("--conjunto", choices=list(CONJUNTOS), action="append",
+                        help="conjunto a calcular (padrão: todos)")
+    parser.add_argument("--forcar", action="store_true", help="ignora o cache e recalcula tudo")
+    parser.add_argument("--preparar-banco", action="store_true",
+                        help="migra antes um banco sem as colunas de datas")
+    args = parser.parse_args()
+
+    for nome in args.conjunto or CONJUNTOS:
+        carregar_features(nome, db_path=args.banco, forcar=args.forcar, preparar_banco=args.preparar_banco)
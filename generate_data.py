@@ -6,17 +6,22 @@ Este script gera dados realistas para popular o banco de dados.
 Inclui correlações lógicas entre variáveis para simular comportamento real.
 """
 
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from faker import Faker
 import random
 
+from pool_identidades import carregar_pool_identidades, compor_identidades
+
 # Configurar seed para reprodutibilidade
-np.random.seed(42)
-random.seed(42)
-fake = Faker('pt_BR')
-Faker.seed(42)
+# (nomes, e-mails e telefones vêm do pool de identidades, ver pool_identidades.py)
+SEED = 42
+np.random.seed(SEED)
+random.seed(SEED)
 
 # ===============================================
 # CONFIGURAÇÕES GLOBAIS
@@ -32,6 +37,109 @@ N_SERVICOS = 800
 DATA_INICIO = datetime(2023, 1, 1)
 DATA_FIM = datetime(2024, 12, 31)
 
+# Saída dos arquivos CSV (pasta Dados/ do projeto por padrão)
+DIRETORIO_SAIDA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dados')
+
+ARQUIVOS_SAIDA = {
+    'clientes': 'clientes.csv',
+    'vendedores': 'vendedores.csv',
+    'veiculos': 'veiculos.csv',
+    'vendas': 'vendas.csv',
+    'test_drives': 'test_drives.csv',
+    'servicos': 'servicos_pos_venda.csv'
+}
+
+# Linhas por bloco na geração em streaming
+TAMANHO_CHUNK = 500_000
+
+# Linhas por shard na geração paralela (fixo: não depende do nº de workers)
+TAMANHO_SHARD = 250_000
+
+# ===============================================
+# CONSTANTES DE DOMÍNIO
+# (compartilhadas entre a geração linha a linha e a vetorizada)
+# ===============================================
+
+# Profissões típicas de compradores de carros esportivos
+PROFISSOES_ALTO_PODER = [
+    'Empresário', 'Médico', 'Advogado', 'Engenheiro', 'Arquiteto',
+    'Consultor', 'Executivo', 'Investidor', 'Dentista', 'Piloto',
+    'Diretor de Empresa', 'Contador', 'Professor Universitário',
+    'Desenvolvedor de Software', 'Gestor de TI', 'Cirurgião',
+    'Juiz', 'Promotor', 'Delegado', 'Produtor', 'Agente Esportivo'
+]
+
+CIDADES_ESTADOS = [
+    ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Brasília', 'DF'),
+    ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'), ('Porto Alegre', 'RS'),
+    ('Salvador', 'BA'), ('Fortaleza', 'CE'), ('Recife', 'PE'),
+    ('Goiânia', 'GO'), ('Campinas', 'SP'), ('São José dos Campos', 'SP'),
+    ('Florianópolis', 'SC'), ('Manaus', 'AM'), ('Vitória', 'ES')
+]
+
+GENEROS = ['Masculino', 'Feminino', 'Outro', 'Prefiro não informar']
+PESOS_GENEROS = [0.65, 0.30, 0.03, 0.02]  # Mais homens compram carros esportivos (estatística)
+
+FORMAS_PAGAMENTO = ['À vista', 'Financiamento', 'Consórcio', 'Leasing']
+PESOS_PAGAMENTO = [0.25, 0.50, 0.15, 0.10]
+
+# Opções de parcelamento por forma de pagamento
+PARCELAS_FINANCIAMENTO = [12, 24, 36, 48, 60]
+PARCELAS_CONSORCIO = [60, 72, 84]
+PARCELAS_LEASING = [24, 36, 48]
+
+STATUS_VENDA = ['Concluída', 'Cancelada']
+PESOS_STATUS = [0.95, 0.05]
+
+# Sazonalidade: mais vendas em dezembro (fim de ano) e junho (meio do ano)
+PROB_MES_VENDA = [0.06, 0.06, 0.07, 0.07, 0.08, 0.12, 0.08, 0.07, 0.07, 0.08, 0.09, 0.15]
+
+COMENTARIOS_POSITIVOS = [
+    'Excelente desempenho e conforto!',
+    'Carro incrível, superou expectativas.',
+    'Potência impressionante, adorei dirigir.',
+    'Muito confortável e tecnológico.',
+    'Design fantástico e performance excelente.',
+    'Melhor test drive que já fiz!',
+    'Estou impressionado com a qualidade.'
+]
+
+COMENTARIOS_NEUTROS_NEGATIVOS = [
+    'Bom carro, mas vou pensar mais um pouco.',
+    'Gostei, mas está acima do meu orçamento.',
+    'Ótimo carro, vou avaliar outras opções.',
+    'Performance boa, mas esperava mais.',
+    'Confortável, mas prefiro outro modelo.',
+    'Interessante, mas não é exatamente o que procuro.',
+    'Bom test drive, vou comparar com concorrentes.'
+]
+
+AVALIACOES = [1, 2, 3, 4, 5]
+PESOS_AVALIACAO_SEM_VENDA = [0.05, 0.10, 0.25, 0.35, 0.25]
+PESOS_SATISFACAO_SERVICO = [0.02, 0.05, 0.13, 0.35, 0.45]
+
+TIPOS_SERVICO = ['Revisão', 'Manutenção', 'Reparo', 'Personalização', 'Garantia', 'Detalhamento']
+
+# Valores típicos por tipo de serviço
+VALORES_SERVICO = {
+    'Revisão': (2000, 8000),
+    'Manutenção': (3000, 15000),
+    'Reparo': (5000, 50000),
+    'Personalização': (10000, 100000),
+    'Garantia': (0, 5000),
+    'Detalhamento': (1500, 5000)
+}
+
+OBSERVACOES_SERVICO = [
+    'Serviço realizado conforme esperado.',
+    'Cliente satisfeito com o atendimento.',
+    'Tudo certo, sem problemas.',
+    'Serviço de excelência.',
+    'Cliente elogiou a agilidade.',
+    'Atendimento impecável.',
+    'Serviço dentro do prazo.'
+]
+
 # ===============================================
 # FUNÇÃO: GERAR CLIENTES
 # ===============================================
@@ -43,25 +151,8 @@ def gerar_clientes(n=N_CLIENTES):
     """
     print(f"Gerando {n} clientes...")
     
-    # Profissões típicas de compradores de carros esportivos
-    profissoes_alto_poder = [
-        'Empresário', 'Médico', 'Advogado', 'Engenheiro', 'Arquiteto',
-        'Consultor', 'Executivo', 'Investidor', 'Dentista', 'Piloto',
-        'Diretor de Empresa', 'Contador', 'Professor Universitário',
-        'Desenvolvedor de Software', 'Gestor de TI', 'Cirurgião',
-        'Juiz', 'Promotor', 'Delegado', 'Produtor', 'Agente Esportivo'
-    ]
-    
-    cidades_estados = [
-        ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Brasília', 'DF'),
-        ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'), ('Porto Alegre', 'RS'),
-        ('Salvador', 'BA'), ('Fortaleza', 'CE'), ('Recife', 'PE'),
-        ('Goiânia', 'GO'), ('Campinas', 'SP'), ('São José dos Campos', 'SP'),
-        ('Florianópolis', 'SC'), ('Manaus', 'AM'), ('Vitória', 'ES')
-    ]
-    
-    generos = ['Masculino', 'Feminino', 'Outro', 'Prefiro não informar']
-    pesos_generos = [0.65, 0.30, 0.03, 0.02]  # Mais homens compram carros esportivos (estatística)
+    # Identidades compostas a partir do pool (e-mails únicos por cliente_id)
+    identidades = compor_identidades(np.arange(1, n + 1), np.random)
     
     clientes = []
     
@@ -85,20 +176,20 @@ def gerar_clientes(n=N_CLIENTES):
         dias_cadastro = random.randint(0, 1095)
         data_cadastro = DATA_FIM - timedelta(days=dias_cadastro)
         
-        cidade, estado = random.choice(cidades_estados)
-        genero = np.random.choice(generos, p=pesos_generos)
+        cidade, estado = random.choice(CIDADES_ESTADOS)
+        genero = np.random.choice(GENEROS, p=PESOS_GENEROS)
         
         cliente = {
             'cliente_id': i + 1,
-            'nome': fake.name(),
-            'email': fake.email(),
-            'telefone': fake.phone_number(),
+            'nome': identidades['nome'].iat[i],
+            'email': identidades['email'].iat[i],
+            'telefone': identidades['telefone'].iat[i],
             'data_nascimento': data_nascimento.date(),
             'genero': genero,
             'cidade': cidade,
             'estado': estado,
             'renda_anual': renda_anual,
-            'profissao': random.choice(profissoes_alto_poder),
+            'profissao': random.choice(PROFISSOES_ALTO_PODER),
             'data_cadastro': data_cadastro
         }
         clientes.append(cliente)
@@ -111,31 +202,35 @@ def gerar_clientes(n=N_CLIENTES):
 # FUNÇÃO: GERAR VENDEDORES
 # ===============================================
 
-def gerar_vendedores(n=N_VENDEDORES):
+def gerar_vendedores(n=N_VENDEDORES, rng=np.random, aleatorio=random):
     """
     Gera dados de vendedores
+
+    rng (numpy) e aleatorio (random) são por padrão os geradores globais.
     """
     print(f"Gerando {n} vendedores...")
     
     regioes = ['Sul', 'Sudeste', 'Centro-Oeste', 'Norte', 'Nordeste']
     
+    identidades = compor_identidades(np.arange(1, n + 1), rng)
+    
     vendedores = []
     
     for i in range(n):
         # Data de contratação nos últimos 5 anos
-        dias_contratacao = random.randint(0, 1825)
+        dias_contratacao = aleatorio.randint(0, 1825)
         data_contratacao = DATA_FIM - timedelta(days=dias_contratacao)
         
         # Comissão varia entre 2% e 5%
-        comissao = round(np.random.uniform(2.0, 5.0), 2)
+        comissao = round(rng.uniform(2.0, 5.0), 2)
         
         vendedor = {
             'vendedor_id': i + 1,
-            'nome': fake.name(),
-            'email': fake.email(),
+            'nome': identidades['nome'].iat[i],
+            'email': identidades['email'].iat[i],
             'data_contratacao': data_contratacao.date(),
             'comissao_percentual': comissao,
-            'regiao_atuacao': random.choice(regioes),
+            'regiao_atuacao': aleatorio.choice(regioes),
             'ativo': True
         }
         vendedores.append(vendedor)
@@ -148,9 +243,11 @@ def gerar_vendedores(n=N_VENDEDORES):
 # FUNÇÃO: GERAR VEÍCULOS
 # ===============================================
 
-def gerar_veiculos(n=N_VEICULOS):
+def gerar_veiculos(n=N_VEICULOS, rng=np.random, aleatorio=random):
     """
     Gera catálogo de veículos esportivos com características realistas
+
+    rng (numpy) e aleatorio (random) são por padrão os geradores globais.
     """
     print(f"Gerando {n} veículos...")
     
@@ -237,12 +334,12 @@ def gerar_veiculos(n=N_VEICULOS):
             anos_disponiveis = [2022, 2023, 2024, 2025]
             
             for _ in range(max(1, n // (len(carros_esportivos) * 3))):  # Distribuir os 50 veículos
-                ano = random.choice(anos_disponiveis)
-                cor = random.choice(cores_disponiveis)
+                ano = aleatorio.choice(anos_disponiveis)
+                cor = aleatorio.choice(cores_disponiveis)
                 
                 # Ajustar preço baseado no ano
                 ajuste_ano = 1.0 + (ano - 2022) * 0.05
-                preco_final = round(preco_base * ajuste_ano * np.random.uniform(0.95, 1.05), 2)
+                preco_final = round(preco_base * ajuste_ano * rng.uniform(0.95, 1.05), 2)
                 
                 # Tipo de motor
                 if cilindradas == 0.0:
@@ -258,21 +355,21 @@ def gerar_veiculos(n=N_VEICULOS):
                 if marca in ['Ferrari', 'Lamborghini', 'McLaren']:
                     transmissao = 'Automatizada'
                 else:
-                    transmissao = random.choice(transmissoes)
+                    transmissao = aleatorio.choice(transmissoes)
                 
                 # Tração
                 if marca in ['Ferrari', 'Lamborghini', 'Audi']:
-                    tracao = 'AWD' if np.random.random() > 0.3 else 'Traseira'
+                    tracao = 'AWD' if rng.random() > 0.3 else 'Traseira'
                 elif marca in ['Porsche', 'Mercedes-AMG', 'BMW']:
-                    tracao = random.choice(['Traseira', 'AWD'])
+                    tracao = aleatorio.choice(['Traseira', 'AWD'])
                 else:
                     tracao = 'Traseira'
                 
                 # Estoque (alguns modelos mais raros)
                 if preco_final > 1000000:
-                    estoque = random.randint(0, 2)
+                    estoque = aleatorio.randint(0, 2)
                 else:
-                    estoque = random.randint(1, 5)
+                    estoque = aleatorio.randint(1, 5)
                 
                 veiculo = {
                     'veiculo_id': veiculo_id,
@@ -305,6 +402,76 @@ def gerar_veiculos(n=N_VEICULOS):
     print(f"✓ {len(df_veiculos)} veículos gerados")
     return df_veiculos
 
+# ===============================================
+# AMOSTRAGEM PONDERADA PRÉ-CALCULADA
+# ===============================================
+#
+# Em vez de chamar DataFrame.sample a cada venda (o que renormaliza os pesos
+# e aloca objetos novos a cada linha), as tabelas abaixo são montadas uma
+# única vez e permitem sortear todas as vendas em lote:
+# - clientes: tabela de pesos acumulados + busca binária (searchsorted)
+# - veículos: pools de índices pré-filtrados para as três faixas de renda
+
+def construir_tabela_acumulada(pesos):
+    """
+    Monta a tabela de pesos acumulados usada por amostrar_tabela
+    """
+    pesos = np.asarray(pesos, dtype=float)
+    if len(pesos) == 0 or pesos.sum() <= 0:
+        raise ValueError("Os pesos devem ter ao menos um valor positivo")
+    return np.cumsum(pesos)
+
+
+def amostrar_tabela(tabela, n, rng):
+    """
+    Sorteia n índices (com reposição) proporcionais aos pesos da tabela.
+    Aceita tanto um numpy.random.Generator quanto o módulo np.random.
+    """
+    sorteios = rng.random(n) * tabela[-1]
+    return np.minimum(np.searchsorted(tabela, sorteios, side='right'), len(tabela) - 1)
+
+
+def faixa_renda_cliente(renda):
+    """
+    Classifica a renda nas faixas usadas na escolha do veículo:
+    0 = acima de 800k, 1 = entre 500k e 800k, 2 = até 500k
+    """
+    renda = np.asarray(renda)
+    return np.select([renda > 800000, renda > 500000], [0, 1], default=2)
+
+
+def construir_pools_veiculos(df_veiculos):
+    """
+    Pré-calcula os índices de veículos disponíveis para cada faixa de renda
+    Clientes com renda > 800k têm mais chance de comprar carros > 1M
+    """
+    precos = df_veiculos['preco_base'].to_numpy(dtype=float)
+    mascaras = [
+        precos > 600000,
+        (precos > 400000) & (precos < 1200000),
+        precos < 800000
+    ]
+    pools = []
+    for mascara in mascaras:
+        pool = np.flatnonzero(mascara)
+        if len(pool) == 0:
+            pool = np.arange(len(precos))
+        pools.append(pool)
+    return pools
+
+
+def amostrar_veiculos(pools, faixas, rng):
+    """
+    Sorteia, em lote, um índice de veículo do pool da faixa de cada venda
+    """
+    faixas = np.asarray(faixas)
+    indices = np.empty(len(faixas), dtype=np.int64)
+    for faixa, pool in enumerate(pools):
+        selecionadas = faixas == faixa
+        sorteios = (rng.random(selecionadas.sum()) * len(pool)).astype(np.int64)
+        indices[selecionadas] = pool[sorteios]
+    return indices
+
 # ===============================================
 # FUNÇÃO: GERAR VENDAS
 # ===============================================
@@ -318,19 +485,28 @@ def gerar_vendas(df_clientes, df_veiculos, df_vendedores, n=N_VENDAS):
     """
     print(f"Gerando {n} vendas...")
     
-    formas_pagamento = ['À vista', 'Financiamento', 'Consórcio', 'Leasing']
-    pesos_pagamento = [0.25, 0.50, 0.15, 0.10]
+    # Sortear clientes, veículos e vendedores de uma vez, a partir das
+    # tabelas pré-calculadas (clientes com maior renda compram mais)
+    ids_clientes = df_clientes['cliente_id'].to_numpy()
+    renda_clientes = df_clientes['renda_anual'].to_numpy(dtype=float)
+    idx_clientes = amostrar_tabela(construir_tabela_acumulada(renda_clientes), n, np.random)
+    
+    idx_veiculos = amostrar_veiculos(
+        construir_pools_veiculos(df_veiculos),
+        faixa_renda_cliente(renda_clientes[idx_clientes]),
+        np.random
+    )
+    ids_veiculos = df_veiculos['veiculo_id'].to_numpy()
+    precos_veiculos = df_veiculos['preco_base'].to_numpy(dtype=float)
     
-    status_venda = ['Concluída', 'Cancelada']
-    pesos_status = [0.95, 0.05]
+    ids_vendedores = df_vendedores['vendedor_id'].to_numpy()
+    idx_vendedores = np.random.randint(0, len(ids_vendedores), size=n)
     
     vendas = []
     
     for i in range(n):
         # Data de venda com sazonalidade
-        # Mais vendas em dezembro (fim de ano) e junho (meio do ano)
-        mes_prob = [0.06, 0.06, 0.07, 0.07, 0.08, 0.12, 0.08, 0.07, 0.07, 0.08, 0.09, 0.15]
-        mes = np.random.choice(range(1, 13), p=mes_prob)
+        mes = np.random.choice(range(1, 13), p=PROB_MES_VENDA)
         
         ano = random.choice([2023, 2024])
         if ano == 2024 and mes > 12:
@@ -339,62 +515,42 @@ def gerar_vendas(df_clientes, df_veiculos, df_vendedores, n=N_VENDAS):
         dia = random.randint(1, 28)
         data_venda = datetime(ano, mes, dia).date()
         
-        # Selecionar cliente (clientes com maior renda têm mais probabilidade de comprar)
-        cliente = df_clientes.sample(1, weights=df_clientes['renda_anual']).iloc[0]
-        
-        # Selecionar veículo correlacionado com a renda do cliente
-        # Clientes com renda > 800k têm mais chance de comprar carros > 1M
-        if cliente['renda_anual'] > 800000:
-            veiculos_disponiveis = df_veiculos[df_veiculos['preco_base'] > 600000]
-        elif cliente['renda_anual'] > 500000:
-            veiculos_disponiveis = df_veiculos[
-                (df_veiculos['preco_base'] > 400000) & 
-                (df_veiculos['preco_base'] < 1200000)
-            ]
-        else:
-            veiculos_disponiveis = df_veiculos[df_veiculos['preco_base'] < 800000]
-        
-        if len(veiculos_disponiveis) == 0:
-            veiculos_disponiveis = df_veiculos
-        
-        veiculo = veiculos_disponiveis.sample(1).iloc[0]
-        
-        # Vendedor aleatório
-        vendedor = df_vendedores.sample(1).iloc[0]
+        # Cliente, veículo (correlacionado com a renda) e vendedor já sorteados
+        preco_veiculo = precos_veiculos[idx_veiculos[i]]
         
         # Desconto (0-15%, maior para carros mais caros ou fim de ano)
-        if mes == 12 or veiculo['preco_base'] > 1000000:
+        if mes == 12 or preco_veiculo > 1000000:
             desconto = round(np.random.uniform(0, 15), 2)
         else:
             desconto = round(np.random.uniform(0, 8), 2)
         
         # Valor da venda
-        valor_venda = round(veiculo['preco_base'] * (1 - desconto/100), 2)
+        valor_venda = round(preco_veiculo * (1 - desconto/100), 2)
         
         # Forma de pagamento
-        forma_pagamento = np.random.choice(formas_pagamento, p=pesos_pagamento)
+        forma_pagamento = np.random.choice(FORMAS_PAGAMENTO, p=PESOS_PAGAMENTO)
         
         # Parcelas e entrada
         if forma_pagamento == 'À vista':
             numero_parcelas = 1
             valor_entrada = valor_venda
         elif forma_pagamento == 'Financiamento':
-            numero_parcelas = random.choice([12, 24, 36, 48, 60])
+            numero_parcelas = random.choice(PARCELAS_FINANCIAMENTO)
             valor_entrada = round(valor_venda * np.random.uniform(0.20, 0.40), 2)
         elif forma_pagamento == 'Consórcio':
-            numero_parcelas = random.choice([60, 72, 84])
+            numero_parcelas = random.choice(PARCELAS_CONSORCIO)
             valor_entrada = 0
         else:  # Leasing
-            numero_parcelas = random.choice([24, 36, 48])
+            numero_parcelas = random.choice(PARCELAS_LEASING)
             valor_entrada = round(valor_venda * 0.10, 2)
         
-        status = np.random.choice(status_venda, p=pesos_status)
+        status = np.random.choice(STATUS_VENDA, p=PESOS_STATUS)
         
         venda = {
             'venda_id': i + 1,
-            'cliente_id': cliente['cliente_id'],
-            'veiculo_id': veiculo['veiculo_id'],
-            'vendedor_id': vendedor['vendedor_id'],
+            'cliente_id': ids_clientes[idx_clientes[i]],
+            'veiculo_id': ids_veiculos[idx_veiculos[i]],
+            'vendedor_id': ids_vendedores[idx_vendedores[i]],
             'data_venda': data_venda,
             'valor_venda': valor_venda,
             'desconto_percentual': desconto,
@@ -442,23 +598,13 @@ def gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas, n=N_TE
         # Avaliação alta (4-5) pois resultou em venda
         avaliacao = random.choice([4, 5])
         
-        comentarios_positivos = [
-            'Excelente desempenho e conforto!',
-            'Carro incrível, superou expectativas.',
-            'Potência impressionante, adorei dirigir.',
-            'Muito confortável e tecnológico.',
-            'Design fantástico e performance excelente.',
-            'Melhor test drive que já fiz!',
-            'Estou impressionado com a qualidade.'
-        ]
-        
         test_drive = {
             'test_drive_id': len(test_drives) + 1,
             'cliente_id': venda['cliente_id'],
             'veiculo_id': venda['veiculo_id'],
             'data_test_drive': data_test_drive,
             'avaliacao': avaliacao,
-            'comentario': random.choice(comentarios_positivos),
+            'comentario': random.choice(COMENTARIOS_POSITIVOS),
             'resultou_venda': True,
             'vendedor_responsavel_id': venda['vendedor_id']
         }
@@ -468,16 +614,6 @@ def gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas, n=N_TE
     # Agora gerar test drives que NÃO resultaram em venda
     n_restante = n - len(test_drives)
     
-    comentarios_neutros_negativos = [
-        'Bom carro, mas vou pensar mais um pouco.',
-        'Gostei, mas está acima do meu orçamento.',
-        'Ótimo carro, vou avaliar outras opções.',
-        'Performance boa, mas esperava mais.',
-        'Confortável, mas prefiro outro modelo.',
-        'Interessante, mas não é exatamente o que procuro.',
-        'Bom test drive, vou comparar com concorrentes.'
-    ]
-    
     for i in range(n_restante):
         cliente = df_clientes.sample(1).iloc[0]
         veiculo = df_veiculos.sample(1).iloc[0]
@@ -491,7 +627,7 @@ def gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas, n=N_TE
         data_test_drive = data_test_drive.replace(hour=hora, minute=minuto)
         
         # Avaliação variada (1-5)
-        avaliacao = random.choices([1, 2, 3, 4, 5], weights=[0.05, 0.10, 0.25, 0.35, 0.25])[0]
+        avaliacao = random.choices(AVALIACOES, weights=PESOS_AVALIACAO_SEM_VENDA)[0]
         
         test_drive = {
             'test_drive_id': len(test_drives) + 1,
@@ -499,7 +635,7 @@ def gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas, n=N_TE
             'veiculo_id': veiculo['veiculo_id'],
             'data_test_drive': data_test_drive,
             'avaliacao': avaliacao,
-            'comentario': random.choice(comentarios_neutros_negativos),
+            'comentario': random.choice(COMENTARIOS_NEUTROS_NEGATIVOS),
             'resultou_venda': False,
             'vendedor_responsavel_id': vendedor['vendedor_id']
         }
@@ -520,18 +656,6 @@ def gerar_servicos_pos_venda(df_vendas, n=N_SERVICOS):
     """
     print(f"Gerando {n} serviços pós-venda...")
     
-    tipos_servico = ['Revisão', 'Manutenção', 'Reparo', 'Personalização', 'Garantia', 'Detalhamento']
-    
-    # Valores típicos por tipo de serviço
-    valores_servico = {
-        'Revisão': (2000, 8000),
-        'Manutenção': (3000, 15000),
-        'Reparo': (5000, 50000),
-        'Personalização': (10000, 100000),
-        'Garantia': (0, 5000),
-        'Detalhamento': (1500, 5000)
-    }
-    
     vendas_concluidas = df_vendas[df_vendas['status_venda'] == 'Concluída']
     
     servicos = []
@@ -547,24 +671,14 @@ def gerar_servicos_pos_venda(df_vendas, n=N_SERVICOS):
         if data_servico > DATA_FIM.date():
             data_servico = DATA_FIM.date()
         
-        tipo_servico = random.choice(tipos_servico)
+        tipo_servico = random.choice(TIPOS_SERVICO)
         
         # Valor baseado no tipo
-        min_val, max_val = valores_servico[tipo_servico]
+        min_val, max_val = VALORES_SERVICO[tipo_servico]
         valor_servico = round(np.random.uniform(min_val, max_val), 2)
         
         # Satisfação (geralmente alta em serviços de carros de luxo)
-        satisfacao = random.choices([1, 2, 3, 4, 5], weights=[0.02, 0.05, 0.13, 0.35, 0.45])[0]
-        
-        observacoes_servico = [
-            'Serviço realizado conforme esperado.',
-            'Cliente satisfeito com o atendimento.',
-            'Tudo certo, sem problemas.',
-            'Serviço de excelência.',
-            'Cliente elogiou a agilidade.',
-            'Atendimento impecável.',
-            'Serviço dentro do prazo.'
-        ]
+        satisfacao = random.choices(AVALIACOES, weights=PESOS_SATISFACAO_SERVICO)[0]
         
         servico = {
             'servico_id': i + 1,
@@ -573,7 +687,7 @@ def gerar_servicos_pos_venda(df_vendas, n=N_SERVICOS):
             'data_servico': data_servico,
             'valor_servico': valor_servico,
             'satisfacao_cliente': satisfacao,
-            'observacoes': random.choice(observacoes_servico)
+            'observacoes': random.choice(OBSERVACOES_SERVICO)
         }
         servicos.append(servico)
     
@@ -581,52 +695,678 @@ def gerar_servicos_pos_venda(df_vendas, n=N_SERVICOS):
     print(f"✓ {len(df_servicos)} serviços pós-venda gerados")
     return df_servicos
 
+# ===============================================
+# GERAÇÃO VETORIZADA (GRANDES VOLUMES)
+# ===============================================
+#
+# As funções abaixo produzem as mesmas distribuições e correlações das
+# versões linha a linha, mas sorteiam colunas inteiras de uma vez com um
+# numpy.random.Generator e montam o DataFrame direto a partir dos arrays.
+# O custo cresce de forma praticamente linear com N_*, o que permite gerar
+# dezenas de milhões de linhas para testes de carga.
+#
+# Observação: as datas são devolvidas como datetime64 (e não objetos date),
+# o que mantém o mesmo formato 'AAAA-MM-DD' ao salvar em CSV.
+
+def _criar_rng(rng=None):
+    """
+    Retorna o Generator informado ou um novo, semeado com SEED
+    """
+    if rng is None:
+        return np.random.default_rng(SEED)
+    return rng
+
+
+def _sortear(rng, opcoes, n, p=None):
+    """
+    Sorteia n elementos de uma lista de opções (com pesos opcionais)
+    """
+    opcoes = np.asarray(opcoes)
+    return opcoes[rng.choice(len(opcoes), size=n, p=p)]
+
+
+def _montar_datas(ano, mes, dia):
+    """
+    Monta um array datetime64[D] a partir de arrays de ano, mês e dia
+    """
+    meses = (np.asarray(ano) - 1970) * 12 + (np.asarray(mes) - 1)
+    return meses.astype('datetime64[M]').astype('datetime64[D]') + (np.asarray(dia) - 1)
+
+
+def _datas_em_dias(coluna):
+    """
+    Converte uma coluna de datas (date, datetime ou texto) para datetime64[D]
+    """
+    return pd.to_datetime(coluna).to_numpy().astype('datetime64[D]')
+
+
+def gerar_clientes_vetorizado(n=N_CLIENTES, rng=None, id_inicial=1):
+    """
+    Versão vetorizada de gerar_clientes: idade beta(2, 3), faixas de renda
+    por idade e demais atributos sorteados coluna a coluna.
+    id_inicial permite gerar a tabela em blocos com IDs contínuos.
+    """
+    print(f"Gerando {n} clientes (vetorizado)...")
+    rng = _criar_rng(rng)
+
+    # Idade entre 25 e 70 anos (concentrada entre 30-55)
+    idade = (rng.beta(2, 3, size=n) * 45 + 25).astype(np.int64)
+    agora = np.datetime64(datetime.now(), 's')
+    data_nascimento = (agora - (idade * 365.25 * 86400).astype('timedelta64[s]')).astype('datetime64[D]')
+
+    # Renda correlacionada com idade (peak entre 40-50 anos)
+    faixas = [idade < 35, idade < 50]
+    renda_min = np.select(faixas, [150000, 300000], default=200000)
+    renda_max = np.select(faixas, [500000, 1500000], default=1000000)
+    renda_base = rng.uniform(renda_min, renda_max)
+    renda_anual = np.round(renda_base * rng.uniform(0.8, 1.5, size=n), 2)
+
+    # Data de cadastro aleatória nos últimos 3 anos
+    dias_cadastro = rng.integers(0, 1096, size=n)
+    data_cadastro = np.datetime64(DATA_FIM, 'D') - dias_cadastro
+
+    idx_cidade = rng.integers(0, len(CIDADES_ESTADOS), size=n)
+    cidades = np.array([cidade for cidade, _ in CIDADES_ESTADOS])
+    estados = np.array([estado for _, estado in CIDADES_ESTADOS])
+
+    # Nome, e-mail e telefone compostos por índice a partir do pool
+    cliente_id = np.arange(id_inicial, id_inicial + n)
+    identidades = compor_identidades(cliente_id, rng)
+
+    df_clientes = pd.DataFrame({
+        'cliente_id': cliente_id,
+        'nome': identidades['nome'].to_numpy(),
+        'email': identidades['email'].to_numpy(),
+        'telefone': identidades['telefone'].to_numpy(),
+        'data_nascimento': data_nascimento,
+        'genero': _sortear(rng, GENEROS, n, p=PESOS_GENEROS),
+        'cidade': cidades[idx_cidade],
+        'estado': estados[idx_cidade],
+        'renda_anual': renda_anual,
+        'profissao': _sortear(rng, PROFISSOES_ALTO_PODER, n),
+        'data_cadastro': data_cadastro
+    })
+    print(f"✓ {len(df_clientes)} clientes gerados")
+    return df_clientes
+
+
+def gerar_vendas_vetorizado(df_clientes, df_veiculos, df_vendedores, n=N_VENDAS, rng=None,
+                            id_inicial=1, tabela_clientes=None):
+    """
+    Versão vetorizada de gerar_vendas: mantém a sazonalidade mensal, a
+    escolha de clientes ponderada pela renda e a faixa de veículos por renda.
+    tabela_clientes permite reaproveitar a tabela de pesos acumulados entre
+    blocos (ver construir_tabela_acumulada).
+    """
+    print(f"Gerando {n} vendas (vetorizado)...")
+    rng = _criar_rng(rng)
+
+    # Data de venda com sazonalidade
+    mes = rng.choice(np.arange(1, 13), size=n, p=PROB_MES_VENDA)
+    ano = rng.choice([2023, 2024], size=n)
+    dia = rng.integers(1, 29, size=n)
+    data_venda = _montar_datas(ano, mes, dia)
+
+    # Clientes com maior renda têm mais probabilidade de comprar
+    renda_clientes = df_clientes['renda_anual'].to_numpy(dtype=float)
+    if tabela_clientes is None:
+        tabela_clientes = construir_tabela_acumulada(renda_clientes)
+    idx_cliente = amostrar_tabela(tabela_clientes, n, rng)
+
+    # Veículo correlacionado com a renda do cliente (mesmas faixas do loop)
+    idx_veiculo = amostrar_veiculos(
+        construir_pools_veiculos(df_veiculos),
+        faixa_renda_cliente(renda_clientes[idx_cliente]),
+        rng
+    )
+    preco_veiculo = df_veiculos['preco_base'].to_numpy(dtype=float)[idx_veiculo]
+
+    # Vendedor aleatório
+    idx_vendedor = rng.integers(0, len(df_vendedores), size=n)
+
+    # Desconto (0-15%, maior para carros mais caros ou fim de ano)
+    desconto_max = np.where((mes == 12) | (preco_veiculo > 1000000), 15, 8)
+    desconto = np.round(rng.uniform(0, desconto_max), 2)
+    valor_venda = np.round(preco_veiculo * (1 - desconto / 100), 2)
+
+    # Forma de pagamento, parcelas e entrada
+    forma_pagamento = _sortear(rng, FORMAS_PAGAMENTO, n, p=PESOS_PAGAMENTO)
+    formas = [forma_pagamento == forma for forma in FORMAS_PAGAMENTO[:3]]
+    numero_parcelas = np.select(formas, [
+        1,
+        _sortear(rng, PARCELAS_FINANCIAMENTO, n),
+        _sortear(rng, PARCELAS_CONSORCIO, n)
+    ], default=_sortear(rng, PARCELAS_LEASING, n))
+    valor_entrada = np.select(formas, [
+        valor_venda,
+        np.round(valor_venda * rng.uniform(0.20, 0.40, size=n), 2),
+        0.0
+    ], default=np.round(valor_venda * 0.10, 2))
+
+    df_vendas = pd.DataFrame({
+        'venda_id': np.arange(id_inicial, id_inicial + n),
+        'cliente_id': df_clientes['cliente_id'].to_numpy()[idx_cliente],
+        'veiculo_id': df_veiculos['veiculo_id'].to_numpy()[idx_veiculo],
+        'vendedor_id': df_vendedores['vendedor_id'].to_numpy()[idx_vendedor],
+        'data_venda': data_venda,
+        'valor_venda': valor_venda,
+        'desconto_percentual': desconto,
+        'forma_pagamento': forma_pagamento,
+        'numero_parcelas': numero_parcelas,
+        'valor_entrada': valor_entrada,
+        'status_venda': _sortear(rng, STATUS_VENDA, n, p=PESOS_STATUS)
+    })
+    print(f"✓ {len(df_vendas)} vendas geradas")
+    return df_vendas
+
+
+def _test_drives_com_venda(df_vendas, rng):
+    """
+    Test drives das vendas realizadas: 70% das vendas concluídas, alguns
+    dias antes da venda e com avaliação alta (sem coluna de ID)
+    """
+    concluidas = df_vendas[df_vendas['status_venda'] == 'Concluída']
+    n = int(round(len(concluidas) * 0.70))
+    vendas_com_td = concluidas.iloc[rng.choice(len(concluidas), size=n, replace=False)]
+
+    dias_antes = rng.integers(1, 31, size=n)
+    data = _datas_em_dias(vendas_com_td['data_venda']) - dias_antes
+
+    return pd.DataFrame({
+        'cliente_id': vendas_com_td['cliente_id'].to_numpy(),
+        'veiculo_id': vendas_com_td['veiculo_id'].to_numpy(),
+        'data_test_drive': _com_horario(data, rng),
+        'avaliacao': rng.choice([4, 5], size=n),
+        'comentario': _sortear(rng, COMENTARIOS_POSITIVOS, n),
+        'resultou_venda': np.ones(n, dtype=bool),
+        'vendedor_responsavel_id': vendas_com_td['vendedor_id'].to_numpy()
+    })
+
+
+def _test_drives_sem_venda(df_clientes, df_veiculos, df_vendedores, n, rng):
+    """
+    Test drives que NÃO resultaram em venda, em data aleatória dos últimos
+    2 anos e com avaliação variada (sem coluna de ID)
+    """
+    dias = rng.integers(0, 731, size=n)
+    data = np.datetime64(DATA_FIM, 'D') - dias
+
+    return pd.DataFrame({
+        'cliente_id': df_clientes['cliente_id'].to_numpy()[rng.integers(0, len(df_clientes), size=n)],
+        'veiculo_id': df_veiculos['veiculo_id'].to_numpy()[rng.integers(0, len(df_veiculos), size=n)],
+        'data_test_drive': _com_horario(data, rng),
+        'avaliacao': rng.choice(AVALIACOES, size=n, p=PESOS_AVALIACAO_SEM_VENDA),
+        'comentario': _sortear(rng, COMENTARIOS_NEUTROS_NEGATIVOS, n),
+        'resultou_venda': np.zeros(n, dtype=bool),
+        'vendedor_responsavel_id': df_vendedores['vendedor_id'].to_numpy()[rng.integers(0, len(df_vendedores), size=n)]
+    })
+
+
+def _com_horario(datas, rng):
+    """
+    Acrescenta horário comercial (9h às 18h, em hora cheia ou meia hora)
+    """
+    hora = rng.integers(9, 19, size=len(datas))
+    minuto = rng.choice([0, 30], size=len(datas))
+    return (
+        datas.astype('datetime64[m]') + hora.astype('timedelta64[h]') + minuto.astype('timedelta64[m]')
+    ).astype('datetime64[s]')
+
+
+def gerar_test_drives_vetorizado(df_clientes, df_veiculos, df_vendedores, df_vendas,
+                                 n=N_TEST_DRIVES, rng=None):
+    """
+    Versão vetorizada de gerar_test_drives: 70% das vendas concluídas têm
+    test drive prévio e o restante são test drives sem conversão
+    """
+    print(f"Gerando {n} test drives (vetorizado)...")
+    rng = _criar_rng(rng)
+
+    com_venda = _test_drives_com_venda(df_vendas, rng)
+    sem_venda = _test_drives_sem_venda(df_clientes, df_veiculos, df_vendedores,
+                                       max(0, n - len(com_venda)), rng)
+
+    df_test_drives = pd.concat([com_venda, sem_venda], ignore_index=True)
+    df_test_drives.insert(0, 'test_drive_id', np.arange(1, len(df_test_drives) + 1))
+    print(f"✓ {len(df_test_drives)} test drives gerados")
+    print(f"  Taxa de conversão: {df_test_drives['resultou_venda'].mean()*100:.1f}%")
+    return df_test_drives
+
+
+def gerar_servicos_pos_venda_vetorizado(df_vendas, n=N_SERVICOS, rng=None, id_inicial=1):
+    """
+    Versão vetorizada de gerar_servicos_pos_venda: serviços de 30 a 700 dias
+    após vendas concluídas, com valor dependente do tipo de serviço
+    """
+    print(f"Gerando {n} serviços pós-venda (vetorizado)...")
+    rng = _criar_rng(rng)
+
+    concluidas = df_vendas[df_vendas['status_venda'] == 'Concluída']
+    idx_venda = rng.integers(0, len(concluidas), size=n)
+
+    # Serviço ocorre após a venda, sem ultrapassar a data final
+    dias_depois = rng.integers(30, 701, size=n)
+    data_servico = np.minimum(
+        _datas_em_dias(concluidas['data_venda'])[idx_venda] + dias_depois,
+        np.datetime64(DATA_FIM, 'D')
+    )
+
+    # Valor baseado no tipo
+    idx_tipo = rng.integers(0, len(TIPOS_SERVICO), size=n)
+    valor_min = np.array([VALORES_SERVICO[tipo][0] for tipo in TIPOS_SERVICO])[idx_tipo]
+    valor_max = np.array([VALORES_SERVICO[tipo][1] for tipo in TIPOS_SERVICO])[idx_tipo]
+
+    df_servicos = pd.DataFrame({
+        'servico_id': np.arange(id_inicial, id_inicial + n),
+        'venda_id': concluidas['venda_id'].to_numpy()[idx_venda],
+        'tipo_servico': np.asarray(TIPOS_SERVICO)[idx_tipo],
+        'data_servico': data_servico,
+        'valor_servico': np.round(rng.uniform(valor_min, valor_max), 2),
+        'satisfacao_cliente': rng.choice(AVALIACOES, size=n, p=PESOS_SATISFACAO_SERVICO),
+        'observacoes': _sortear(rng, OBSERVACOES_SERVICO, n)
+    })
+    print(f"✓ {len(df_servicos)} serviços pós-venda gerados")
+    return df_servicos
+
+# ===============================================
+# GERAÇÃO EM STREAMING (BLOCOS)
+# ===============================================
+#
+# Gera cada tabela em blocos de tamanho fixo e anexa cada bloco ao CSV assim
+# que ele fica pronto. Da tabela de clientes só ficam em memória o ID e a
+# renda (necessários para o sorteio ponderado das vendas); as tabelas de
+# fatos (vendas, test drives e serviços) nunca passam de um bloco em memória.
+# Assim o pico de memória não depende do número de vendas/test drives.
+
+def _blocos(total, tamanho_chunk):
+    """
+    Divide o total de linhas em blocos (inicio, tamanho), com inicio a partir de 0
+    """
+    for inicio in range(0, total, tamanho_chunk):
+        yield inicio, min(tamanho_chunk, total - inicio)
+
+
+def _anexar_csv(df, diretorio_saida, tabela, linhas_escritas, escritores_parquet=None):
+    """
+    Anexa um bloco ao CSV da tabela (o primeiro bloco cria o arquivo com cabeçalho).
+    Com escritores_parquet (dict), grava o mesmo bloco também no Parquet da tabela.
+    """
+    primeiro_bloco = tabela not in linhas_escritas
+    if escritores_parquet is not None:
+        if tabela not in escritores_parquet:
+            from armazenamento_colunar import EscritorParquet
+            escritores_parquet[tabela] = EscritorParquet(os.path.join(diretorio_saida, ARQUIVOS_SAIDA[tabela]))
+        escritores_parquet[tabela].escrever(df)
+    df.to_csv(
+        os.path.join(diretorio_saida, ARQUIVOS_SAIDA[tabela]),
+        mode='w' if primeiro_bloco else 'a',
+        header=primeiro_bloco,
+        index=False,
+        encoding='utf-8'
+    )
+    linhas_escritas[tabela] = linhas_escritas.get(tabela, 0) + len(df)
+
+
+def gerar_dados_streaming(diretorio_saida=DIRETORIO_SAIDA, tamanho_chunk=TAMANHO_CHUNK,
+                          n_clientes=N_CLIENTES, n_vendas=N_VENDAS,
+                          n_test_drives=N_TEST_DRIVES, n_servicos=N_SERVICOS, seed=SEED, parquet=False):
+    """
+    Gera todos os dados em blocos e grava cada bloco direto no CSV
+    (e também em Parquet, um row group por bloco, com parquet=True)
+
+    Usa as funções vetorizadas; retorna o número de linhas escritas por tabela.
+    """
+    print("\n" + "="*60)
+    print("GERAÇÃO DE DADOS EM STREAMING")
+    print(f"Diretório: {diretorio_saida} | Bloco: {tamanho_chunk:,} linhas")
+    print("="*60 + "\n")
+    
+    os.makedirs(diretorio_saida, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    linhas_escritas = {}
+    escritores = {} if parquet else None
+    
+    # Tabelas pequenas (dimensões) são geradas de uma vez
+    df_vendedores = gerar_vendedores()
+    df_veiculos = gerar_veiculos()
+    _anexar_csv(df_vendedores, diretorio_saida, 'vendedores', linhas_escritas, escritores)
+    _anexar_csv(df_veiculos, diretorio_saida, 'veiculos', linhas_escritas, escritores)
+    
+    # Clientes: guarda apenas a renda para o sorteio ponderado das vendas
+    renda_clientes = np.empty(n_clientes, dtype=float)
+    for inicio, tamanho in _blocos(n_clientes, tamanho_chunk):
+        bloco = gerar_clientes_vetorizado(tamanho, rng=rng, id_inicial=inicio + 1)
+        renda_clientes[inicio:inicio + tamanho] = bloco['renda_anual'].to_numpy()
+        _anexar_csv(bloco, diretorio_saida, 'clientes', linhas_escritas, escritores)
+    
+    df_clientes = pd.DataFrame({
+        'cliente_id': np.arange(1, n_clientes + 1),
+        'renda_anual': renda_clientes
+    })
+    tabela_clientes = construir_tabela_acumulada(renda_clientes)
+    
+    # Vendas, com os test drives convertidos e os serviços de cada bloco
+    for inicio, tamanho in _blocos(n_vendas, tamanho_chunk):
+        bloco = gerar_vendas_vetorizado(df_clientes, df_veiculos, df_vendedores, tamanho, rng=rng,
+                                        id_inicial=inicio + 1, tabela_clientes=tabela_clientes)
+        _anexar_csv(bloco, diretorio_saida, 'vendas', linhas_escritas, escritores)
+        
+        test_drives = _test_drives_com_venda(bloco, rng)
+        test_drives.insert(0, 'test_drive_id', linhas_escritas.get('test_drives', 0) + np.arange(1, len(test_drives) + 1))
+        _anexar_csv(test_drives, diretorio_saida, 'test_drives', linhas_escritas, escritores)
+        
+        # Serviços distribuídos proporcionalmente ao tamanho de cada bloco
+        servicos_gerados = linhas_escritas.get('servicos', 0)
+        n_servicos_bloco = int(round(n_servicos * (inicio + tamanho) / n_vendas)) - servicos_gerados
+        if n_servicos_bloco > 0 and (bloco['status_venda'] == 'Concluída').any():
+            servicos = gerar_servicos_pos_venda_vetorizado(bloco, n_servicos_bloco, rng=rng,
+                                                           id_inicial=servicos_gerados + 1)
+            _anexar_csv(servicos, diretorio_saida, 'servicos', linhas_escritas, escritores)
+        
+        print(f"  Bloco de vendas {inicio + tamanho:,}/{n_vendas:,} gravado")
+    
+    # Test drives que NÃO resultaram em venda
+    n_sem_venda = max(0, n_test_drives - linhas_escritas.get('test_drives', 0))
+    for _, tamanho in _blocos(n_sem_venda, tamanho_chunk):
+        test_drives = _test_drives_sem_venda(df_clientes, df_veiculos, df_vendedores, tamanho, rng)
+        test_drives.insert(0, 'test_drive_id', linhas_escritas.get('test_drives', 0) + np.arange(1, tamanho + 1))
+        _anexar_csv(test_drives, diretorio_saida, 'test_drives', linhas_escritas, escritores)
+    
+    for escritor in (escritores or {}).values():
+        escritor.fechar()
+    
+    print("\n" + "="*60)
+    print("RESUMO DOS ARQUIVOS GERADOS")
+    print("="*60 + "\n")
+    for tabela, linhas in linhas_escritas.items():
+        print(f"✓ {ARQUIVOS_SAIDA[tabela]}: {linhas:,} linhas")
+    
+    return linhas_escritas
+
+# ===============================================
+# GERAÇÃO PARALELA (SHARDS)
+# ===============================================
+#
+# Cada tabela é dividida em shards por faixa de ID, de tamanho fixo. Cada
+# shard roda em um processo do pool com sua própria semente, derivada de
+# (SEED, tabela, índice do shard) via SeedSequence. Como nem as fronteiras
+# dos shards nem as sementes dependem do número de workers, e as partes são
+# concatenadas na ordem dos shards, o resultado é idêntico com 1 ou 32
+# workers.
+#
+# Chaves estrangeiras: cada shard de vendas gera também os test drives
+# convertidos e os serviços das suas próprias vendas, e todos os workers
+# recebem a mesma renda de clientes e os mesmos catálogos de veículos e
+# vendedores. Os IDs de vendas e serviços são faixas calculadas antes; os
+# IDs de test drives são atribuídos na concatenação final.
+
+CODIGOS_TABELA = {'clientes': 1, 'vendas': 2, 'test_drives': 3, 'vendedores': 4, 'veiculos': 5}
+
+# Estado compartilhado com os workers (preenchido pelo initializer do pool)
+_ESTADO_WORKER = {}
+
+
+def _seed_shard(seed, tabela, indice):
+    """
+    Semente determinística de um shard, independente do número de workers
+    """
+    return np.random.SeedSequence([seed, CODIGOS_TABELA[tabela], indice])
+
+
+def _geradores_dimensao(seed, tabela):
+    """
+    Geradores (numpy, random) de uma tabela de dimensão, derivados da seed
+    como os dos shards
+    """
+    semente_numpy, semente_random = np.random.SeedSequence([seed, CODIGOS_TABELA[tabela]]).spawn(2)
+    return np.random.default_rng(semente_numpy), random.Random(int(semente_random.generate_state(1)[0]))
+
+
+def _caminho_parte(diretorio_partes, tabela, indice):
+    return os.path.join(diretorio_partes, f"{tabela}_{indice:06d}.csv")
+
+
+def _inicializar_worker(estado):
+    _ESTADO_WORKER.clear()
+    _ESTADO_WORKER.update(estado)
+
+
+def _shard_clientes(indice, inicio, tamanho, seed, diretorio_partes):
+    """
+    Gera um shard de clientes, grava a parte e devolve a renda (para os pesos)
+    """
+    rng = np.random.default_rng(_seed_shard(seed, 'clientes', indice))
+    bloco = gerar_clientes_vetorizado(tamanho, rng=rng, id_inicial=inicio + 1)
+    bloco.to_csv(_caminho_parte(diretorio_partes, 'clientes', indice), index=False, encoding='utf-8')
+    return bloco['renda_anual'].to_numpy()
+
+
+def _shard_vendas(indice, inicio, tamanho, servico_inicial, n_servicos, seed, diretorio_partes):
+    """
+    Gera um shard de vendas com seus test drives convertidos e serviços;
+    devolve o número de test drives convertidos (sem ID, atribuído no final)
+    """
+    rng = np.random.default_rng(_seed_shard(seed, 'vendas', indice))
+    vendas = gerar_vendas_vetorizado(
+        _ESTADO_WORKER['clientes'], _ESTADO_WORKER['veiculos'], _ESTADO_WORKER['vendedores'],
+        tamanho, rng=rng, id_inicial=inicio + 1, tabela_clientes=_ESTADO_WORKER['tabela_clientes']
+    )
+    vendas.to_csv(_caminho_parte(diretorio_partes, 'vendas', indice), index=False, encoding='utf-8')
+
+    test_drives = _test_drives_com_venda(vendas, rng)
+    test_drives.to_csv(_caminho_parte(diretorio_partes, 'test_drives_com_venda', indice), index=False, encoding='utf-8')
+
+    if n_servicos > 0 and (vendas['status_venda'] == 'Concluída').any():
+        servicos = gerar_servicos_pos_venda_vetorizado(vendas, n_servicos, rng=rng, id_inicial=servico_inicial)
+        servicos.to_csv(_caminho_parte(diretorio_partes, 'servicos', indice), index=False, encoding='utf-8')
+    return len(test_drives)
+
+
+def _shard_test_drives_sem_venda(indice, tamanho, seed, diretorio_partes):
+    """
+    Gera um shard de test drives sem conversão (sem ID, atribuído no final)
+    """
+    rng = np.random.default_rng(_seed_shard(seed, 'test_drives', indice))
+    test_drives = _test_drives_sem_venda(
+        _ESTADO_WORKER['clientes'], _ESTADO_WORKER['veiculos'], _ESTADO_WORKER['vendedores'], tamanho, rng
+    )
+    test_drives.to_csv(_caminho_parte(diretorio_partes, 'test_drives_sem_venda', indice), index=False, encoding='utf-8')
+    return len(test_drives)
+
+
+def _concatenar_partes(partes, destino, coluna_id=None):
+    """
+    Junta as partes (na ordem dada) em um único CSV, mantendo só o primeiro
+    cabeçalho. Com coluna_id, numera as linhas sequencialmente a partir de 1.
+    Devolve o número de linhas escritas.
+    """
+    linhas = 0
+    with open(destino, 'w', encoding='utf-8', newline='') as saida:
+        for i, parte in enumerate(p for p in partes if os.path.exists(p)):
+            with open(parte, 'r', encoding='utf-8', newline='') as entrada:
+                cabecalho = entrada.readline()
+                if i == 0:
+                    saida.write(f"{coluna_id},{cabecalho}" if coluna_id else cabecalho)
+                if coluna_id is None:
+                    shutil.copyfileobj(entrada, saida)
+                    continue
+                for linha in entrada:
+                    linhas += 1
+                    saida.write(f"{linhas},{linha}")
+    if coluna_id is None:
+        with open(destino, 'r', encoding='utf-8', newline='') as f:
+            linhas = sum(1 for _ in f) - 1
+    return linhas
+
+
+def gerar_dados_paralelo(diretorio_saida=DIRETORIO_SAIDA, n_workers=None, tamanho_shard=TAMANHO_SHARD,
+                         n_clientes=N_CLIENTES, n_vendas=N_VENDAS,
+                         n_test_drives=N_TEST_DRIVES, n_servicos=N_SERVICOS, seed=SEED):
+    """
+    Gera todos os dados em shards processados em paralelo (ProcessPoolExecutor)
+
+    O resultado depende apenas da seed e de tamanho_shard, nunca de n_workers.
+    Retorna o número de linhas escritas por tabela.
+    """
+    n_workers = n_workers or os.cpu_count()
+    print("\n" + "="*60)
+    print("GERAÇÃO DE DADOS EM PARALELO")
+    print(f"Diretório: {diretorio_saida} | Workers: {n_workers} | Shard: {tamanho_shard:,} linhas")
+    print("="*60 + "\n")
+    
+    os.makedirs(diretorio_saida, exist_ok=True)
+    diretorio_partes = tempfile.mkdtemp(prefix='_partes_', dir=diretorio_saida)
+    linhas_escritas = {}
+    
+    try:
+        # Garante o pool de identidades em cache antes de iniciar os workers
+        carregar_pool_identidades()
+        
+        # Tabelas pequenas (dimensões) são geradas no processo principal,
+        # com geradores derivados da seed (não dos geradores globais)
+        rng, aleatorio = _geradores_dimensao(seed, 'vendedores')
+        df_vendedores = gerar_vendedores(rng=rng, aleatorio=aleatorio)
+        rng, aleatorio = _geradores_dimensao(seed, 'veiculos')
+        df_veiculos = gerar_veiculos(rng=rng, aleatorio=aleatorio)
+        for tabela, df in [('vendedores', df_vendedores), ('veiculos', df_veiculos)]:
+            df.to_csv(os.path.join(diretorio_saida, ARQUIVOS_SAIDA[tabela]), index=False, encoding='utf-8')
+            linhas_escritas[tabela] = len(df)
+        
+        # Fase 1: clientes
+        shards_clientes = list(_blocos(n_clientes, tamanho_shard))
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            rendas = list(pool.map(
+                _shard_clientes,
+                range(len(shards_clientes)),
+                [inicio for inicio, _ in shards_clientes],
+                [tamanho for _, tamanho in shards_clientes],
+                [seed] * len(shards_clientes),
+                [diretorio_partes] * len(shards_clientes)
+            ))
+        renda_clientes = np.concatenate(rendas) if rendas else np.empty(0)
+        linhas_escritas['clientes'] = _concatenar_partes(
+            [_caminho_parte(diretorio_partes, 'clientes', i) for i in range(len(shards_clientes))],
+            os.path.join(diretorio_saida, ARQUIVOS_SAIDA['clientes'])
+        )
+        
+        # Fase 2: vendas (+ test drives convertidos e serviços) e test drives sem venda
+        estado = {
+            'clientes': pd.DataFrame({'cliente_id': np.arange(1, n_clientes + 1), 'renda_anual': renda_clientes}),
+            'tabela_clientes': construir_tabela_acumulada(renda_clientes),
+            'veiculos': df_veiculos,
+            'vendedores': df_vendedores
+        }
+        shards_vendas = list(_blocos(n_vendas, tamanho_shard))
+        # Faixas de IDs de serviços por shard, proporcionais ao tamanho do shard
+        limites_servicos = [0] + [int(round(n_servicos * (inicio + tamanho) / n_vendas)) for inicio, tamanho in shards_vendas]
+        
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker, initargs=(estado,)) as pool:
+            convertidos = list(pool.map(
+                _shard_vendas,
+                range(len(shards_vendas)),
+                [inicio for inicio, _ in shards_vendas],
+                [tamanho for _, tamanho in shards_vendas],
+                [limites_servicos[i] + 1 for i in range(len(shards_vendas))],
+                [limites_servicos[i + 1] - limites_servicos[i] for i in range(len(shards_vendas))],
+                [seed] * len(shards_vendas),
+                [diretorio_partes] * len(shards_vendas)
+            ))
+            
+            n_sem_venda = max(0, n_test_drives - sum(convertidos))
+            shards_sem_venda = list(_blocos(n_sem_venda, tamanho_shard))
+            list(pool.map(
+                _shard_test_drives_sem_venda,
+                range(len(shards_sem_venda)),
+                [tamanho for _, tamanho in shards_sem_venda],
+                [seed] * len(shards_sem_venda),
+                [diretorio_partes] * len(shards_sem_venda)
+            ))
+        
+        linhas_escritas['vendas'] = _concatenar_partes(
+            [_caminho_parte(diretorio_partes, 'vendas', i) for i in range(len(shards_vendas))],
+            os.path.join(diretorio_saida, ARQUIVOS_SAIDA['vendas'])
+        )
+        linhas_escritas['test_drives'] = _concatenar_partes(
+            [_caminho_parte(diretorio_partes, 'test_drives_com_venda', i) for i in range(len(shards_vendas))]
+            + [_caminho_parte(diretorio_partes, 'test_drives_sem_venda', i) for i in range(len(shards_sem_venda))],
+            os.path.join(diretorio_saida, ARQUIVOS_SAIDA['test_drives']),
+            coluna_id='test_drive_id'
+        )
+        linhas_escritas['servicos'] = _concatenar_partes(
+            [_caminho_parte(diretorio_partes, 'servicos', i) for i in range(len(shards_vendas))],
+            os.path.join(diretorio_saida, ARQUIVOS_SAIDA['servicos'])
+        )
+    finally:
+        shutil.rmtree(diretorio_partes, ignore_errors=True)
+    
+    print("\n" + "="*60)
+    print("RESUMO DOS ARQUIVOS GERADOS")
+    print("="*60 + "\n")
+    for tabela, linhas in linhas_escritas.items():
+        print(f"✓ {ARQUIVOS_SAIDA[tabela]}: {linhas:,} linhas")
+    
+    return linhas_escritas
+
 # ===============================================
 # FUNÇÃO PRINCIPAL
 # ===============================================
 
-def gerar_todos_dados():
+def gerar_todos_dados(vetorizado=False, diretorio_saida=DIRETORIO_SAIDA, parquet=False):
     """
     Função principal que gera todos os dados e salva em CSV
+    (e também em Parquet, ao lado de cada CSV, com parquet=True)
+
+    Com vetorizado=True usa as versões vetorizadas (indicadas para grandes
+    volumes) para clientes, vendas, test drives e serviços pós-venda.
+    Para volumes que não cabem em memória, use gerar_dados_streaming.
     """
     print("\n" + "="*60)
     print("INICIANDO GERAÇÃO DE DADOS SINTÉTICOS")
     print("="*60 + "\n")
     
     # Gerar dados
-    df_clientes = gerar_clientes()
-    df_vendedores = gerar_vendedores()
-    df_veiculos = gerar_veiculos()
-    df_vendas = gerar_vendas(df_clientes, df_veiculos, df_vendedores)
-    df_test_drives = gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas)
-    df_servicos = gerar_servicos_pos_venda(df_vendas)
+    if vetorizado:
+        rng = np.random.default_rng(SEED)
+        df_clientes = gerar_clientes_vetorizado(rng=rng)
+        df_vendedores = gerar_vendedores()
+        df_veiculos = gerar_veiculos()
+        df_vendas = gerar_vendas_vetorizado(df_clientes, df_veiculos, df_vendedores, rng=rng)
+        df_test_drives = gerar_test_drives_vetorizado(df_clientes, df_veiculos, df_vendedores, df_vendas, rng=rng)
+        df_servicos = gerar_servicos_pos_venda_vetorizado(df_vendas, rng=rng)
+    else:
+        df_clientes = gerar_clientes()
+        df_vendedores = gerar_vendedores()
+        df_veiculos = gerar_veiculos()
+        df_vendas = gerar_vendas(df_clientes, df_veiculos, df_vendedores)
+        df_test_drives = gerar_test_drives(df_clientes, df_veiculos, df_vendedores, df_vendas)
+        df_servicos = gerar_servicos_pos_venda(df_vendas)
+    
+    dados = {
+        'clientes': df_clientes,
+        'vendedores': df_vendedores,
+        'veiculos': df_veiculos,
+        'vendas': df_vendas,
+        'test_drives': df_test_drives,
+        'servicos': df_servicos
+    }
     
     # Criar diretório de saída
-    import os
-    os.makedirs('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados', exist_ok=True)
+    os.makedirs(diretorio_saida, exist_ok=True)
     
     # Salvar em CSV
     print("\n" + "="*60)
     print("SALVANDO DADOS EM CSV")
     print("="*60 + "\n")
     
-    df_clientes.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/clientes.csv', index=False, encoding='utf-8')
-    print("✓ clientes.csv salvo")
-    
-    df_vendedores.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/vendedores.csv', index=False, encoding='utf-8')
-    print("✓ vendedores.csv salvo")
-    
-    df_veiculos.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/veiculos.csv', index=False, encoding='utf-8')
-    print("✓ veiculos.csv salvo")
-    
-    df_vendas.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/vendas.csv', index=False, encoding='utf-8')
-    print("✓ vendas.csv salvo")
+    for tabela, df in dados.items():
+        df.to_csv(os.path.join(diretorio_saida, ARQUIVOS_SAIDA[tabela]), index=False, encoding='utf-8')
+        print(f"✓ {ARQUIVOS_SAIDA[tabela]} salvo")
     
-    df_test_drives.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/test_drives.csv', index=False, encoding='utf-8')
-    print("✓ test_drives.csv salvo")
-    
-    df_servicos.to_csv('C:/Users/Luciano/Documents/Projeto_ELT_ML/Dados/servicos_pos_venda.csv', index=False, encoding='utf-8')
-    print("✓ servicos_pos_venda.csv salvo")
+    if parquet:
+        from armazenamento_colunar import salvar_parquet
+        for tabela, df in dados.items():
+            destino = salvar_parquet(df, os.path.join(diretorio_saida, ARQUIVOS_SAIDA[tabela]))
+            print(f"✓ {os.path.basename(destino)} salvo")
     
     # Estatísticas finais
     print("\n" + "="*60)
@@ -662,18 +1402,58 @@ def gerar_todos_dados():
     print("✅ GERAÇÃO CONCLUÍDA COM SUCESSO!")
     print("="*60 + "\n")
     
-    return {
-        'clientes': df_clientes,
-        'vendedores': df_vendedores,
-        'veiculos': df_veiculos,
-        'vendas': df_vendas,
-        'test_drives': df_test_drives,
-        'servicos': df_servicos
-    }
+    return dados
 
 # ===============================================
 # EXECUTAR
 # ===============================================
 
 if __name__ == "__main__":
-    dados = gerar_todos_dados()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera os dados sintéticos do projeto")
+    parser.add_argument("--vetorizado", action="store_true",
+                        help="usa a geração vetorizada (recomendada para grandes volumes)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="gera e grava em blocos, com memória limitada")
+    parser.add_argument("--paralelo", action="store_true",
+                        help="gera em shards distribuídos entre processos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="modo paralelo: nº de processos (padrão: nº de CPUs)")
+    parser.add_argument("--tamanho-shard", type=int, default=TAMANHO_SHARD,
+                        help="modo paralelo: linhas por shard (define o resultado)")
+    parser.add_argument("--diretorio-saida", default=DIRETORIO_SAIDA,
+                        help="pasta onde os CSVs serão gravados")
+    parser.add_argument("--parquet", action="store_true",
+                        help="grava também em Parquet (modos padrão e streaming)")
+    parser.add_argument("--tamanho-chunk", type=int, default=TAMANHO_CHUNK,
+                        help="linhas por bloco no modo streaming")
+    parser.add_argument("--clientes", type=int, default=N_CLIENTES, help="modos streaming/paralelo: nº de clientes")
+    parser.add_argument("--vendas", type=int, default=N_VENDAS, help="modos streaming/paralelo: nº de vendas")
+    parser.add_argument("--test-drives", type=int, default=N_TEST_DRIVES, help="modos streaming/paralelo: nº de test drives")
+    parser.add_argument("--servicos", type=int, default=N_SERVICOS, help="modos streaming/paralelo: nº de serviços")
+    args = parser.parse_args()
+
+    if args.paralelo:
+        gerar_dados_paralelo(
+            diretorio_saida=args.diretorio_saida,
+            n_workers=args.workers,
+            tamanho_shard=args.tamanho_shard,
+            n_clientes=args.clientes,
+            n_vendas=args.vendas,
+            n_test_drives=args.test_drives,
+            n_servicos=args.servicos
+        )
+    elif args.streaming:
+        gerar_dados_streaming(
+            diretorio_saida=args.diretorio_saida,
+            tamanho_chunk=args.tamanho_chunk,
+            n_clientes=args.clientes,
+            n_vendas=args.vendas,
+            n_test_drives=args.test_drives,
+            n_servicos=args.servicos,
+            parquet=args.parquet
+        )
+    else:
+        dados = gerar_todos_dados(vetorizado=args.vetorizado, diretorio_saida=args.diretorio_saida,
+                                  parquet=args.parquet)
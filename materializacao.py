@@ -0,0 +1,274 @@
+"""
+Tabelas Materializadas (Resumos)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Mantém as tabelas mv_* de create_tables_sqlite.sql, que guardam o resultado
+das views de análise (vw_*). Em vez de refazer JOIN + GROUP BY sobre todo o
+histórico a cada consulta:
+- a atualização completa recalcula cada resumo uma vez
+- a atualização incremental agrega só as vendas/test drives após a marca
+  d'água do resumo (ver etl_incremental.py) e soma o resultado às linhas
+  existentes com UPSERT
+
+As views vw_* continuam agregando os dados atuais (o GET /views/:nome do
+server.js devolve o mesmo que antes, inclusive logo após um POST); quem
+aceita o atraso até a próxima atualização lê as tabelas mv_*.
+
+Observação: o modo incremental considera apenas linhas novas. Alterações em
+vendas antigas (ex.: mudança de status) exigem uma atualização completa.
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+
+from carregar_sqlite import DB_PATH, SQL_PATH, ler_comandos_sql
+from etl_incremental import ler_marca, gravar_marca, marca_atual
+
+# ===============================================
+# AGREGAÇÕES
+# ===============================================
+#
+# Cada resumo tem a tabela de origem (que define a marca d'água) e duas
+# consultas: a completa, equivalente à view original, e a incremental, que
+# agrega somente o intervalo (:ultimo_id, :ate_id] e faz UPSERT.
+
+SQL_CLIENTES_COMPLETO = """
+INSERT INTO mv_resumo_vendas_cliente
+    (cliente_id, nome, email, total_compras, valor_total_gasto, ticket_medio, ultima_compra, atualizado_em)
+SELECT
+    c.cliente_id,
+    c.nome,
+    c.email,
+    COUNT(v.venda_id),
+    SUM(v.valor_venda),
+    AVG(v.valor_venda),
+    MAX(v.data_venda),
+    :agora
+FROM clientes c
+LEFT JOIN vendas v ON c.cliente_id = v.cliente_id AND v.status_venda = 'Concluída' AND v.venda_id <= :ate_id
+GROUP BY c.cliente_id, c.nome, c.email
+"""
+
+SQL_CLIENTES_INCREMENTAL = [
+    # Clientes novos entram zerados (a view lista todos os clientes)
+    """
+    INSERT INTO mv_resumo_vendas_cliente (cliente_id, nome, email, total_compras, atualizado_em)
+    SELECT cliente_id, nome, email, 0, :agora
+    FROM clientes
+    WHERE cliente_id > (SELECT COALESCE(MAX(cliente_id), 0) FROM mv_resumo_vendas_cliente)
+    """,
+    """
+    INSERT INTO mv_resumo_vendas_cliente
+        (cliente_id, nome, email, total_compras, valor_total_gasto, ticket_medio, ultima_compra, atualizado_em)
+    SELECT
+        c.cliente_id,
+        c.nome,
+        c.email,
+        COUNT(v.venda_id),
+        SUM(v.valor_venda),
+        AVG(v.valor_venda),
+        MAX(v.data_venda),
+        :agora
+    FROM vendas v
+    JOIN clientes c ON c.cliente_id = v.cliente_id
+    WHERE v.status_venda = 'Concluída' AND v.venda_id > :ultimo_id AND v.venda_id <= :ate_id
+    GROUP BY c.cliente_id, c.nome, c.email
+    ON CONFLICT (cliente_id) DO UPDATE SET
+        total_compras = total_compras + excluded.total_compras,
+        valor_total_gasto = COALESCE(valor_total_gasto, 0) + excluded.valor_total_gasto,
+        ticket_medio = (COALESCE(valor_total_gasto, 0) + excluded.valor_total_gasto)
+                       / (total_compras + excluded.total_compras),
+        ultima_compra = MAX(COALESCE(ultima_compra, excluded.ultima_compra), excluded.ultima_compra),
+        atualizado_em = excluded.atualizado_em
+    """
+]
+
+SQL_VENDEDORES_COMPLETO = """
+INSERT INTO mv_performance_vendedores
+    (vendedor_id, nome, total_vendas, valor_total_vendido, ticket_medio, comissao_total, atualizado_em)
+SELECT
+    vd.vendedor_id,
+    vd.nome,
+    COUNT(v.venda_id),
+    SUM(v.valor_venda),
+    AVG(v.valor_venda),
+    SUM(v.valor_venda * vd.comissao_percentual / 100),
+    :agora
+FROM vendedores vd
+LEFT JOIN vendas v ON vd.vendedor_id = v.vendedor_id AND v.status_venda = 'Concluída' AND v.venda_id <= :ate_id
+GROUP BY vd.vendedor_id, vd.nome
+"""
+
+SQL_VENDEDORES_INCREMENTAL = [
+    """
+    INSERT INTO mv_performance_vendedores (vendedor_id, nome, total_vendas, atualizado_em)
+    SELECT vendedor_id, nome, 0, :agora
+    FROM vendedores
+    WHERE vendedor_id > (SELECT COALESCE(MAX(vendedor_id), 0) FROM mv_performance_vendedores)
+    """,
+    """
+    INSERT INTO mv_performance_vendedores
+        (vendedor_id, nome, total_vendas, valor_total_vendido, ticket_medio, comissao_total, atualizado_em)
+    SELECT
+        vd.vendedor_id,
+        vd.nome,
+        COUNT(v.venda_id),
+        SUM(v.valor_venda),
+        AVG(v.valor_venda),
+        SUM(v.valor_venda * vd.comissao_percentual / 100),
+        :agora
+    FROM vendas v
+    JOIN vendedores vd ON vd.vendedor_id = v.vendedor_id
+    WHERE v.status_venda = 'Concluída' AND v.venda_id > :ultimo_id AND v.venda_id <= :ate_id
+    GROUP BY vd.vendedor_id, vd.nome
+    ON CONFLICT (vendedor_id) DO UPDATE SET
+        total_vendas = total_vendas + excluded.total_vendas,
+        valor_total_vendido = COALESCE(valor_total_vendido, 0) + excluded.valor_total_vendido,
+        ticket_medio = (COALESCE(valor_total_vendido, 0) + excluded.valor_total_vendido)
+                       / (total_vendas + excluded.total_vendas),
+        comissao_total = COALESCE(comissao_total, 0) + excluded.comissao_total,
+        atualizado_em = excluded.atualizado_em
+    """
+]
+
+SQL_MODELOS = """
+INSERT INTO mv_modelos_mais_vendidos
+    (marca, modelo, quantidade_vendida, receita_total, preco_medio_venda, atualizado_em)
+SELECT
+    ve.marca,
+    ve.modelo,
+    COUNT(v.venda_id),
+    SUM(v.valor_venda),
+    AVG(v.valor_venda),
+    :agora
+FROM vendas v
+JOIN veiculos ve ON ve.veiculo_id = v.veiculo_id
+WHERE v.status_venda = 'Concluída' AND v.venda_id > :ultimo_id AND v.venda_id <= :ate_id
+GROUP BY ve.marca, ve.modelo
+ON CONFLICT (marca, modelo) DO UPDATE SET
+    quantidade_vendida = quantidade_vendida + excluded.quantidade_vendida,
+    receita_total = receita_total + excluded.receita_total,
+    preco_medio_venda = (receita_total + excluded.receita_total)
+                        / (quantidade_vendida + excluded.quantidade_vendida),
+    atualizado_em = excluded.atualizado_em
+"""
+
+SQL_CONVERSAO = """
+INSERT INTO mv_conversao_test_drives
+    (marca, modelo, total_test_drives, total_vendas, taxa_conversao, atualizado_em)
+SELECT
+    ve.marca,
+    ve.modelo,
+    COUNT(td.test_drive_id),
+    SUM(CASE WHEN td.resultou_venda = 1 THEN 1 ELSE 0 END),
+    ROUND(100.0 * SUM(CASE WHEN td.resultou_venda = 1 THEN 1 ELSE 0 END) / COUNT(td.test_drive_id), 2),
+    :agora
+FROM test_drives td
+JOIN veiculos ve ON ve.veiculo_id = td.veiculo_id
+WHERE td.test_drive_id > :ultimo_id AND td.test_drive_id <= :ate_id
+GROUP BY ve.marca, ve.modelo
+ON CONFLICT (marca, modelo) DO UPDATE SET
+    total_test_drives = total_test_drives + excluded.total_test_drives,
+    total_vendas = total_vendas + excluded.total_vendas,
+    taxa_conversao = ROUND(100.0 * (total_vendas + excluded.total_vendas)
+                           / (total_test_drives + excluded.total_test_drives), 2),
+    atualizado_em = excluded.atualizado_em
+"""
+
+# Resumos com apenas linhas que têm vendas/test drives (INNER JOIN nas views)
+# usam a mesma consulta nos dois modos: a completa parte de ultimo_id = 0.
+MATERIALIZADAS = {
+    'mv_resumo_vendas_cliente': ('vendas', [SQL_CLIENTES_COMPLETO], SQL_CLIENTES_INCREMENTAL),
+    'mv_performance_vendedores': ('vendas', [SQL_VENDEDORES_COMPLETO], SQL_VENDEDORES_INCREMENTAL),
+    'mv_modelos_mais_vendidos': ('vendas', [SQL_MODELOS], [SQL_MODELOS]),
+    'mv_conversao_test_drives': ('test_drives', [SQL_CONVERSAO], [SQL_CONVERSAO])
+}
+
+# ===============================================
+# INSTALAÇÃO
+# ===============================================
+
+def instalar_materializadas(conn, sql_path=SQL_PATH):
+    """
+    Cria as tabelas mv_* (e seus índices) e devolve às views vw_* a
+    agregação sobre os dados atuais nos bancos em que elas liam das
+    tabelas mv_*
+    """
+    views = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'").fetchall())
+    for comando in ler_comandos_sql(sql_path):
+        cabecalho = comando.split('(')[0].split(' AS')[0]
+        if 'mv_' in cabecalho:
+            conn.execute(comando)
+        elif cabecalho.upper().startswith('CREATE VIEW'):
+            nome = cabecalho.split()[-1]
+            if 'FROM mv_' in views.get(nome, ''):
+                conn.execute(f"DROP VIEW {nome}")
+            conn.execute(comando)
+
+# ===============================================
+# ATUALIZAÇÃO
+# ===============================================
+
+def atualizar_materializada(conn, nome, completo=False):
+    """
+    Atualiza um resumo em uma única transação (dados + marca d'água).
+    Sem marca gravada, faz a atualização completa.
+    Retorna (modo, linhas de origem processadas, segundos).
+    """
+    tabela_origem, comandos_completo, comandos_incremental = MATERIALIZADAS[nome]
+    inicio = time.perf_counter()
+
+    ultimo_id, _ = ler_marca(conn, tabela_origem, processo=nome)
+    ate_id, ate_data = marca_atual(conn, tabela_origem)
+    completo = completo or ultimo_id == 0 or ultimo_id > ate_id
+    parametros = {
+        'ultimo_id': 0 if completo else ultimo_id,
+        'ate_id': ate_id,
+        'agora': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+    conn.execute("BEGIN")
+    try:
+        if completo:
+            conn.execute(f"DELETE FROM {nome}")
+        for comando in comandos_completo if completo else comandos_incremental:
+            conn.execute(comando, parametros)
+        gravar_marca(conn, tabela_origem, ate_id, ate_data, processo=nome)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return ('completa' if completo else 'incremental'), ate_id - parametros['ultimo_id'], time.perf_counter() - inicio
+
+
+def atualizar_materializadas(conn, completo=False):
+    """
+    Atualiza todos os resumos e imprime o tempo de cada um
+    """
+    instalar_materializadas(conn)
+    resultados = {}
+    for nome in MATERIALIZADAS:
+        modo, linhas, segundos = atualizar_materializada(conn, nome, completo=completo)
+        resultados[nome] = {'modo': modo, 'linhas': linhas, 'segundos': segundos}
+        print(f"✓ {nome}: atualização {modo} ({linhas:,} linhas de origem) em {segundos:.2f}s")
+    return resultados
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Atualiza as tabelas materializadas (mv_*) do banco")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db")
+    parser.add_argument("--completo", action="store_true", help="recalcula os resumos do zero")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.banco, isolation_level=None)
+    try:
+        atualizar_materializadas(conn, completo=args.completo)
+    finally:
+        conn.close()
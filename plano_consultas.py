@@ -0,0 +1,231 @@
+"""
+Plano e Tempo das Consultas Analíticas
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Mede o efeito dos índices da carga analítica (create_tables_sqlite.sql) nas
+consultas reais do projeto: atualização completa dos resumos materializados
+(materializacao.py), conjuntos de features de ML e perfil de clientes
+(feature_store.py).
+
+Trabalha sobre uma cópia do banco, em dois cenários:
+- antes: índices de uma coluna que o script tinha (INDICES_ANTERIORES), sem
+  os da carga analítica
+- depois: índices atuais do script (carregar_sqlite.aplicar_indices)
+Nos dois é feito ANALYZE antes de medir. Para cada consulta mostra o menor
+tempo entre as repetições e o EXPLAIN QUERY PLAN de cada cenário. Os
+resumos são recalculados dentro de uma transação desfeita ao final
+(ROLLBACK), então a cópia não muda entre as medições.
+
+Com --aplicar, depois de medir aplica os índices do script no próprio banco.
+
+Uso:
+    python plano_consultas.py --banco vendas_carros_esportivos.db
+    python plano_consultas.py --clientes 200000
+    python plano_consultas.py --aplicar
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from carregar_sqlite import DB_PATH, SQL_PATH, aplicar_indices
+from dimensao_datas import atualizar_datas
+from feature_store import QUERY_CLASSIFICACAO, QUERY_PERFIL_CLIENTES, QUERY_REGRESSAO
+from materializacao import MATERIALIZADAS, instalar_materializadas
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+REPETICOES = 3
+
+# Índices da carga analítica (create_tables_sqlite.sql), ausentes no cenário "antes"
+INDICES_ANALITICOS = [
+    'idx_vendas_concluidas_cliente',
+    'idx_vendas_concluidas_vendedor',
+    'idx_vendas_concluidas_veiculo',
+    'idx_test_drives_veiculo_resultado',
+    'idx_test_drives_cliente_avaliacao'
+]
+
+# Índices de uma coluna do script original, recriados no cenário "antes"
+# (só idx_vendas_status foi removido do script; os de chave estrangeira continuam)
+INDICES_ANTERIORES = [
+    "CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas(cliente_id)",
+    "CREATE INDEX IF NOT EXISTS idx_vendas_veiculo ON vendas(veiculo_id)",
+    "CREATE INDEX IF NOT EXISTS idx_vendas_vendedor ON vendas(vendedor_id)",
+    "CREATE INDEX IF NOT EXISTS idx_vendas_status ON vendas(status_venda)",
+    "CREATE INDEX IF NOT EXISTS idx_test_drives_cliente ON test_drives(cliente_id)",
+    "CREATE INDEX IF NOT EXISTS idx_test_drives_resultou_venda ON test_drives(resultou_venda)"
+]
+
+# Consultas medidas: nome -> (comandos, tabela de origem dos IDs, resumo mv_* recalculado)
+CONSULTAS = {
+    **{nome: (comandos, origem, nome) for nome, (origem, comandos, _) in MATERIALIZADAS.items()},
+    'features_regressao': ([QUERY_REGRESSAO], 'vendas', None),
+    'features_classificacao': ([QUERY_CLASSIFICACAO], 'test_drives', None),
+    'perfil_clientes': ([QUERY_PERFIL_CLIENTES], None, None)
+}
+
+COLUNAS_ID = {'vendas': 'venda_id', 'test_drives': 'test_drive_id'}
+
+# ===============================================
+# MEDIÇÃO
+# ===============================================
+
+def preparar_banco(conn):
+    """
+    Colunas de datas, dim_datas e tabelas mv_* que as consultas (e os
+    índices do script) usam, para bancos criados antes delas
+    """
+    atualizar_datas(conn)
+    instalar_materializadas(conn)
+
+
+def _parametros(conn, origem):
+    """
+    Intervalo completo de IDs da tabela de origem (como na carga completa)
+    """
+    ate_id = 0
+    if origem is not None:
+        ate_id = conn.execute(f"SELECT COALESCE(MAX({COLUNAS_ID[origem]}), 0) FROM {origem}").fetchone()[0]
+    return {'ultimo_id': 0, 'ate_id': ate_id, 'agora': '1970-01-01 00:00:00'}
+
+
+def plano(conn, comandos, parametros):
+    """
+    Linhas do EXPLAIN QUERY PLAN de cada comando, indentadas pela árvore
+    """
+    linhas = []
+    for comando in comandos:
+        nivel = {0: 0}
+        for id_no, pai, _, detalhe in conn.execute(f"EXPLAIN QUERY PLAN {comando}", parametros):
+            nivel[id_no] = nivel.get(pai, 0) + 1
+            linhas.append('  ' * (nivel[id_no] - 1) + detalhe)
+    return linhas
+
+
+def executar(conn, comandos, parametros, resumo=None):
+    """
+    Executa os comandos lendo todas as linhas; para um resumo mv_*, refaz a
+    atualização completa e desfaz. Retorna os segundos.
+    """
+    inicio = time.perf_counter()
+    if resumo is not None:
+        conn.execute("BEGIN")
+        try:
+            conn.execute(f"DELETE FROM {resumo}")
+            for comando in comandos:
+                conn.execute(comando, parametros)
+        finally:
+            conn.execute("ROLLBACK")
+    else:
+        for comando in comandos:
+            cursor = conn.execute(comando, parametros)
+            while cursor.fetchmany(50_000):
+                pass
+    return time.perf_counter() - inicio
+
+
+def avaliar(conn, repeticoes=REPETICOES):
+    """
+    {consulta: {'segundos': menor tempo, 'plano': [...]}} no estado atual dos índices
+    """
+    conn.execute("ANALYZE")
+    resultados = {}
+    for nome, (comandos, origem, resumo) in CONSULTAS.items():
+        parametros = _parametros(conn, origem)
+        executar(conn, comandos, parametros, resumo)  # aquecimento (cache de páginas)
+        resultados[nome] = {
+            'segundos': min(executar(conn, comandos, parametros, resumo) for _ in range(repeticoes)),
+            'plano': plano(conn, comandos, parametros)
+        }
+    return resultados
+
+# ===============================================
+# COMPARAÇÃO ANTES x DEPOIS
+# ===============================================
+
+def comparar_indices(db_path=DB_PATH, sql_path=SQL_PATH, repeticoes=REPETICOES):
+    """
+    Mede as consultas em uma cópia do banco com os índices anteriores e com
+    os atuais do script e imprime tempos e planos.
+    Retorna {'antes': {...}, 'depois': {...}}.
+    """
+    diretorio = tempfile.mkdtemp(prefix='plano_consultas_')
+    try:
+        copia = os.path.join(diretorio, 'copia.db')
+        shutil.copyfile(db_path, copia)
+        conn = sqlite3.connect(copia, isolation_level=None)
+        try:
+            preparar_banco(conn)
+
+            print(f"\n📊 Medindo com os índices anteriores ({repeticoes} repetições)...")
+            for nome in INDICES_ANALITICOS:
+                conn.execute(f"DROP INDEX IF EXISTS {nome}")
+            for comando in INDICES_ANTERIORES:
+                conn.execute(comando)
+            antes = avaliar(conn, repeticoes)
+
+            segundos = aplicar_indices(conn, sql_path)
+            print(f"✓ Índices do script aplicados em {segundos:.2f}s")
+            print(f"📊 Medindo com os índices atuais ({repeticoes} repetições)...")
+            depois = avaliar(conn, repeticoes)
+        finally:
+            conn.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    print("\n" + "="*70)
+    print("CONSULTAS ANALÍTICAS: ANTES x DEPOIS DOS ÍNDICES")
+    print("="*70)
+    print(f"{'consulta':<28} {'antes':>11} {'depois':>11} {'ganho':>9}")
+    for nome in CONSULTAS:
+        segundos_antes, segundos_depois = antes[nome]['segundos'], depois[nome]['segundos']
+        ganho = segundos_antes / segundos_depois if segundos_depois > 0 else float('inf')
+        print(f"{nome:<28} {segundos_antes*1000:>9.1f}ms {segundos_depois*1000:>9.1f}ms {ganho:>8.1f}x")
+
+    print("\n🎯 Planos (EXPLAIN QUERY PLAN):")
+    for nome in CONSULTAS:
+        print(f"\n   {nome}")
+        for cenario, resultados in [('antes', antes), ('depois', depois)]:
+            print(f"      {cenario}:")
+            for linha in resultados[nome]['plano']:
+                print(f"         {linha}")
+    return {'antes': antes, 'depois': depois}
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN e tempo das consultas, antes e depois dos índices analíticos")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db (é medida uma cópia)")
+    parser.add_argument("--clientes", type=int, default=None,
+                        help="mede em uma base sintética com este nº de clientes em vez de --banco")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES, help="execuções por consulta (vale a menor)")
+    parser.add_argument("--aplicar", action="store_true", help="aplica os índices do script em --banco ao final")
+    args = parser.parse_args()
+
+    if args.clientes:
+        from benchmark_perfil_clientes import criar_banco
+        diretorio_base = tempfile.mkdtemp(prefix='plano_consultas_base_')
+        try:
+            print(f"\n📊 Preparando base com {args.clientes:,} clientes...")
+            comparar_indices(criar_banco(args.clientes, diretorio_base), repeticoes=args.repeticoes)
+        finally:
+            shutil.rmtree(diretorio_base, ignore_errors=True)
+    else:
+        comparar_indices(args.banco, repeticoes=args.repeticoes)
+
+    if args.aplicar:
+        conn = sqlite3.connect(args.banco, isolation_level=None)
+        try:
+            preparar_banco(conn)
+            print(f"\n✓ Índices do script aplicados em {args.banco} em {aplicar_indices(conn):.2f}s")
+        finally:
+            conn.close()
@@ -0,0 +1,377 @@
+"""
+Pontuação em Lote (Batch Scoring)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Aplica a versão mais recente dos modelos de regressão e classificação do
+registro (registro_modelos.py) em lote, fora do Streamlit:
+- 'test_drives': probabilidade de conversão de cada test drive em aberto
+  (resultou_venda = 0)
+- 'catalogo': para cada cliente x veículo do catálogo, valor previsto de
+  venda e probabilidade de conversão em um cenário padrão (CENARIO_PADRAO)
+
+As linhas são lidas em blocos do SQLite (faixas de ID) ou dos arquivos
+Parquet da pasta Dados/, as features são montadas com as mesmas funções do
+feature_store e os encoders guardados com o modelo, cada bloco é pontuado de uma
+vez (scaler.transform + predict vetorizados) e o resultado é gravado em massa
+nas tabelas previsoes_* do banco ou em Parquet.
+
+Com --processos N, os blocos são pontuados por N processos. Os modelos são
+abertos no processo principal antes de criar o pool e os workers (fork)
+herdam essas páginas: uma só cópia das florestas na memória, em vez de uma
+desserialização por worker (ver registro_modelos.py).
+
+Uso:
+    python pontuacao_lote.py test_drives catalogo
+    python pontuacao_lote.py catalogo --origem parquet --saida parquet
+    python pontuacao_lote.py catalogo --processos 4
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from armazenamento_colunar import EscritorParquet
+from carregar_sqlite import DIRETORIO_DADOS, inserir_tabela
+from dimensao_datas import atualizar_datas
+from esquema_dados import aplicar_esquema
+from feature_store import DB_PATH, consulta_classificacao, preparar_classificacao, preparar_regressao
+from registro_modelos import DIRETORIO_REGISTRO, carregar
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+TAMANHO_BLOCO = 100_000
+
+# Condições assumidas para o par cliente x veículo (as mesmas da página de previsões)
+CENARIO_PADRAO = {
+    'forma_pagamento': 'Financiamento',
+    'numero_parcelas': 60,
+    'desconto_percentual': 5.0,
+    'avaliacao': 5,
+    'dia_semana': 6,  # sábado (strftime('%w'))
+    'hora': 14
+}
+
+SQL_TABELAS_PREVISOES = [
+    """
+    CREATE TABLE IF NOT EXISTS previsoes_test_drives (
+        test_drive_id INTEGER PRIMARY KEY,
+        probabilidade_conversao REAL NOT NULL,
+        gerado_em TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS previsoes_catalogo (
+        cliente_id INTEGER NOT NULL,
+        veiculo_id INTEGER NOT NULL,
+        valor_previsto REAL,
+        probabilidade_conversao REAL,
+        gerado_em TEXT NOT NULL,
+        PRIMARY KEY (cliente_id, veiculo_id)
+    )
+    """
+]
+
+QUERY_CATALOGO = """
+SELECT
+    c.cliente_id,
+    ve.veiculo_id,
+    CAST((:dia_referencia - c.dia_nascimento) / 365.25 AS INTEGER) as idade_cliente,
+    c.genero,
+    c.renda_anual,
+    ve.potencia_cv,
+    ve.cilindradas,
+    ve.ano_fabricacao,
+    ve.categoria,
+    ve.marca,
+    ve.preco_base
+FROM clientes c
+CROSS JOIN veiculos ve
+WHERE c.cliente_id > :ultimo_id AND c.cliente_id <= :ate_id
+ORDER BY c.cliente_id, ve.veiculo_id
+"""
+
+# Só os test drives em aberto: os convertidos ficam fora já no SQLite
+QUERY_TEST_DRIVES_ABERTOS = consulta_classificacao(somente_abertos=True)
+
+COLUNAS_CLIENTE = ['cliente_id', 'data_nascimento', 'genero', 'renda_anual']
+COLUNAS_VEICULO = ['veiculo_id', 'potencia_cv', 'cilindradas', 'ano_fabricacao', 'categoria', 'marca', 'preco_base']
+
+# ===============================================
+# MODELOS
+# ===============================================
+
+def _categorias_conhecidas(df, encoders):
+    """
+    Máscara das linhas cujas categorias existem nos encoders do treino
+    (categorias novas não têm código e ficam sem previsão)
+    """
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, encoder in encoders.items():
+        if coluna in df.columns:
+            mascara &= df[coluna].astype(str).isin(encoder.classes_).to_numpy()
+    return mascara
+
+# ===============================================
+# FONTES (BLOCOS DE LINHAS BRUTAS)
+# ===============================================
+#
+# Cada fonte devolve blocos com as mesmas colunas das consultas do
+# feature_store, para passar pelas mesmas funções de preparação.
+
+def _faixas_id(conn, tabela, coluna_id, tamanho):
+    maior = conn.execute(f"SELECT COALESCE(MAX({coluna_id}), 0) FROM {tabela}").fetchone()[0]
+    for inicio in range(0, maior, tamanho):
+        yield inicio, min(inicio + tamanho, maior)
+
+
+def test_drives_sqlite(conn, tamanho=TAMANHO_BLOCO):
+    for ultimo_id, ate_id in _faixas_id(conn, 'test_drives', 'test_drive_id', tamanho):
+        yield aplicar_esquema(pd.read_sql(QUERY_TEST_DRIVES_ABERTOS, conn,
+                                          params={'ultimo_id': ultimo_id, 'ate_id': ate_id}))
+
+
+def catalogo_sqlite(conn, tamanho=TAMANHO_BLOCO):
+    # Blocos de clientes; cada cliente gera uma linha por veículo
+    n_veiculos = max(1, conn.execute("SELECT COUNT(*) FROM veiculos").fetchone()[0])
+    dia_referencia = (date.today() - date(1970, 1, 1)).days  # mesma escala de clientes.dia_nascimento
+    for ultimo_id, ate_id in _faixas_id(conn, 'clientes', 'cliente_id', max(1, tamanho // n_veiculos)):
+        yield aplicar_esquema(pd.read_sql(QUERY_CATALOGO, conn, params={
+            'ultimo_id': ultimo_id, 'ate_id': ate_id, 'dia_referencia': dia_referencia
+        }))
+
+
+def _idade(referencia, nascimento):
+    # Mesma conta do SQL: diferença em dias fracionários (julianday) / 365.25
+    return ((referencia - nascimento) / pd.Timedelta(days=1) / 365.25).astype(int)
+
+
+def _lotes_parquet(caminho, colunas, tamanho):
+    for lote in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho, columns=colunas):
+        yield aplicar_esquema(lote.to_pandas(date_as_object=False))
+
+
+def _dimensoes_parquet(diretorio):
+    clientes = aplicar_esquema(pq.read_table(os.path.join(diretorio, 'clientes.parquet'),
+                                             columns=COLUNAS_CLIENTE).to_pandas(date_as_object=False))
+    veiculos = aplicar_esquema(pq.read_table(os.path.join(diretorio, 'veiculos.parquet'),
+                                             columns=COLUNAS_VEICULO).to_pandas(date_as_object=False))
+    return clientes, veiculos
+
+
+def test_drives_parquet(diretorio=DIRETORIO_DADOS, tamanho=TAMANHO_BLOCO):
+    clientes, veiculos = _dimensoes_parquet(diretorio)
+    colunas = ['test_drive_id', 'cliente_id', 'veiculo_id', 'data_test_drive', 'avaliacao', 'resultou_venda']
+    for bloco in _lotes_parquet(os.path.join(diretorio, 'test_drives.parquet'), colunas, tamanho):
+        bloco = bloco[bloco['resultou_venda'] == 0]
+        bloco = bloco.merge(clientes, on='cliente_id').merge(veiculos, on='veiculo_id')
+        datas = pd.to_datetime(bloco['data_test_drive'])
+        bloco['idade_cliente'] = _idade(datas, bloco['data_nascimento'])
+        bloco['dia_semana'] = (datas.dt.dayofweek + 1) % 7  # mesma numeração do strftime('%w')
+        bloco['hora'] = datas.dt.hour
+        yield bloco.sort_values('test_drive_id').reset_index(drop=True)
+
+
+def catalogo_parquet(diretorio=DIRETORIO_DADOS, tamanho=TAMANHO_BLOCO):
+    clientes, veiculos = _dimensoes_parquet(diretorio)
+    referencia = pd.Timestamp(date.today())
+    por_bloco = max(1, tamanho // max(1, len(veiculos)))
+    for inicio in range(0, len(clientes), por_bloco):
+        bloco = clientes.iloc[inicio:inicio + por_bloco].merge(veiculos, how='cross')
+        bloco['idade_cliente'] = _idade(referencia, bloco['data_nascimento'])
+        yield bloco
+
+# ===============================================
+# PONTUAÇÃO
+# ===============================================
+
+def _com_cenario(bloco):
+    for coluna, valor in CENARIO_PADRAO.items():
+        bloco[coluna] = valor
+    return aplicar_esquema(bloco)
+
+
+def _pontuar_test_drives(blocos, modelos, contagem):
+    gerado_em = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    modelo = modelos['classificacao']
+    for bloco in blocos:
+        bloco = bloco[_categorias_conhecidas(bloco, modelo.encoders)].copy()
+        contagem['lidas'] += len(bloco)
+        if bloco.empty:
+            continue
+        preparar_classificacao(bloco, modelo.encoders)
+        # Bloco inteiro de uma vez: scaler.transform + predict_proba vetorizados
+        yield pd.DataFrame({
+            'test_drive_id': bloco['test_drive_id'].to_numpy(),
+            'probabilidade_conversao': modelo.prever(bloco),
+            'gerado_em': gerado_em
+        })
+
+
+def _pontuar_catalogo(blocos, modelos, contagem):
+    gerado_em = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for bloco in blocos:
+        bloco = _com_cenario(bloco)
+        contagem['lidas'] += len(bloco)
+        resultado = pd.DataFrame({
+            'cliente_id': bloco['cliente_id'].to_numpy(),
+            'veiculo_id': bloco['veiculo_id'].to_numpy(),
+            'valor_previsto': np.nan,
+            'probabilidade_conversao': np.nan,
+            'gerado_em': gerado_em
+        })
+        # Veículos nunca vendidos (ou categorias novas) ficam sem valor previsto
+        for tarefa, coluna, preparar in (('regressao', 'valor_previsto', preparar_regressao),
+                                         ('classificacao', 'probabilidade_conversao', preparar_classificacao)):
+            mascara = _categorias_conhecidas(bloco, modelos[tarefa].encoders)
+            if mascara.any():
+                parte = bloco[mascara].copy()
+                preparar(parte, modelos[tarefa].encoders)
+                resultado.loc[mascara, coluna] = modelos[tarefa].prever(parte)
+        yield resultado
+
+
+# ===============================================
+# PONTUAÇÃO EM PARALELO
+# ===============================================
+
+# Modelos do processo principal, herdados pelos workers no fork
+_MODELOS_WORKER = {}
+
+
+def _pontuar_bloco(alvo, bloco):
+    contagem = {'lidas': 0}
+    resultados = list(ALVOS[alvo]['pontuar']([bloco], _MODELOS_WORKER, contagem))
+    return resultados, contagem['lidas']
+
+
+def _pontuar_em_paralelo(alvo, blocos, modelos, contagem, processos):
+    """
+    Pontua os blocos em `processos` workers, devolvendo os resultados na
+    ordem dos blocos (no máximo 2 blocos por worker em memória ao mesmo tempo)
+    """
+    # Abre modelo, scaler e encoders antes do fork: os workers usam as
+    # mesmas páginas em vez de desserializar uma cópia cada um
+    for modelo in modelos.values():
+        modelo.modelo, modelo.scaler, modelo.encoders
+    _MODELOS_WORKER.clear()
+    _MODELOS_WORKER.update(modelos)
+
+    contexto = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        pendentes = deque()
+        for bloco in blocos:
+            pendentes.append(pool.submit(_pontuar_bloco, alvo, bloco))
+            if len(pendentes) < 2 * processos:
+                continue
+            resultados, lidas = pendentes.popleft().result()
+            contagem['lidas'] += lidas
+            yield from resultados
+        while pendentes:
+            resultados, lidas = pendentes.popleft().result()
+            contagem['lidas'] += lidas
+            yield from resultados
+
+# ===============================================
+# ALVOS
+# ===============================================
+
+ALVOS = {
+    'test_drives': {
+        'tabela': 'previsoes_test_drives',
+        'tarefas': ['classificacao'],
+        'fontes': {'sqlite': test_drives_sqlite, 'parquet': test_drives_parquet},
+        'pontuar': _pontuar_test_drives
+    },
+    'catalogo': {
+        'tabela': 'previsoes_catalogo',
+        'tarefas': ['regressao', 'classificacao'],
+        'fontes': {'sqlite': catalogo_sqlite, 'parquet': catalogo_parquet},
+        'pontuar': _pontuar_catalogo
+    }
+}
+
+
+def executar_pontuacao(alvo, db_path=DB_PATH, origem='sqlite', saida='sqlite',
+                       diretorio_dados=DIRETORIO_DADOS, diretorio_registro=DIRETORIO_REGISTRO,
+                       tamanho_bloco=TAMANHO_BLOCO, processos=1):
+    """
+    Pontua um alvo ('test_drives' ou 'catalogo') e grava o resultado.
+    Com processos > 1, os blocos são pontuados em paralelo (fork).
+    Retorna (linhas gravadas, segundos).
+    """
+    definicao = ALVOS[alvo]
+    inicio = time.perf_counter()
+    if processos > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print("⚠️ Sem fork neste sistema: pontuação em um processo só")
+        processos = 1
+
+    modelos = {tarefa: carregar(tarefa, diretorio=diretorio_registro) for tarefa in definicao['tarefas']}
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        atualizar_datas(conn)
+        fonte = definicao['fontes'][origem]
+        blocos = fonte(conn, tamanho_bloco) if origem == 'sqlite' else fonte(diretorio_dados, tamanho_bloco)
+        contagem = {'lidas': 0}
+        if processos > 1:
+            resultados = _pontuar_em_paralelo(alvo, blocos, modelos, contagem, processos)
+        else:
+            resultados = definicao['pontuar'](blocos, modelos, contagem)
+
+        if saida == 'sqlite':
+            for comando in SQL_TABELAS_PREVISOES:
+                conn.execute(comando)
+            # Uma transação para todos os blocos; a pontuação anterior é apagada
+            # nela (test drives que deixaram de estar em aberto saem da tabela)
+            gravadas, _ = inserir_tabela(conn, definicao['tabela'], resultados, limpar=True)
+            destino = definicao['tabela']
+        else:
+            destino = os.path.join(diretorio_dados, f"{definicao['tabela']}.parquet")
+            gravadas = 0
+            with EscritorParquet(destino) as escritor:
+                for resultado in resultados:
+                    escritor.escrever(resultado)
+                    gravadas += len(resultado)
+    finally:
+        conn.close()
+
+    segundos = time.perf_counter() - inicio
+    vazao = contagem['lidas'] / segundos if segundos > 0 else float('inf')
+    versoes = ', '.join(f"{tarefa} v{modelo.versao:03d}" for tarefa, modelo in modelos.items())
+    print(f"✓ {alvo} ({versoes}): {contagem['lidas']:,} linhas pontuadas -> {destino} "
+          f"em {segundos:.2f}s ({vazao:,.0f} linhas/s)")
+    return gravadas, segundos
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pontua em lote test drives e o catálogo com os modelos salvos")
+    parser.add_argument("alvos", nargs="+", choices=list(ALVOS), help="o que pontuar")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db (origem e destino)")
+    parser.add_argument("--origem", choices=['sqlite', 'parquet'], default='sqlite')
+    parser.add_argument("--saida", choices=['sqlite', 'parquet'], default='sqlite')
+    parser.add_argument("--diretorio-dados", default=DIRETORIO_DADOS, help="pasta dos arquivos Parquet")
+    parser.add_argument("--registro", default=DIRETORIO_REGISTRO, help="pasta do registro de modelos")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO, help="linhas por bloco")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="processos pontuando blocos em paralelo (compartilham os modelos)")
+    args = parser.parse_args()
+
+    for alvo in args.alvos:
+        executar_pontuacao(alvo, db_path=args.banco, origem=args.origem, saida=args.saida,
+                           diretorio_dados=args.diretorio_dados, diretorio_registro=args.registro,
+                           tamanho_bloco=args.tamanho_bloco, processos=args.processos)
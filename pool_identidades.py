@@ -0,0 +1,135 @@
+"""
+Pool de Identidades Sintéticas
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Chamar fake.name(), fake.email() e fake.phone_number() linha a linha domina o
+tempo de geração de clientes. Este módulo gera uma única vez um pool compacto
+de nomes e telefones com o Faker (locale pt_BR), guarda em disco como arrays
+de strings do NumPy (.npz) e compõe as identidades de cada linha por índice.
+
+Os e-mails são montados a partir do nome sorteado + ID da linha, o que garante
+unicidade (restrição UNIQUE de clientes.email em create_tables_sqlite.sql).
+"""
+
+import os
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+TAMANHO_POOL = 50_000
+SEED_POOL = 42
+LOCALE_POOL = 'pt_BR'
+
+DIRETORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dados', 'cache')
+
+DOMINIOS_EMAIL = ['example.com', 'example.net', 'example.org']
+
+# Pronomes de tratamento gerados pelo Faker que não entram no e-mail
+PRONOMES_TRATAMENTO = {'sr', 'sra', 'srta', 'dr', 'dra'}
+
+# ===============================================
+# CONSTRUÇÃO E CACHE DO POOL
+# ===============================================
+
+def _slug_email(nome):
+    """
+    Converte um nome em prefixo de e-mail: 'Dra. Vitória Campos' -> 'vitoria.campos'
+    """
+    texto = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii').lower()
+    partes = [
+        ''.join(c for c in parte if c.isalpha())
+        for parte in texto.split()
+        if parte.rstrip('.') not in PRONOMES_TRATAMENTO
+    ]
+    partes = [parte for parte in partes if parte]
+    if not partes:
+        return 'cliente'
+    return '.'.join([partes[0], partes[-1]]) if len(partes) > 1 else partes[0]
+
+
+def construir_pool_identidades(tamanho=TAMANHO_POOL, seed=SEED_POOL, locale=LOCALE_POOL):
+    """
+    Gera o pool com o Faker: nomes, prefixos de e-mail e telefones
+    """
+    print(f"Construindo pool de {tamanho:,} identidades ({locale})...")
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+
+    nomes = [fake.name() for _ in range(tamanho)]
+    telefones = [fake.phone_number() for _ in range(tamanho)]
+
+    pool = {
+        'nomes': np.array(nomes),
+        'slugs': np.array([_slug_email(nome) for nome in nomes]),
+        'telefones': np.array(telefones)
+    }
+    print("✓ Pool de identidades construído")
+    return pool
+
+
+def caminho_pool(tamanho=TAMANHO_POOL, seed=SEED_POOL, locale=LOCALE_POOL, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Caminho do arquivo de cache do pool para uma combinação de parâmetros
+    """
+    return os.path.join(diretorio_cache, f"pool_identidades_{locale}_{tamanho}_{seed}.npz")
+
+
+@lru_cache(maxsize=None)
+def carregar_pool_identidades(tamanho=TAMANHO_POOL, seed=SEED_POOL, locale=LOCALE_POOL,
+                              diretorio_cache=DIRETORIO_CACHE):
+    """
+    Carrega o pool do cache em disco, construindo-o na primeira vez.
+    O resultado também fica em memória para chamadas seguintes no processo.
+    """
+    caminho = caminho_pool(tamanho, seed, locale, diretorio_cache)
+    if os.path.exists(caminho):
+        with np.load(caminho) as arquivo:
+            return {chave: arquivo[chave] for chave in arquivo.files}
+
+    pool = construir_pool_identidades(tamanho, seed, locale)
+    os.makedirs(diretorio_cache, exist_ok=True)
+    # Grava em arquivo temporário e renomeia, para não deixar cache corrompido
+    temporario = f"{caminho}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(temporario, **pool)
+    os.replace(temporario, caminho)
+    return pool
+
+# ===============================================
+# COMPOSIÇÃO DAS IDENTIDADES
+# ===============================================
+
+def compor_identidades(ids, rng, pool=None):
+    """
+    Compõe nome, e-mail e telefone para cada ID sorteando índices do pool.
+
+    O e-mail usa o ID da linha como sufixo, então é único sempre que os IDs
+    forem únicos. rng pode ser um numpy.random.Generator ou o módulo np.random.
+    """
+    if pool is None:
+        pool = carregar_pool_identidades()
+    ids = np.asarray(ids)
+    n = len(ids)
+    tamanho = len(pool['nomes'])
+
+    idx_nome = (rng.random(n) * tamanho).astype(np.int64)
+    idx_telefone = (rng.random(n) * tamanho).astype(np.int64)
+    idx_dominio = (rng.random(n) * len(DOMINIOS_EMAIL)).astype(np.int64)
+
+    emails = (
+        pd.Series(pool['slugs'][idx_nome], dtype=object)
+        + pd.Series(ids).astype(str).to_numpy(dtype=object)
+        + '@'
+        + np.asarray(DOMINIOS_EMAIL, dtype=object)[idx_dominio]
+    )
+    return pd.DataFrame({
+        'nome': pool['nomes'][idx_nome],
+        'email': emails.to_numpy(),
+        'telefone': pool['telefones'][idx_telefone]
+    })
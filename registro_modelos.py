@@ -0,0 +1,306 @@
+"""
+Registro de Modelos
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Guarda cada modelo treinado junto com tudo que é preciso para usá-lo:
+scaler, lista de features, encoders das categóricas, impressão digital dos
+dados de treino (feature_store) e métricas. Cada registro ganha uma versão
+nova, em Modelos/registro/<nome>/v<NNN>/:
+
+    metadados.json   nome, versão, classe, features, impressão, métricas
+    modelo.joblib    estimador do scikit-learn
+    scaler.joblib    StandardScaler usado no treino
+    encoders.joblib  LabelEncoders usados no treino
+
+Os .joblib são gravados sem compressão e lidos com mmap_mode='r': os
+arrays numpy ficam mapeados do arquivo (páginas compartilhadas pelo sistema
+operacional entre processos) em vez de copiados para cada processo. A
+leitura é preguiçosa: carregar() lê só o metadados.json, e modelo, scaler e
+encoders são abertos no primeiro acesso.
+
+Atenção com florestas: o scikit-learn copia os nós das árvores para memória
+própria ao desserializar, então o mmap sozinho não as compartilha. Para
+vários workers usarem uma só cópia, carregue o modelo (ex.: artefato.modelo)
+no processo principal ANTES de criar o pool: os workers criados por fork
+herdam as páginas do modelo já carregado. É o que pontuacao_lote.py faz com
+--processos.
+
+Uso:
+    python registro_modelos.py listar
+    python registro_modelos.py importar regressao classificacao
+"""
+
+import errno
+import json
+import math
+import numbers
+import os
+import shutil
+from datetime import datetime
+from functools import cached_property
+
+import joblib
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_MODELOS = os.path.join(DIRETORIO_BASE, 'Modelos')
+DIRETORIO_REGISTRO = os.path.join(DIRETORIO_MODELOS, 'registro')
+
+ARQUIVO_METADADOS = 'metadados.json'
+ARTEFATOS = ['modelo', 'scaler', 'encoders']
+
+# Arquivos soltos gravados pelo notebook antes do registro (importar_legado)
+ARQUIVOS_LEGADO = {
+    'regressao': ('modelo_regressao.pkl', 'scaler_regressao.pkl', 'features_regressao.pkl'),
+    'classificacao': ('modelo_classificacao.pkl', 'scaler_classificacao.pkl', 'features_classificacao.pkl')
+}
+
+# Modelos já abertos neste processo: {caminho da versão: ModeloRegistrado}
+_CARREGADOS = {}
+
+# ===============================================
+# MODELO REGISTRADO
+# ===============================================
+
+class ModeloRegistrado:
+    """
+    Uma versão do registro. Os metadados são lidos na criação; modelo,
+    scaler e encoders só quando acessados (e uma única vez).
+    """
+
+    def __init__(self, caminho, mmap_mode='r'):
+        self.caminho = caminho
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(caminho, ARQUIVO_METADADOS), encoding='utf-8') as arquivo:
+            self.metadados = json.load(arquivo)
+
+    def __repr__(self):
+        return f"ModeloRegistrado({self.nome!r}, versao={self.versao}, classe={self.metadados['classe']!r})"
+
+    def _abrir(self, artefato):
+        return joblib.load(os.path.join(self.caminho, f"{artefato}.joblib"), mmap_mode=self.mmap_mode)
+
+    @property
+    def nome(self):
+        return self.metadados['nome']
+
+    @property
+    def versao(self):
+        return self.metadados['versao']
+
+    @property
+    def features(self):
+        return self.metadados['features']
+
+    @property
+    def impressao(self):
+        return self.metadados['impressao']
+
+    @property
+    def metricas(self):
+        return self.metadados['metricas']
+
+    @cached_property
+    def modelo(self):
+        return self._abrir('modelo')
+
+    @cached_property
+    def scaler(self):
+        return self._abrir('scaler')
+
+    @cached_property
+    def encoders(self):
+        return self._abrir('encoders')
+
+    def prever(self, df):
+        """
+        Aplica scaler e modelo em um DataFrame com as colunas de features.
+        Classificadores retornam a probabilidade da classe 1.
+        """
+        X = self.scaler.transform(df[self.features])
+        if hasattr(self.modelo, 'predict_proba'):
+            return self.modelo.predict_proba(X)[:, 1]
+        return self.modelo.predict(X)
+
+# ===============================================
+# REGISTRO
+# ===============================================
+
+def _metricas_json(metricas):
+    """
+    Mantém só as métricas numéricas, como float (NaN vira null)
+    """
+    return {
+        nome: (None if math.isnan(float(valor)) else float(valor))
+        for nome, valor in (metricas or {}).items()
+        if isinstance(valor, numbers.Real) and not isinstance(valor, bool)
+    }
+
+
+def versoes(nome, diretorio=DIRETORIO_REGISTRO):
+    """
+    Versões registradas de um modelo, em ordem crescente
+    """
+    pasta = os.path.join(diretorio, nome)
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(int(item[1:]) for item in os.listdir(pasta)
+                  if item.startswith('v') and item[1:].isdigit())
+
+
+def registrar(nome, modelo, scaler, features, encoders, impressao, metricas=None,
+              diretorio=DIRETORIO_REGISTRO):
+    """
+    Grava uma nova versão do modelo e retorna o ModeloRegistrado.
+
+    impressao é a do conjunto de features usado no treino
+    (carregar_features(...)['impressao']); metricas aceita o dicionário de
+    resultados do comparar_modelos (só os valores numéricos são guardados).
+    """
+    pasta = os.path.join(diretorio, nome)
+    os.makedirs(pasta, exist_ok=True)
+
+    # Grava em uma pasta temporária e renomeia: quem estiver lendo o
+    # registro nunca vê uma versão pela metade
+    temporaria = os.path.join(pasta, f".tmp_{os.getpid()}")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    try:
+        for artefato, objeto in zip(ARTEFATOS, [modelo, scaler, encoders]):
+            joblib.dump(objeto, os.path.join(temporaria, f"{artefato}.joblib"))
+
+        while True:
+            versao = (versoes(nome, diretorio) or [0])[-1] + 1
+            metadados = {
+                'nome': nome,
+                'versao': versao,
+                'classe': type(modelo).__name__,
+                'features': list(features),
+                'impressao': impressao,
+                'metricas': _metricas_json(metricas),
+                'registrado_em': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            with open(os.path.join(temporaria, ARQUIVO_METADADOS), 'w', encoding='utf-8') as arquivo:
+                json.dump(metadados, arquivo, indent=2, ensure_ascii=False)
+            try:
+                os.rename(temporaria, os.path.join(pasta, f"v{versao:03d}"))
+                break
+            except OSError as erro:
+                # Pasta da versão já existe: outro processo registrou a mesma
+                # versão ao mesmo tempo. Qualquer outro erro (permissão, disco
+                # cheio...) não se resolve tentando de novo.
+                if erro.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    raise
+    except Exception:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+
+    print(f"✓ Modelo '{nome}' registrado: v{versao:03d} ({metadados['classe']})")
+    return carregar(nome, versao, diretorio)
+
+
+def carregar(nome, versao=None, diretorio=DIRETORIO_REGISTRO, mmap_mode='r'):
+    """
+    Retorna a versão pedida (a mais recente se versao=None) sem abrir os
+    artefatos. Cada versão é aberta uma vez por processo.
+    """
+    disponiveis = versoes(nome, diretorio)
+    if not disponiveis:
+        raise FileNotFoundError(
+            f"Nenhum modelo '{nome}' em {diretorio}. Registre pelo notebook ou com "
+            f"'python registro_modelos.py importar {nome}'."
+        )
+    versao = disponiveis[-1] if versao is None else versao
+    caminho = os.path.join(diretorio, nome, f"v{versao:03d}")
+    if not os.path.isdir(caminho):
+        raise FileNotFoundError(f"Versão v{versao:03d} do modelo '{nome}' não existe (disponíveis: {disponiveis})")
+
+    chave = (os.path.abspath(caminho), mmap_mode)
+    if chave not in _CARREGADOS:
+        _CARREGADOS[chave] = ModeloRegistrado(caminho, mmap_mode)
+    return _CARREGADOS[chave]
+
+
+def assinatura(nome, versao=None, diretorio=DIRETORIO_REGISTRO):
+    """
+    (caminho da versão, mtimes dos arquivos): muda quando uma versão nova é
+    registrada ou algum artefato é regravado. Só faz stat, sem abrir nada;
+    serve de chave para caches como o st.cache_resource do Streamlit.
+    """
+    caminho = carregar(nome, versao, diretorio).caminho
+    arquivos = [ARQUIVO_METADADOS] + [f"{artefato}.joblib" for artefato in ARTEFATOS]
+    return caminho, tuple(os.stat(os.path.join(caminho, arquivo)).st_mtime_ns for arquivo in arquivos)
+
+
+def listar(diretorio=DIRETORIO_REGISTRO):
+    """
+    Imprime e retorna os metadados de todas as versões registradas
+    """
+    registros = []
+    if os.path.isdir(diretorio):
+        for nome in sorted(os.listdir(diretorio)):
+            registros += [carregar(nome, versao, diretorio).metadados for versao in versoes(nome, diretorio)]
+
+    print(f"\n📊 Registro de modelos ({diretorio}):")
+    if not registros:
+        print("   (vazio)")
+    for metadados in registros:
+        metricas = ', '.join(f"{chave}={valor:.4f}" for chave, valor in metadados['metricas'].items()
+                             if valor is not None)
+        print(f"   {metadados['nome']} v{metadados['versao']:03d} | {metadados['classe']} | "
+              f"{metadados['registrado_em']} | dados {metadados['impressao']} | {metricas or '-'}")
+    return registros
+
+# ===============================================
+# IMPORTAÇÃO DOS ARQUIVOS SOLTOS
+# ===============================================
+
+def importar_legado(nome, diretorio_modelos=DIRETORIO_MODELOS, db_path=None, diretorio=DIRETORIO_REGISTRO):
+    """
+    Registra os .pkl soltos de Modelos/ (modelo, scaler e features). Encoders
+    e impressão vêm do feature store atual e as métricas do
+    configuracao_<nome>.json, quando existir.
+    """
+    from feature_store import DB_PATH, carregar_features
+
+    modelo, scaler, features = (joblib.load(os.path.join(diretorio_modelos, arquivo))
+                                for arquivo in ARQUIVOS_LEGADO[nome])
+    conjunto = carregar_features(nome, db_path=db_path or DB_PATH, preparar_banco=True)
+
+    metricas = {}
+    caminho_configuracao = os.path.join(diretorio_modelos, f"configuracao_{nome}.json")
+    if os.path.exists(caminho_configuracao):
+        with open(caminho_configuracao, encoding='utf-8') as arquivo:
+            configuracao = json.load(arquivo)
+        metricas = {'CV média': configuracao['candidatos'].get(configuracao['modelo'], {}).get('cv_media')}
+
+    return registrar(nome, modelo, scaler, features, conjunto['encoders'], conjunto['impressao'],
+                     metricas, diretorio)
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Registro versionado dos modelos de ML")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    subcomandos.add_parser("listar", help="lista as versões registradas")
+
+    importar = subcomandos.add_parser("importar", help="registra os .pkl soltos de Modelos/")
+    importar.add_argument("nomes", nargs="+", choices=list(ARQUIVOS_LEGADO))
+    importar.add_argument("--modelos", default=DIRETORIO_MODELOS, help="pasta dos .pkl")
+    importar.add_argument("--banco", default=None, help="arquivo .db (encoders e impressão)")
+
+    parser.add_argument("--registro", default=DIRETORIO_REGISTRO, help="pasta do registro")
+    args = parser.parse_args()
+
+    if args.comando == "importar":
+        for nome in args.nomes:
+            importar_legado(nome, args.modelos, args.banco, args.registro)
+    listar(args.registro)
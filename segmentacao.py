@@ -0,0 +1,440 @@
+"""
+Segmentação de Clientes (K-Means)
+Projeto: Sistema de Análise de Vendas de Carros Esportivos
+
+Escolha do número de clusters e treino do modelo de segmentação usado no
+notebook ml_clustering:
+- cada K candidato é avaliado em um processo do pool (inércia, silhouette e
+  Davies-Bouldin)
+- o silhouette é estimado em amostras estratificadas pelos clusters (custo
+  O(amostra²) em vez de O(n²)), repetidas para dar média e intervalo de
+  confiança de 95%
+- acima de LIMITE_MINIBATCH clientes usa MiniBatchKMeans
+- o modelo final (K e centróides) e o scaler vão para
+  Modelos/kmeans_segmentacao.pkl e Modelos/scaler_segmentacao.pkl
+- atualização incremental: só os clientes novos ou com atividade nova
+  desde a última execução são atribuídos ao centróide mais próximo; os
+  centróides são ajustados por mini-batch e o treino completo só roda
+  quando eles se afastam demais do último treino (ver SEGMENTAÇÃO INCREMENTAL)
+"""
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from carregar_sqlite import SQL_PATH, ler_comandos_sql, separar_indices
+from dimensao_datas import atualizar_datas
+from esquema_dados import aplicar_esquema
+from etl_incremental import gravar_marca, ler_marca
+from feature_store import COLUNAS_ID, DB_PATH, FEATURES_PERFIL_CLIENTES, carregar_features, consulta_perfil_clientes
+
+# ===============================================
+# CONFIGURAÇÕES
+# ===============================================
+
+DIRETORIO_MODELOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Modelos')
+ARQUIVO_MODELO = 'kmeans_segmentacao.pkl'
+ARQUIVO_SCALER = 'scaler_segmentacao.pkl'
+ARQUIVO_ESTADO = 'estado_segmentacao.pkl'
+
+SEED = 42
+K_CANDIDATOS = range(2, 11)
+
+# Acima deste número de clientes o K-Means completo dá lugar ao MiniBatchKMeans
+LIMITE_MINIBATCH = 100_000
+TAMANHO_LOTE = 4096
+
+# Silhouette estimado: REPETICOES_SILHOUETTE amostras de TAMANHO_AMOSTRA_SILHOUETTE
+TAMANHO_AMOSTRA_SILHOUETTE = 10_000
+REPETICOES_SILHOUETTE = 5
+CONFIANCA = 0.95
+
+# ===============================================
+# MODELO
+# ===============================================
+
+def criar_modelo(k, n_linhas, algoritmo='auto', seed=SEED):
+    """
+    KMeans (n_init=10, como no notebook) ou MiniBatchKMeans para bases grandes
+    """
+    if algoritmo == 'minibatch' or (algoritmo == 'auto' and n_linhas > LIMITE_MINIBATCH):
+        return MiniBatchKMeans(n_clusters=k, random_state=seed, n_init=3, batch_size=TAMANHO_LOTE)
+    return KMeans(n_clusters=k, random_state=seed, n_init=10)
+
+# ===============================================
+# SILHOUETTE POR AMOSTRAGEM
+# ===============================================
+
+def amostra_estratificada(rotulos, tamanho, rng):
+    """
+    Índices de uma amostra com a mesma proporção de cada cluster da base
+    (pelo menos 2 por cluster, para o silhouette ser definido)
+    """
+    indices = []
+    for cluster in np.unique(rotulos):
+        membros = np.flatnonzero(rotulos == cluster)
+        n = min(len(membros), max(2, int(round(tamanho * len(membros) / len(rotulos)))))
+        indices.append(rng.choice(membros, size=n, replace=False))
+    return np.concatenate(indices)
+
+
+def estimar_silhouette(X, rotulos, tamanho=TAMANHO_AMOSTRA_SILHOUETTE,
+                       repeticoes=REPETICOES_SILHOUETTE, seed=SEED):
+    """
+    Silhouette médio das amostras e intervalo de confiança (t de Student).
+    Se a base couber em uma amostra, calcula o valor exato (intervalo nulo).
+    """
+    if len(rotulos) <= tamanho:
+        valor = silhouette_score(X, rotulos)
+        return valor, valor, valor
+
+    rng = np.random.default_rng(seed)
+    valores = []
+    for _ in range(repeticoes):
+        indices = amostra_estratificada(rotulos, tamanho, rng)
+        valores.append(silhouette_score(X[indices], rotulos[indices]))
+    media = np.mean(valores)
+    margem = stats.t.ppf((1 + CONFIANCA) / 2, len(valores) - 1) * stats.sem(valores)
+    return media, media - margem, media + margem
+
+# ===============================================
+# AVALIAÇÃO DE K EM PARALELO
+# ===============================================
+
+# Dados compartilhados com os workers (preenchido pelo initializer do pool)
+_ESTADO_WORKER = {}
+
+
+def _inicializar_worker(estado):
+    _ESTADO_WORKER.clear()
+    _ESTADO_WORKER.update(estado)
+
+
+def _avaliar_k(k):
+    inicio = time.perf_counter()
+    X = _ESTADO_WORKER['X']
+    # Um thread por worker: o paralelismo já vem do pool
+    with threadpool_limits(limits=1):
+        modelo = criar_modelo(k, len(X), _ESTADO_WORKER['algoritmo'])
+        rotulos = modelo.fit_predict(X)
+        silhouette, ic_inferior, ic_superior = estimar_silhouette(X, rotulos)
+        davies_bouldin = davies_bouldin_score(X, rotulos)
+    return {
+        'k': k,
+        'inercia': modelo.inertia_,
+        'silhouette': silhouette,
+        'silhouette_ic_inferior': ic_inferior,
+        'silhouette_ic_superior': ic_superior,
+        'davies_bouldin': davies_bouldin,
+        'segundos': time.perf_counter() - inicio
+    }
+
+
+def avaliar_k(X_scaled, k_candidatos=K_CANDIDATOS, algoritmo='auto', n_workers=None):
+    """
+    Avalia cada K em paralelo; retorna um DataFrame (uma linha por K)
+    """
+    X_scaled = np.asarray(X_scaled)
+    k_candidatos = list(k_candidatos)
+    n_workers = max(1, min(n_workers or os.cpu_count(), len(k_candidatos)))
+    print(f"🔍 Avaliando K={k_candidatos[0]}..{k_candidatos[-1]} em {len(X_scaled):,} clientes "
+          f"({n_workers} workers)...")
+
+    resultados = []
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                             initargs=({'X': X_scaled, 'algoritmo': algoritmo},)) as pool:
+        for futuro in as_completed([pool.submit(_avaliar_k, k) for k in k_candidatos]):
+            r = futuro.result()
+            resultados.append(r)
+            print(f"   K={r['k']}: Inertia={r['inercia']:.2f}, Silhouette={r['silhouette']:.3f} "
+                  f"[{r['silhouette_ic_inferior']:.3f}, {r['silhouette_ic_superior']:.3f}] "
+                  f"em {r['segundos']:.2f}s")
+    return pd.DataFrame(resultados).sort_values('k').reset_index(drop=True)
+
+
+def escolher_k(avaliacao):
+    """
+    K com o maior silhouette estimado
+    """
+    return int(avaliacao.loc[avaliacao['silhouette'].idxmax(), 'k'])
+
+# ===============================================
+# TREINO E PERSISTÊNCIA
+# ===============================================
+
+def treinar_segmentacao(X_scaled, k, algoritmo='auto'):
+    """
+    Treina o modelo final; retorna (modelo, rótulos)
+    """
+    modelo = criar_modelo(k, len(X_scaled), algoritmo)
+    rotulos = modelo.fit_predict(X_scaled)
+    return modelo, rotulos
+
+
+def _gravar(objeto, caminho):
+    # Arquivo temporário + rename: quem estiver lendo nunca vê um .pkl pela metade
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    joblib.dump(objeto, temporario)
+    os.replace(temporario, caminho)
+
+
+def salvar_segmentacao(modelo, scaler, diretorio=DIRETORIO_MODELOS, rotulos=None):
+    """
+    Grava o modelo (K e centróides) e o scaler em Modelos/. Com os rótulos
+    do treino, grava também o estado da atualização incremental (tamanho de
+    cada cluster e centróides de referência para medir o drift).
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    caminho_modelo = os.path.join(diretorio, ARQUIVO_MODELO)
+    caminho_scaler = os.path.join(diretorio, ARQUIVO_SCALER)
+    _gravar(modelo, caminho_modelo)
+    _gravar(scaler, caminho_scaler)
+    if rotulos is not None:
+        _gravar({
+            'contagens': np.bincount(rotulos, minlength=modelo.n_clusters).astype(float),
+            'centroides_referencia': modelo.cluster_centers_.copy()
+        }, os.path.join(diretorio, ARQUIVO_ESTADO))
+    return caminho_modelo, caminho_scaler
+
+
+def executar_segmentacao(db_path=DB_PATH, k=None, algoritmo='auto', n_workers=None, diretorio=DIRETORIO_MODELOS):
+    """
+    Fluxo completo: perfil de clientes (feature store) -> escala -> escolha
+    de K (se não informado) -> treino -> Modelos/
+    """
+    conjunto = carregar_features('perfil_clientes', db_path=db_path, preparar_banco=True)
+    X = conjunto['dados'][FEATURES_PERFIL_CLIENTES].fillna(0)
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    avaliacao = None
+    if k is None:
+        avaliacao = avaliar_k(X_scaled, algoritmo=algoritmo, n_workers=n_workers)
+        k = escolher_k(avaliacao)
+    print(f"\n🎯 Treinando segmentação com K={k}...")
+    modelo, rotulos = treinar_segmentacao(X_scaled, k, algoritmo)
+    silhouette, ic_inferior, ic_superior = estimar_silhouette(X_scaled, rotulos)
+    print(f"📊 Silhouette: {silhouette:.3f} [{ic_inferior:.3f}, {ic_superior:.3f}]")
+
+    for caminho in salvar_segmentacao(modelo, scaler, diretorio, rotulos):
+        print(f"✓ {caminho}")
+    return modelo, scaler, avaliacao
+
+
+# ===============================================
+# SEGMENTAÇÃO INCREMENTAL
+# ===============================================
+#
+# Cada execução pega os clientes novos e os que tiveram vendas, test drives
+# ou serviços novos desde a última (marcas d'água do processo 'segmentacao'
+# em etl_marcas), recalcula só o perfil deles, atribui cada um ao centróide
+# mais próximo e grava o resultado em segmentos_clientes com UPSERT.
+#
+# Os centróides são ajustados com a regra do MiniBatchKMeans: cada centróide
+# anda em direção à média dos pontos novos atribuídos a ele, com peso
+# proporcional a quantos pontos já representava. Clientes alterados entram
+# como pontos novos (o perfil antigo não é descontado); o treino completo
+# corrige essa aproximação. Ele roda quando algum centróide se desloca mais
+# que LIMITE_DRIFT (em desvios padrão do scaler) do último treino completo.
+
+PROCESSO_SEGMENTACAO = 'segmentacao'
+TABELAS_ATIVIDADE = ['clientes', 'vendas', 'test_drives', 'servicos_pos_venda']
+LIMITE_DRIFT = 0.25
+
+SQL_TABELA_SEGMENTOS = """
+CREATE TABLE IF NOT EXISTS segmentos_clientes (
+    cliente_id INTEGER PRIMARY KEY,
+    cluster INTEGER NOT NULL,
+    distancia_centroide REAL NOT NULL,
+    atualizado_em TEXT NOT NULL
+)
+"""
+
+# Clientes com atividade no intervalo (marca, atual] de cada tabela (busca pela chave primária)
+SQL_CLIENTES_ALTERADOS = """
+INSERT OR IGNORE INTO temp.clientes_alterados (cliente_id)
+SELECT cliente_id FROM clientes
+WHERE cliente_id > :de_clientes AND cliente_id <= :ate_clientes
+UNION
+SELECT cliente_id FROM vendas
+WHERE venda_id > :de_vendas AND venda_id <= :ate_vendas
+UNION
+SELECT cliente_id FROM test_drives
+WHERE test_drive_id > :de_test_drives AND test_drive_id <= :ate_test_drives
+UNION
+SELECT v.cliente_id FROM servicos_pos_venda s
+JOIN vendas v ON v.venda_id = s.venda_id
+WHERE s.servico_id > :de_servicos_pos_venda AND s.servico_id <= :ate_servicos_pos_venda
+"""
+
+
+def _preparar_banco(conn, sql_path=SQL_PATH):
+    """
+    Tabela de segmentos, tabela temporária de clientes alterados e os índices
+    por cliente do script SQL (bancos antigos podem não ter)
+    """
+    conn.execute(SQL_TABELA_SEGMENTOS)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS clientes_alterados (cliente_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.clientes_alterados")
+    _, indices = separar_indices(ler_comandos_sql(sql_path))
+    for comando in indices:
+        if '(cliente_id' in comando:
+            conn.execute(comando)
+
+
+def _atribuir(conn, modelo, scaler, marcas, atuais, completo):
+    """
+    Perfil dos clientes alterados (ou de todos, com completo=True) e o
+    centróide mais próximo de cada um
+    """
+    conn.execute("DELETE FROM temp.clientes_alterados")
+    if completo:
+        conn.execute("INSERT INTO temp.clientes_alterados SELECT cliente_id FROM clientes")
+    else:
+        parametros = {f"de_{t}": marcas[t] for t in TABELAS_ATIVIDADE}
+        parametros.update({f"ate_{t}": atuais[t] for t in TABELAS_ATIVIDADE})
+        conn.execute(SQL_CLIENTES_ALTERADOS, parametros)
+
+    perfil = aplicar_esquema(pd.read_sql(consulta_perfil_clientes('temp.clientes_alterados'), conn))
+    if perfil.empty:
+        vazio = np.empty(0, dtype=int)
+        return vazio, np.empty((0, len(FEATURES_PERFIL_CLIENTES))), vazio, np.empty(0)
+    X = scaler.transform(perfil[FEATURES_PERFIL_CLIENTES].fillna(0))
+    rotulos = modelo.predict(X)
+    distancias = np.linalg.norm(X - modelo.cluster_centers_[rotulos], axis=1)
+    return perfil['cliente_id'].to_numpy(), X, rotulos, distancias
+
+
+def atualizar_centroides(centroides, contagens, X, rotulos):
+    """
+    Passo de mini-batch: centróide += (soma dos novos - m * centróide) / (n + m),
+    onde n é quantos pontos o centróide já representa e m os novos
+    """
+    centroides = centroides.copy()
+    contagens = contagens.copy()
+    for cluster in np.unique(rotulos):
+        pontos = X[rotulos == cluster]
+        contagens[cluster] += len(pontos)
+        centroides[cluster] += (pontos.sum(axis=0) - len(pontos) * centroides[cluster]) / contagens[cluster]
+    return centroides, contagens
+
+
+def _gravar_segmentos(conn, cliente_ids, rotulos, distancias, atuais):
+    """
+    UPSERT dos segmentos e marcas d'água na mesma transação
+    """
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(
+            """
+            INSERT INTO segmentos_clientes (cliente_id, cluster, distancia_centroide, atualizado_em)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (cliente_id) DO UPDATE SET
+                cluster = excluded.cluster,
+                distancia_centroide = excluded.distancia_centroide,
+                atualizado_em = excluded.atualizado_em
+            """,
+            zip(cliente_ids.tolist(), rotulos.tolist(), distancias.tolist(), [agora] * len(rotulos))
+        )
+        for tabela in TABELAS_ATIVIDADE:
+            gravar_marca(conn, tabela, atuais[tabela], None, processo=PROCESSO_SEGMENTACAO)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def atualizar_segmentacao(db_path=DB_PATH, diretorio=DIRETORIO_MODELOS, limite_drift=LIMITE_DRIFT):
+    """
+    Atualiza os segmentos em O(clientes alterados). Na primeira execução
+    (sem marcas) atribui todos os clientes. Retorna um resumo da execução.
+    """
+    inicio = time.perf_counter()
+    modelo = joblib.load(os.path.join(diretorio, ARQUIVO_MODELO))
+    scaler = joblib.load(os.path.join(diretorio, ARQUIVO_SCALER))
+    caminho_estado = os.path.join(diretorio, ARQUIVO_ESTADO)
+    estado = joblib.load(caminho_estado) if os.path.exists(caminho_estado) else None
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        atualizar_datas(conn)
+        _preparar_banco(conn)
+        marcas = {t: ler_marca(conn, t, processo=PROCESSO_SEGMENTACAO)[0] for t in TABELAS_ATIVIDADE}
+        atuais = {
+            t: conn.execute(f"SELECT COALESCE(MAX({COLUNAS_ID[t]}), 0) FROM {t}").fetchone()[0]
+            for t in TABELAS_ATIVIDADE
+        }
+        completo = marcas['clientes'] == 0 or estado is None
+        cliente_ids, X, rotulos, distancias = _atribuir(conn, modelo, scaler, marcas, atuais, completo)
+
+        drift = 0.0
+        if completo:
+            modo = 'completa'
+            if estado is None:
+                # Modelo salvo sem estado: parte das atribuições atuais
+                estado = {
+                    'contagens': np.bincount(rotulos, minlength=modelo.n_clusters).astype(float),
+                    'centroides_referencia': modelo.cluster_centers_.copy()
+                }
+                _gravar(estado, caminho_estado)
+        elif len(rotulos):
+            centroides, contagens = atualizar_centroides(modelo.cluster_centers_, estado['contagens'], X, rotulos)
+            drift = float(np.linalg.norm(centroides - estado['centroides_referencia'], axis=1).max())
+            if drift > limite_drift:
+                modo = 'retreino'
+                print(f"⚠️ Drift dos centróides {drift:.3f} > {limite_drift}: retreinando com K={modelo.n_clusters}")
+                modelo, scaler, _ = executar_segmentacao(db_path=db_path, k=modelo.n_clusters, diretorio=diretorio)
+                cliente_ids, X, rotulos, distancias = _atribuir(conn, modelo, scaler, marcas, atuais, completo=True)
+            else:
+                modo = 'incremental'
+                modelo.cluster_centers_ = centroides
+                estado['contagens'] = contagens
+                _gravar(modelo, os.path.join(diretorio, ARQUIVO_MODELO))
+                _gravar(estado, caminho_estado)
+        else:
+            modo = 'sem alterações'
+
+        _gravar_segmentos(conn, cliente_ids, rotulos, distancias, atuais)
+    finally:
+        conn.close()
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ Segmentação {modo}: {len(rotulos):,} clientes atribuídos "
+          f"(drift {drift:.3f}) em {segundos:.2f}s")
+    return {'modo': modo, 'clientes': len(rotulos), 'drift': drift, 'segundos': segundos}
+
+# ===============================================
+# EXECUTAR
+# ===============================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Treina ou atualiza o modelo de segmentação de clientes")
+    parser.add_argument("--banco", default=DB_PATH, help="arquivo .db")
+    parser.add_argument("--k", type=int, default=None, help="número de clusters (padrão: escolhido pelo silhouette)")
+    parser.add_argument("--algoritmo", choices=['auto', 'kmeans', 'minibatch'], default='auto')
+    parser.add_argument("--workers", type=int, default=None, help="processos para avaliar os K")
+    parser.add_argument("--atualizar", action="store_true",
+                        help="atualização incremental com o modelo salvo (só clientes alterados)")
+    parser.add_argument("--limite-drift", type=float, default=LIMITE_DRIFT,
+                        help="deslocamento dos centróides que dispara o retreino completo")
+    args = parser.parse_args()
+
+    if args.atualizar:
+        atualizar_segmentacao(db_path=args.banco, limite_drift=args.limite_drift)
+    else:
+        executar_segmentacao(db_path=args.banco, k=args.k, algoritmo=args.algoritmo, n_workers=args.workers)